@@ -19,7 +19,17 @@ from app.db.base import Base
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.goal import Goal, GoalContribution
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationCounter
+from app.models.idempotency import IdempotencyKey
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.categorization_rule import CategorizationRule
+from app.models.outbox import OutboxEvent
+from app.models.data_version import DataVersion
+from app.models.transaction_archive import TransactionArchiveChunk, TransactionMonthlyAggregate
+from app.models.fx_rate import FxRate
+from app.models.category import Category, CategoryClosure, CategoryRedirect
+from app.models.monthly_total import MonthlyCategoryTotal, MonthlyLedger
+from app.models.budget import Budget, BudgetAlert
 
 target_metadata = Base.metadata
 
@@ -0,0 +1,45 @@
+"""transaction description search
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    op.add_column(
+        'transactions',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('portuguese'::regconfig, coalesce(description, ''))", persisted=True),
+        ),
+    )
+    op.create_index(
+        'ix_transactions_user_search_vector', 'transactions',
+        ['user_id', 'search_vector'], postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_transactions_user_description_trgm', 'transactions',
+        ['user_id', 'description'], postgresql_using='gin',
+        postgresql_ops={'description': 'gin_trgm_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_description_trgm', table_name='transactions')
+    op.drop_index('ix_transactions_user_search_vector', table_name='transactions')
+    op.drop_column('transactions', 'search_vector')
@@ -0,0 +1,26 @@
+"""transaction filter indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_transactions_user_date', 'transactions', ['user_id', 'date'])
+    op.create_index('ix_transactions_user_category_date', 'transactions', ['user_id', 'category', 'date'])
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_category_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_date', table_name='transactions')
@@ -0,0 +1,52 @@
+"""recurring transactions
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'recurring_transactions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('type', postgresql.ENUM(name='transactiontype', create_type=False), nullable=False),
+        sa.Column('category', postgresql.ENUM(name='transactioncategory', create_type=False), nullable=False),
+        sa.Column('frequency', sa.Enum('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY', name='recurrencefrequency'), nullable=False),
+        sa.Column('interval', sa.Integer(), nullable=False),
+        sa.Column('day_of_month', sa.Integer(), nullable=True),
+        sa.Column('start_date', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('end_date', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_recurring_transactions_id', 'recurring_transactions', ['id'])
+    op.create_index('ix_recurring_transactions_user_id', 'recurring_transactions', ['user_id'])
+    op.create_index(
+        'ix_recurring_transactions_due', 'recurring_transactions', ['next_run_at'],
+        postgresql_where=sa.text('is_active = true'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_recurring_transactions_due', table_name='recurring_transactions')
+    op.drop_index('ix_recurring_transactions_user_id', table_name='recurring_transactions')
+    op.drop_index('ix_recurring_transactions_id', table_name='recurring_transactions')
+    op.drop_table('recurring_transactions')
+    sa.Enum(name='recurrencefrequency').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,42 @@
+"""categorization rules
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'categorization_rules',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('match_type', sa.Enum('KEYWORD', 'REGEX', 'MERCHANT', name='rulematchtype'), nullable=False),
+        sa.Column('pattern', sa.String(), nullable=False),
+        sa.Column('merchant', sa.String(), nullable=True),
+        sa.Column('category', postgresql.ENUM(name='transactioncategory', create_type=False), nullable=False),
+        sa.Column('priority', sa.Integer(), nullable=False),
+        sa.Column('family_head_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_categorization_rules_id', 'categorization_rules', ['id'])
+    op.create_index('ix_categorization_rules_family_head_id', 'categorization_rules', ['family_head_id'])
+
+
+def downgrade():
+    op.drop_index('ix_categorization_rules_family_head_id', table_name='categorization_rules')
+    op.drop_index('ix_categorization_rules_id', table_name='categorization_rules')
+    op.drop_table('categorization_rules')
+    sa.Enum(name='rulematchtype').drop(op.get_bind(), checkfirst=True)
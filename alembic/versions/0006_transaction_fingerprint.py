@@ -0,0 +1,53 @@
+"""transaction fingerprints for duplicate detection
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.fingerprint import transaction_fingerprint
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    op.add_column('transactions', sa.Column('fingerprint', sa.String(length=64), nullable=True))
+
+    # Backfill in keyset batches, the normalization lives in Python
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, user_id, date, amount, description FROM transactions "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        conn.execute(
+            sa.text("UPDATE transactions SET fingerprint = :fingerprint WHERE id = :id"),
+            [
+                {"id": row.id, "fingerprint": transaction_fingerprint(row.user_id, row.date, row.amount, row.description)}
+                for row in rows
+            ],
+        )
+
+    op.create_index('ix_transactions_user_fingerprint', 'transactions', ['user_id', 'fingerprint'])
+
+
+def downgrade():
+    op.drop_index('ix_transactions_user_fingerprint', table_name='transactions')
+    op.drop_column('transactions', 'fingerprint')
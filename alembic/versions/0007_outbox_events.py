@@ -0,0 +1,40 @@
+"""transactional outbox for the change feed
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('txid', sa.BigInteger(), nullable=False, server_default=sa.text('pg_current_xact_id()::text::bigint')),
+        sa.Column('entity', sa.String(length=32), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('op', sa.String(length=16), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_outbox_events_user_txid', 'outbox_events', ['user_id', 'txid', 'id'])
+    op.create_index('ix_outbox_events_txid', 'outbox_events', ['txid', 'id'])
+    op.create_index('ix_outbox_events_created_at', 'outbox_events', ['created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_outbox_events_created_at', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_txid', table_name='outbox_events')
+    op.drop_index('ix_outbox_events_user_txid', table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,29 @@
+"""data version counters for etags
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'data_versions',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('entity', sa.String(length=32), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('data_versions')
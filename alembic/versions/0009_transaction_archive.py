@@ -0,0 +1,45 @@
+"""transaction archive and monthly aggregates
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'transaction_archive_chunks',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+    )
+    op.create_index('ix_transaction_archive_chunks_user_month', 'transaction_archive_chunks', ['user_id', 'month'])
+    op.create_table(
+        'transaction_monthly_aggregates',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('type', postgresql.ENUM(name='transactiontype', create_type=False), primary_key=True),
+        sa.Column('category', postgresql.ENUM(name='transactioncategory', create_type=False), primary_key=True),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('transaction_monthly_aggregates')
+    op.drop_index('ix_transaction_archive_chunks_user_month', table_name='transaction_archive_chunks')
+    op.drop_table('transaction_archive_chunks')
@@ -0,0 +1,41 @@
+"""store money as int64 cents
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+MONEY_COLUMNS = [
+    ('transactions', 'amount'),
+    ('recurring_transactions', 'amount'),
+    ('goals', 'target_amount'),
+    ('goals', 'current_amount'),
+    ('goal_contributions', 'amount'),
+    ('transaction_monthly_aggregates', 'total'),
+]
+
+
+def upgrade():
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column, type_=sa.BigInteger(),
+            postgresql_using=f'round({column}::numeric * 100)::bigint',
+        )
+
+
+def downgrade():
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column, type_=sa.Float(),
+            postgresql_using=f'{column}::double precision / 100',
+        )
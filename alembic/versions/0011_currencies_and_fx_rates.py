@@ -0,0 +1,39 @@
+"""transaction currencies and daily fx rates
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Everything recorded so far is in the base currency
+    for table in ('transactions', 'recurring_transactions'):
+        op.add_column(
+            table, sa.Column('currency', sa.String(3), nullable=False, server_default=settings.BASE_CURRENCY)
+        )
+    op.create_table(
+        'fx_rates',
+        sa.Column('currency', sa.String(3), primary_key=True),
+        sa.Column('date', sa.Date(), primary_key=True),
+        sa.Column('rate', sa.Numeric(18, 8), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+    )
+
+
+def downgrade():
+    op.drop_table('fx_rates')
+    op.drop_column('recurring_transactions', 'currency')
+    op.drop_column('transactions', 'currency')
@@ -0,0 +1,122 @@
+"""hierarchical categories with a closure table
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+CATEGORIES = [
+    'food', 'housing', 'transportation', 'utilities', 'healthcare', 'entertainment', 'education',
+    'clothing', 'savings', 'debt', 'gifts', 'other', 'salary', 'investment', 'bonus',
+]
+
+
+def upgrade():
+    op.create_table(
+        'categories',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.Column('parent_id', sa.Integer(), sa.ForeignKey('categories.id'), nullable=True),
+        sa.Column('root_category', postgresql.ENUM(name='transactioncategory', create_type=False), nullable=False),
+        sa.Column('family_head_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_categories_id', 'categories', ['id'])
+    op.create_index('ix_categories_family_head_id', 'categories', ['family_head_id'])
+    op.create_index(
+        'ix_categories_system_root', 'categories', ['root_category'],
+        unique=True, postgresql_where=sa.text('parent_id IS NULL'),
+    )
+    op.create_table(
+        'category_closure',
+        sa.Column('ancestor_id', sa.Integer(), sa.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('descendant_id', sa.Integer(), sa.ForeignKey('categories.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('depth', sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        'ix_category_closure_descendant', 'category_closure', ['descendant_id', 'ancestor_id', 'depth']
+    )
+
+    # The enum values become the system root categories
+    for value in CATEGORIES:
+        op.execute(
+            f"INSERT INTO categories (name, root_category) "
+            f"VALUES ('{value.capitalize()}', '{value.upper()}')"
+        )
+    op.execute(
+        "INSERT INTO category_closure (ancestor_id, descendant_id, depth) SELECT id, id, 0 FROM categories"
+    )
+
+    # Existing transactions and archived totals sit at the root of their category
+    op.add_column('transactions', sa.Column('category_id', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE transactions t SET category_id = c.id FROM categories c "
+        "WHERE c.parent_id IS NULL AND c.root_category = t.category"
+    )
+    op.alter_column('transactions', 'category_id', nullable=False)
+    op.create_foreign_key(
+        'transactions_category_id_fkey', 'transactions', 'categories', ['category_id'], ['id']
+    )
+    op.create_index('ix_transactions_category_id', 'transactions', ['category_id'])
+
+    op.add_column('transaction_monthly_aggregates', sa.Column('category_id', sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE transaction_monthly_aggregates a SET category_id = c.id FROM categories c "
+        "WHERE c.parent_id IS NULL AND c.root_category = a.category"
+    )
+    op.alter_column('transaction_monthly_aggregates', 'category_id', nullable=False)
+    op.create_foreign_key(
+        'transaction_monthly_aggregates_category_id_fkey', 'transaction_monthly_aggregates', 'categories',
+        ['category_id'], ['id']
+    )
+    op.drop_constraint('transaction_monthly_aggregates_pkey', 'transaction_monthly_aggregates', type_='primary')
+    op.create_primary_key(
+        'transaction_monthly_aggregates_pkey', 'transaction_monthly_aggregates',
+        ['user_id', 'month', 'type', 'category', 'category_id'],
+    )
+
+
+def downgrade():
+    # Subcategory totals fold back into their root category
+    op.execute(
+        "CREATE TEMPORARY TABLE folded_aggregates AS "
+        "SELECT user_id, month, type, category, sum(total) AS total, sum(count) AS count "
+        "FROM transaction_monthly_aggregates GROUP BY user_id, month, type, category"
+    )
+    op.execute("DELETE FROM transaction_monthly_aggregates")
+    op.drop_constraint('transaction_monthly_aggregates_pkey', 'transaction_monthly_aggregates', type_='primary')
+    op.drop_constraint(
+        'transaction_monthly_aggregates_category_id_fkey', 'transaction_monthly_aggregates', type_='foreignkey'
+    )
+    op.drop_column('transaction_monthly_aggregates', 'category_id')
+    op.create_primary_key(
+        'transaction_monthly_aggregates_pkey', 'transaction_monthly_aggregates',
+        ['user_id', 'month', 'type', 'category'],
+    )
+    op.execute(
+        "INSERT INTO transaction_monthly_aggregates (user_id, month, type, category, total, count) "
+        "SELECT user_id, month, type, category, total, count FROM folded_aggregates"
+    )
+    op.execute("DROP TABLE folded_aggregates")
+
+    op.drop_index('ix_transactions_category_id', table_name='transactions')
+    op.drop_constraint('transactions_category_id_fkey', 'transactions', type_='foreignkey')
+    op.drop_column('transactions', 'category_id')
+    op.drop_index('ix_category_closure_descendant', table_name='category_closure')
+    op.drop_table('category_closure')
+    op.drop_index('ix_categories_system_root', table_name='categories')
+    op.drop_index('ix_categories_family_head_id', table_name='categories')
+    op.drop_index('ix_categories_id', table_name='categories')
+    op.drop_table('categories')
@@ -0,0 +1,78 @@
+"""monthly category totals and category budgets
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'monthly_category_totals',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('type', postgresql.ENUM(name='transactiontype', create_type=False), primary_key=True),
+        sa.Column('category_id', sa.Integer(), sa.ForeignKey('categories.id'), primary_key=True),
+        sa.Column('total', sa.BigInteger(), nullable=False),
+        sa.Column('count', sa.BigInteger(), nullable=False),
+    )
+    # Live transactions converted like amount_in_base_currency, plus the archived totals
+    op.execute(f"""
+        INSERT INTO monthly_category_totals (user_id, month, type, category_id, total, count)
+        SELECT user_id, month, type, category_id, sum(total), sum(count) FROM (
+            SELECT t.user_id, date_trunc('month', t.date)::date AS month, t.type, t.category_id,
+                CASE WHEN t.currency = '{settings.BASE_CURRENCY}' THEN t.amount ELSE round(t.amount * coalesce(
+                    (SELECT r.rate FROM fx_rates r WHERE r.currency = t.currency AND r.date <= t.date::date
+                     ORDER BY r.date DESC LIMIT 1),
+                    (SELECT r.rate FROM fx_rates r WHERE r.currency = t.currency ORDER BY r.date LIMIT 1)
+                ))::bigint END AS total,
+                1 AS count
+            FROM transactions t
+            UNION ALL
+            SELECT user_id, month, type, category_id, total, count FROM transaction_monthly_aggregates
+        ) AS rows
+        GROUP BY user_id, month, type, category_id
+    """)
+
+    op.create_table(
+        'budgets',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('family_head_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('category_id', sa.Integer(), sa.ForeignKey('categories.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('amount', sa.BigInteger(), nullable=False),
+        sa.Column('warning_threshold', sa.Float(), nullable=False),
+        sa.Column('critical_threshold', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_budgets_id', 'budgets', ['id'])
+    op.create_index('ix_budgets_family_head_id', 'budgets', ['family_head_id'])
+    op.create_table(
+        'budget_alerts',
+        sa.Column('budget_id', sa.Integer(), sa.ForeignKey('budgets.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('warning_sent', sa.Boolean(), nullable=False),
+        sa.Column('critical_sent', sa.Boolean(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('budget_alerts')
+    op.drop_index('ix_budgets_family_head_id', table_name='budgets')
+    op.drop_index('ix_budgets_id', table_name='budgets')
+    op.drop_table('budgets')
+    op.drop_table('monthly_category_totals')
@@ -0,0 +1,49 @@
+"""monthly ledgers
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0014'
+down_revision = '0013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'monthly_ledgers',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('income', sa.BigInteger(), nullable=False),
+        sa.Column('expenses', sa.BigInteger(), nullable=False),
+        sa.Column('warning_sent', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('critical_sent', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    # Totals come from the monthly category totals, the flags from the alerts already sent
+    op.execute("""
+        INSERT INTO monthly_ledgers (user_id, month, income, expenses, warning_sent, critical_sent)
+        SELECT t.user_id, t.month,
+            coalesce(sum(t.total) FILTER (WHERE t.type = 'INCOME'), 0),
+            coalesce(sum(t.total) FILTER (WHERE t.type = 'EXPENSE'), 0),
+            EXISTS (
+                SELECT 1 FROM notifications n WHERE n.user_id = t.user_id AND n.type = 'BUDGET_WARNING'
+                AND n.created_at >= t.month AND n.created_at < t.month + interval '1 month'
+            ),
+            EXISTS (
+                SELECT 1 FROM notifications n WHERE n.user_id = t.user_id AND n.type = 'BUDGET_CRITICAL'
+                AND n.created_at >= t.month AND n.created_at < t.month + interval '1 month'
+            )
+        FROM monthly_category_totals t
+        GROUP BY t.user_id, t.month
+    """)
+
+
+def downgrade():
+    op.drop_table('monthly_ledgers')
@@ -0,0 +1,37 @@
+"""unread notification counters
+
+Revision ID: 0015
+Revises: 0014
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0015'
+down_revision = '0014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_notifications_user_unread', 'notifications', ['user_id'],
+        postgresql_where=sa.text('is_read = false'),
+    )
+    op.create_table(
+        'notification_counters',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('unread', sa.BigInteger(), nullable=False),
+    )
+    op.execute("""
+        INSERT INTO notification_counters (user_id, unread)
+        SELECT user_id, count(*) FROM notifications WHERE is_read = false GROUP BY user_id
+    """)
+
+
+def downgrade():
+    op.drop_table('notification_counters')
+    op.drop_index('ix_notifications_user_unread', table_name='notifications')
@@ -0,0 +1,39 @@
+"""notification retention and digests
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('notifications', sa.Column('digest_window', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('notifications', sa.Column('count', sa.Integer(), nullable=False, server_default='1'))
+    op.create_index('ix_notifications_user_created_at', 'notifications', ['user_id', 'created_at'])
+    op.create_index(
+        'ix_notifications_read_created_at', 'notifications', ['created_at'],
+        postgresql_where=sa.text('is_read = true'),
+    )
+    op.create_index(
+        'ix_notifications_digest', 'notifications', ['user_id', 'type', 'title', 'digest_window'],
+        unique=True,
+        postgresql_where=sa.text('digest_window IS NOT NULL AND is_read = false'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_notifications_digest', table_name='notifications')
+    op.drop_index('ix_notifications_read_created_at', table_name='notifications')
+    op.drop_index('ix_notifications_user_created_at', table_name='notifications')
+    op.drop_column('notifications', 'count')
+    op.drop_column('notifications', 'digest_window')
@@ -0,0 +1,53 @@
+"""recompute transaction fingerprints on the UTC calendar day
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.fingerprint import transaction_fingerprint
+
+
+# revision identifiers, used by Alembic.
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade():
+    # Fingerprints used the day in whatever offset the value carried; archived
+    # rows keep theirs, duplicates are only looked up among live transactions
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(
+                "SELECT id, user_id, date, amount, currency, description, fingerprint FROM transactions "
+                "WHERE id > :last_id ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE},
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        # Amounts are stored as cents since 0010
+        changed = []
+        for row in rows:
+            fingerprint = transaction_fingerprint(
+                row.user_id, row.date, row.amount / 100, row.description, row.currency
+            )
+            if fingerprint != row.fingerprint:
+                changed.append({"id": row.id, "fingerprint": fingerprint})
+        if changed:
+            conn.execute(sa.text("UPDATE transactions SET fingerprint = :fingerprint WHERE id = :id"), changed)
+
+
+def downgrade():
+    # The previous fingerprints depended on the offset of the original input
+    pass
@@ -0,0 +1,32 @@
+"""separate notification type for goals a user was added to
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0018'
+down_revision = '0017'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A new enum value cannot be used in the transaction that adds it
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE notificationtype ADD VALUE IF NOT EXISTS 'GOAL_ADDED'")
+
+    # New goal notifications were sent as contributions and merged into their digests
+    op.execute(
+        "UPDATE notifications SET type = 'GOAL_ADDED', digest_window = NULL "
+        "WHERE type = 'GOAL_CONTRIBUTION' AND title = 'Nova Meta Adicionada'"
+    )
+
+
+def downgrade():
+    # Enum values cannot be dropped, the rows go back to the contribution type
+    op.execute("UPDATE notifications SET type = 'GOAL_CONTRIBUTION' WHERE type = 'GOAL_ADDED'")
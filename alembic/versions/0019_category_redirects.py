@@ -0,0 +1,31 @@
+"""redirects of deleted categories to the category that took over their rows
+
+Revision ID: 0019
+Revises: 0018
+Create Date: 2026-10-20 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0019'
+down_revision = '0018'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Categories deleted before this revision are not known anymore, their archived rows stay at the root
+    op.create_table(
+        'category_redirects',
+        sa.Column('category_id', sa.Integer(), primary_key=True),
+        sa.Column('target_id', sa.Integer(), sa.ForeignKey('categories.id', ondelete='CASCADE'), nullable=False),
+    )
+    op.create_index('ix_category_redirects_target_id', 'category_redirects', ['target_id'])
+
+
+def downgrade():
+    op.drop_index('ix_category_redirects_target_id', table_name='category_redirects')
+    op.drop_table('category_redirects')
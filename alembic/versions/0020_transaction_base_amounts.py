@@ -0,0 +1,62 @@
+"""stored base currency amounts behind the monthly totals
+
+Revision ID: 0020
+Revises: 0019
+Create Date: 2026-10-20 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '0020'
+down_revision = '0019'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('transactions', sa.Column('base_amount', sa.BigInteger(), nullable=True))
+    op.create_index(
+        'ix_transactions_foreign_currency_date', 'transactions', ['currency', 'date'],
+        postgresql_where=sa.text(f"currency <> '{settings.BASE_CURRENCY}'"),
+    )
+
+    # Converted like amount_in_base_currency at today's rates
+    op.execute(f"""
+        UPDATE transactions t SET base_amount =
+            CASE WHEN t.currency = '{settings.BASE_CURRENCY}' THEN t.amount ELSE round(t.amount * coalesce(
+                (SELECT r.rate FROM fx_rates r WHERE r.currency = t.currency AND r.date <= t.date::date
+                 ORDER BY r.date DESC LIMIT 1),
+                (SELECT r.rate FROM fx_rates r WHERE r.currency = t.currency ORDER BY r.date LIMIT 1)
+            ))::bigint END
+    """)
+
+    # The totals may have drifted with edits across rate imports: rebuild them from the stored amounts
+    op.execute("DELETE FROM monthly_category_totals")
+    op.execute("""
+        INSERT INTO monthly_category_totals (user_id, month, type, category_id, total, count)
+        SELECT user_id, month, type, category_id, sum(total), sum(count) FROM (
+            SELECT user_id, date_trunc('month', date)::date AS month, type, category_id, base_amount AS total, 1 AS count
+            FROM transactions
+            UNION ALL
+            SELECT user_id, month, type, category_id, total, count FROM transaction_monthly_aggregates
+        ) AS rows
+        GROUP BY user_id, month, type, category_id
+    """)
+    # Ledgers keep their alert flags
+    op.execute("""
+        UPDATE monthly_ledgers l SET
+            income = coalesce((SELECT sum(t.total) FROM monthly_category_totals t
+                               WHERE t.user_id = l.user_id AND t.month = l.month AND t.type = 'INCOME'), 0),
+            expenses = coalesce((SELECT sum(t.total) FROM monthly_category_totals t
+                                 WHERE t.user_id = l.user_id AND t.month = l.month AND t.type = 'EXPENSE'), 0)
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_transactions_foreign_currency_date', table_name='transactions')
+    op.drop_column('transactions', 'base_amount')
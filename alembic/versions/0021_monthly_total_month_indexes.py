@@ -0,0 +1,28 @@
+"""month indexes for the budget checks over all users
+
+Revision ID: 0021
+Revises: 0020
+Create Date: 2026-10-20 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0021'
+down_revision = '0020'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_monthly_ledgers_month', 'monthly_ledgers', ['month'])
+    op.create_index(
+        'ix_monthly_category_totals_month_type_category', 'monthly_category_totals', ['month', 'type', 'category_id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_monthly_category_totals_month_type_category', table_name='monthly_category_totals')
+    op.drop_index('ix_monthly_ledgers_month', table_name='monthly_ledgers')
@@ -0,0 +1,118 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user, get_db
+from app.models.user import User
+from app.schemas.budget import Budget, BudgetCreate, BudgetUpdate, BudgetStatus
+from app.services.budget_service import BudgetService, current_month
+from app.services.category_service import CategoryService
+
+router = APIRouter()
+
+def check_budget_permissions(budget, current_user: User) -> None:
+    if budget.family_head_id != current_user.family_id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if not current_user.is_family_head and budget.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+@router.post("/budgets/", response_model=Budget)
+def create_budget(
+    *,
+    db: Session = Depends(get_db),
+    budget_in: BudgetCreate,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Create a monthly budget for a category. Family-wide budgets can only be created by the family head.
+    """
+    if not current_user.is_family_head:
+        # Regular users can only create budgets for themselves
+        if budget_in.user_id not in (None, current_user.id):
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        budget_in.user_id = current_user.id
+    elif budget_in.user_id and budget_in.user_id != current_user.id:
+        user = db.query(User).filter(User.id == budget_in.user_id).first()
+        if not user or user.family_head_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    category = CategoryService(db).get(budget_in.category_id)
+    if not category or not CategoryService(db).is_visible(category, current_user.family_id):
+        raise HTTPException(status_code=404, detail="Category not found")
+
+    budget_service = BudgetService(db)
+    return budget_service.create(obj_in=budget_in, family_head_id=current_user.family_id)
+
+@router.get("/budgets/", response_model=List[Budget])
+def read_budgets(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Retrieve budgets: all of the family's for the family head, the family-wide and own ones otherwise.
+    """
+    budget_service = BudgetService(db)
+    return budget_service.get_family_budgets(
+        family_head_id=current_user.family_id,
+        user_id=None if current_user.is_family_head else current_user.id,
+    )
+
+@router.get("/budgets/status", response_model=List[BudgetStatus])
+def read_budget_status(
+    db: Session = Depends(get_db),
+    year: Optional[int] = Query(None, description="Year, defaults to the current month"),
+    month: Optional[int] = Query(None, ge=1, le=12, description="Month, defaults to the current month"),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Get the spending and remaining amount of each budget in a month.
+    """
+    period = current_month()
+    if year or month:
+        period = period.replace(year=year or period.year, month=month or period.month)
+
+    budget_service = BudgetService(db)
+    return budget_service.get_status(
+        family_head_id=current_user.family_id,
+        month=period,
+        user_id=None if current_user.is_family_head else current_user.id,
+    )
+
+@router.put("/budgets/{budget_id}", response_model=Budget)
+def update_budget(
+    *,
+    db: Session = Depends(get_db),
+    budget_id: int,
+    budget_in: BudgetUpdate,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Update a budget.
+    """
+    budget_service = BudgetService(db)
+    budget = budget_service.get(id=budget_id)
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    check_budget_permissions(budget, current_user)
+    try:
+        return budget_service.update(db_obj=budget, obj_in=budget_in)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+@router.delete("/budgets/{budget_id}", response_model=Budget)
+def delete_budget(
+    *,
+    db: Session = Depends(get_db),
+    budget_id: int,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Delete a budget.
+    """
+    budget_service = BudgetService(db)
+    budget = budget_service.get(id=budget_id)
+    if not budget:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    check_budget_permissions(budget, current_user)
+    return budget_service.remove(id=budget_id)
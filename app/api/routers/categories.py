@@ -0,0 +1,75 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user, get_current_family_head, get_db
+from app.models.user import User
+from app.schemas.category import Category, CategoryCreate, CategoryUpdate
+from app.services.category_service import CategoryService
+
+router = APIRouter()
+
+@router.get("/categories/", response_model=List[Category])
+def read_categories(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Retrieve the system categories and the family's subcategories.
+    """
+    category_service = CategoryService(db)
+    return category_service.get_family_categories(family_head_id=current_user.family_id)
+
+@router.post("/categories/", response_model=Category)
+def create_category(
+    *,
+    db: Session = Depends(get_db),
+    category_in: CategoryCreate,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Create a family subcategory, e.g. Restaurants below Food.
+    """
+    category_service = CategoryService(db)
+    try:
+        return category_service.create(obj_in=category_in, family_head_id=current_user.family_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@router.put("/categories/{category_id}", response_model=Category)
+def update_category(
+    *,
+    db: Session = Depends(get_db),
+    category_id: int,
+    category_in: CategoryUpdate,
+    current_user: User = Depends(get_current_family_head),
+) -> Any:
+    """
+    Rename a family category.
+    """
+    category_service = CategoryService(db)
+    category = category_service.get(id=category_id)
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    if category.family_head_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return category_service.update(db_obj=category, obj_in=category_in)
+
+@router.delete("/categories/{category_id}", response_model=Category)
+def delete_category(
+    *,
+    db: Session = Depends(get_db),
+    category_id: int,
+    current_user: User = Depends(get_current_family_head),
+) -> Any:
+    """
+    Delete a family category. Its subcategories and transactions move to its parent.
+    """
+    category_service = CategoryService(db)
+    category = category_service.get(id=category_id)
+    if not category:
+        raise HTTPException(status_code=404, detail="Category not found")
+    if category.family_head_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return category_service.remove(db_obj=category)
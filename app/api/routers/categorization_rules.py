@@ -0,0 +1,104 @@
+from typing import Any, List
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user, get_current_family_head, get_db
+from app.models.user import User
+from app.schemas.categorization_rule import (
+    CategorizationRule, CategorizationRuleCreate, CategorizationRuleUpdate
+)
+from app.services.categorization_service import CategorizationService
+from app.jobs import recategorize_transactions
+
+router = APIRouter()
+
+@router.post("/categorization-rules/", response_model=CategorizationRule)
+def create_categorization_rule(
+    *,
+    db: Session = Depends(get_db),
+    rule_in: CategorizationRuleCreate,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Create new categorization rule. Family-wide rules can only be created by the family head.
+    """
+    if not current_user.is_family_head:
+        # Regular users can only create rules for themselves
+        if rule_in.user_id not in (None, current_user.id):
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        rule_in.user_id = current_user.id
+    elif rule_in.user_id and rule_in.user_id != current_user.id:
+        user = db.query(User).filter(User.id == rule_in.user_id).first()
+        if not user or user.family_head_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    categorization_service = CategorizationService(db)
+    return categorization_service.create(obj_in=rule_in, family_head_id=current_user.family_id)
+
+@router.get("/categorization-rules/", response_model=List[CategorizationRule])
+def read_categorization_rules(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Retrieve the categorization rules of the family.
+    """
+    categorization_service = CategorizationService(db)
+    return categorization_service.get_family_rules(family_head_id=current_user.family_id)
+
+@router.put("/categorization-rules/{rule_id}", response_model=CategorizationRule)
+def update_categorization_rule(
+    *,
+    db: Session = Depends(get_db),
+    rule_id: int,
+    rule_in: CategorizationRuleUpdate,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Update a categorization rule.
+    """
+    categorization_service = CategorizationService(db)
+    rule = categorization_service.get(id=rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Categorization rule not found")
+    if rule.family_head_id != current_user.family_id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if not current_user.is_family_head and rule.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return categorization_service.update(db_obj=rule, obj_in=rule_in)
+
+@router.delete("/categorization-rules/{rule_id}", response_model=CategorizationRule)
+def delete_categorization_rule(
+    *,
+    db: Session = Depends(get_db),
+    rule_id: int,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Delete a categorization rule.
+    """
+    categorization_service = CategorizationService(db)
+    rule = categorization_service.get(id=rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Categorization rule not found")
+    if rule.family_head_id != current_user.family_id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if not current_user.is_family_head and rule.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return categorization_service.remove(id=rule_id)
+
+@router.post("/categorization-rules/apply", status_code=202)
+def apply_categorization_rules(
+    *,
+    background_tasks: BackgroundTasks,
+    only_uncategorized: bool = True,
+    current_user: User = Depends(get_current_family_head),
+) -> Any:
+    """
+    Re-categorize the family's transaction history in the background.
+    """
+    background_tasks.add_task(
+        recategorize_transactions.run_for_family, current_user.id, only_uncategorized
+    )
+    return {"detail": "Re-categorization started"}
@@ -0,0 +1,43 @@
+from typing import Any, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user, get_db
+from app.models.user import User
+from app.schemas.outbox import ChangeFeed
+from app.services.outbox_service import OutboxService, TRACKED, decode_cursor
+
+router = APIRouter()
+
+ENTITIES = [entity for entity, _ in TRACKED.values()]
+
+@router.get("/changes/", response_model=ChangeFeed)
+def read_changes(
+    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor returned by the previous page"),
+    limit: int = Query(100, gt=0, le=1000),
+    entity: Optional[List[str]] = Query(None, description=f"Only these entities: {', '.join(ENTITIES)}"),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Read the change feed of transactions, goals, contributions and notifications.
+
+    Family heads see the changes of the whole family, other users only their own.
+    Start without a cursor and keep passing the returned one to receive new changes.
+    """
+    try:
+        decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Invalid cursor")
+    if entity and set(entity) - set(ENTITIES):
+        raise HTTPException(status_code=422, detail=f"Unknown entities: {', '.join(sorted(set(entity) - set(ENTITIES)))}")
+
+    user_ids = [current_user.id]
+    if current_user.is_family_head:
+        user_ids = [member.id for member in db.query(User.id).filter(
+            (User.id == current_user.id) | (User.family_head_id == current_user.id)
+        ).all()]
+
+    outbox_service = OutboxService(db)
+    return outbox_service.get_changes(user_ids=user_ids, cursor=cursor, limit=limit, entities=entity)
@@ -1,13 +1,15 @@
-from typing import Any, List
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user, get_db
+from app.core.deps import get_current_user, get_db, replay_idempotent_response
 from app.models.user import User
-from app.schemas.goal import Goal, GoalCreate, GoalUpdate, GoalContribution, GoalContributionCreate
+from app.schemas.goal import Goal, GoalCreate, GoalUpdate, GoalContribution, GoalContributionCreate, GOAL_FIELDS
 from app.services.goal_service import GoalService
 from app.services.notification_service import NotificationService
+from app.services.idempotency_service import IdempotencyService
+from app.utils.serialization import get_row_serializer
 
 router = APIRouter()
 
@@ -22,20 +24,11 @@ def create_goal(
     Create new goal.
     """
     goal_service = GoalService(db)
-    notification_service = NotificationService(db)
     
-    # Create the goal
+    # Create the goal, its participants and their notifications in one transaction
     goal = goal_service.create(obj_in=goal_in, creator_id=current_user.id)
     
-    # Send notifications to all participants
-    for participant_id in goal_in.participant_ids:
-        notification_service.create_goal_notification(
-            user_id=participant_id,
-            goal_id=goal.id,
-            goal_title=goal.title
-        )
-    
-    return goal
+    return dict(zip(GOAL_FIELDS, goal_service.get_goal_row(goal.id)))
 
 @router.get("/goals/", response_model=List[Goal])
 def read_goals(
@@ -48,7 +41,8 @@ def read_goals(
     Retrieve goals.
     """
     goal_service = GoalService(db)
-    return goal_service.get_user_goals(user_id=current_user.id, skip=skip, limit=limit)
+    rows = goal_service.get_user_goal_rows(user_id=current_user.id, skip=skip, limit=limit)
+    return get_row_serializer(Goal).response(rows)
 
 @router.get("/goals/{goal_id}", response_model=Goal)
 def read_goal(
@@ -61,15 +55,16 @@ def read_goal(
     Get specific goal by ID.
     """
     goal_service = GoalService(db)
-    goal = goal_service.get(id=goal_id)
-    if not goal:
+    row = goal_service.get_goal_row(goal_id)
+    if not row:
         raise HTTPException(status_code=404, detail="Goal not found")
+    row = dict(zip(GOAL_FIELDS, row))
     
     # Check if user is creator or participant
-    if goal.creator_id != current_user.id and current_user.id not in [p.id for p in goal.participants]:
+    if row["creator_id"] != current_user.id and current_user.id not in row["participants"]:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    return goal
+    return row
 
 @router.put("/goals/{goal_id}", response_model=Goal)
 def update_goal(
@@ -90,7 +85,7 @@ def update_goal(
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     goal = goal_service.update(db_obj=goal, obj_in=goal_in)
-    return goal
+    return dict(zip(GOAL_FIELDS, goal_service.get_goal_row(goal.id)))
 
 @router.post("/goals/{goal_id}/contribute", response_model=GoalContribution)
 def contribute_to_goal(
@@ -99,12 +94,16 @@ def contribute_to_goal(
     goal_id: int,
     contribution_in: GoalContributionCreate,
     current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
 ) -> Any:
     """
     Contribute to a goal.
+
+    Retries sent with the same `Idempotency-Key` header replay the first response.
     """
     goal_service = GoalService(db)
     notification_service = NotificationService(db)
+    idempotency_service = IdempotencyService(db)
     
     goal = goal_service.get(id=goal_id)
     if not goal:
@@ -113,24 +112,51 @@ def contribute_to_goal(
     # Check if user is a participant
     if current_user.id not in [p.id for p in goal.participants] and goal.creator_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not a participant in this goal")
+
+    if idempotency_key:
+        request_hash = IdempotencyService.request_hash(f"POST /goals/{goal_id}/contribute", contribution_in)
+        stored = idempotency_service.begin(current_user.id, idempotency_key, request_hash)
+        if stored:
+            return replay_idempotent_response(stored, request_hash)
     
-    # Create contribution
-    contribution = goal_service.add_contribution(
-        goal_id=goal_id,
-        user_id=current_user.id,
-        amount=contribution_in.amount
+    # Create contribution, with a key it is committed along with its stored response
+    try:
+        contribution, completed = goal_service.add_contribution(
+            goal_id=goal_id,
+            user_id=current_user.id,
+            amount=contribution_in.amount,
+            commit=not idempotency_key,
+        )
+        response_body = GoalContribution.model_validate(contribution).model_dump_json().encode()
+        if idempotency_key:
+            idempotency_service.complete(current_user.id, idempotency_key, 200, response_body)
+    except ValueError:
+        # Deleted since it was read
+        if idempotency_key:
+            idempotency_service.release(current_user.id, idempotency_key)
+        raise HTTPException(status_code=404, detail="Goal not found")
+    except Exception:
+        if idempotency_key:
+            idempotency_service.release(current_user.id, idempotency_key)
+        raise
+
+    # Let the others taking part know about the contribution
+    notification_service.create_contribution_notifications(
+        user_ids=[
+            user_id for user_id in (goal.creator_id, *(participant.id for participant in goal.participants))
+            if user_id != current_user.id
+        ],
+        contributor_name=current_user.full_name,
+        goal_title=goal.title,
+        amount=contribution_in.amount,
     )
+
+    # Notify all participants when this contribution completed the goal
+    if completed:
+        notification_service.create_goal_achieved_notifications(
+            user_ids=[participant.id for participant in goal.participants],
+            goal_id=goal.id,
+            goal_title=goal.title
+        )
     
-    # Check if goal is completed
-    if goal.current_amount >= goal.target_amount:
-        goal_service.mark_as_completed(goal_id=goal_id)
-        
-        # Notify all participants
-        for participant in goal.participants:
-            notification_service.create_goal_achieved_notification(
-                user_id=participant.id,
-                goal_id=goal.id,
-                goal_title=goal.title
-            )
-    
-    return contribution
+    return Response(content=response_body, media_type="application/json")
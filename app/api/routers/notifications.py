@@ -1,17 +1,24 @@
 from typing import Any, List
+import json
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user, get_db
+from app.core.config import settings
+from app.core.deps import get_current_user, get_db, not_modified
 from app.models.user import User
-from app.schemas.notification import Notification, NotificationCreate, NotificationUpdate
+from app.schemas.notification import Notification, NotificationCreate, NotificationUpdate, NotificationUnreadCount
 from app.services.notification_service import NotificationService
+from app.services.notification_broker import get_broker
+from app.services.data_version_service import DataVersionService
+from app.utils.serialization import get_row_serializer
 
 router = APIRouter()
 
 @router.get("/notifications/", response_model=List[Notification])
 def read_notifications(
+    request: Request,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
@@ -20,14 +27,70 @@ def read_notifications(
 ) -> Any:
     """
     Retrieve notifications.
+
+    Send the returned ETag in `If-None-Match` to get a 304 while nothing changed.
     """
+    etag = DataVersionService(db).etag([current_user.id], ["notification"], request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
     notification_service = NotificationService(db)
-    return notification_service.get_user_notifications(
+    rows = notification_service.get_user_notification_rows(
         user_id=current_user.id,
         skip=skip,
         limit=limit,
         unread_only=unread_only
     )
+    response = get_row_serializer(Notification).response(rows)
+    response.headers["ETag"] = etag
+    return response
+
+@router.get("/notifications/unread-count", response_model=NotificationUnreadCount)
+def read_unread_count(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Get the number of unread notifications, for badges.
+    """
+    notification_service = NotificationService(db)
+    return {"unread": notification_service.get_unread_count(user_id=current_user.id)}
+
+@router.get("/notifications/stream")
+async def stream_notifications(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Receive new notifications as they are created, as Server-Sent Events.
+
+    Each `notification` event carries the notification as JSON, with its id as
+    the event id. Fetch `GET /notifications/` once after (re)connecting to get
+    what was created while disconnected, then stop polling.
+    """
+    user_id = current_user.id
+    # The stream outlives the request: give the session's connection back now
+    db.close()
+
+    async def events():
+        # Subscribed once streaming starts, a client gone before that leaves nothing behind
+        subscription = get_broker().subscribe(user_id)
+        try:
+            while not await request.is_disconnected():
+                payload = await subscription.get(timeout=settings.NOTIFICATION_STREAM_KEEPALIVE_SECONDS)
+                if payload is None:
+                    # Keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"id: {payload['id']}\nevent: notification\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.post("/notifications/", response_model=Notification)
 def create_notification(
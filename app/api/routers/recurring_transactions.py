@@ -0,0 +1,78 @@
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.deps import check_currencies, get_current_user, get_db
+from app.models.user import User
+from app.schemas.recurring_transaction import (
+    RecurringTransaction, RecurringTransactionCreate, RecurringTransactionUpdate
+)
+from app.services.recurring_transaction_service import RecurringTransactionService
+
+router = APIRouter()
+
+@router.post("/recurring-transactions/", response_model=RecurringTransaction)
+def create_recurring_transaction(
+    *,
+    db: Session = Depends(get_db),
+    rule_in: RecurringTransactionCreate,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Create new recurring transaction (salary, rent, subscriptions...).
+    """
+    check_currencies(db, [rule_in.currency])
+    recurring_service = RecurringTransactionService(db)
+    return recurring_service.create(obj_in=rule_in, user_id=current_user.id)
+
+@router.get("/recurring-transactions/", response_model=List[RecurringTransaction])
+def read_recurring_transactions(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Retrieve recurring transactions.
+    """
+    recurring_service = RecurringTransactionService(db)
+    return recurring_service.get_user_rules(user_id=current_user.id, skip=skip, limit=limit)
+
+@router.put("/recurring-transactions/{rule_id}", response_model=RecurringTransaction)
+def update_recurring_transaction(
+    *,
+    db: Session = Depends(get_db),
+    rule_id: int,
+    rule_in: RecurringTransactionUpdate,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Update a recurring transaction.
+    """
+    recurring_service = RecurringTransactionService(db)
+    rule = recurring_service.get(id=rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Recurring transaction not found")
+    if rule.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    check_currencies(db, [rule_in.currency])
+    return recurring_service.update(db_obj=rule, obj_in=rule_in)
+
+@router.delete("/recurring-transactions/{rule_id}", response_model=RecurringTransaction)
+def delete_recurring_transaction(
+    *,
+    db: Session = Depends(get_db),
+    rule_id: int,
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Delete a recurring transaction. Transactions already created are kept.
+    """
+    recurring_service = RecurringTransactionService(db)
+    rule = recurring_service.get(id=rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Recurring transaction not found")
+    if rule.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return recurring_service.remove(id=rule_id)
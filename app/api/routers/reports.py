@@ -2,13 +2,16 @@ from typing import Any, List, Dict, Optional
 from datetime import date, datetime, timedelta
 import calendar
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user, get_db
+from app.core.deps import get_current_user, get_db, not_modified
 from app.models.user import User
+from app.schemas.category import CategoryTreeTotal
 from app.schemas.report import Report, ReportRequest
 from app.services.report_service import ReportService
+from app.services.data_version_service import DataVersionService
+from app.services.fx_service import FxService
 
 router = APIRouter()
 
@@ -48,6 +51,8 @@ def generate_report(
 @router.get("/reports/categories")
 def get_category_report(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -81,11 +86,64 @@ def get_category_report(
     else:
         user_ids = [current_user.id]
     
+    etag = DataVersionService(db).etag(user_ids, ["transaction"], request.url.query, FxService(db).get_version())
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+
     return report_service.get_category_report(user_ids, start_date, end_date)
 
+@router.get("/reports/category-tree", response_model=List[CategoryTreeTotal])
+def get_category_tree_report(
+    *,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
+    user_id: Optional[int] = Query(None, description="User ID (only for family head)"),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Get expense and income totals of every category, each including its subcategories.
+    """
+    report_service = ReportService(db)
+
+    # Determine which user(s) to include
+    if user_id and user_id != current_user.id:
+        if not current_user.is_family_head:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user or user.family_head_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        user_ids = [user_id]
+    elif user_id or not current_user.is_family_head:
+        user_ids = [current_user.id]
+    else:
+        family_members = db.query(User).filter(
+            (User.id == current_user.id) | (User.family_head_id == current_user.id)
+        ).all()
+        user_ids = [member.id for member in family_members]
+
+    # Category changes are counted on the family head
+    etag = DataVersionService(db).etag(
+        user_ids + [current_user.family_id], ["transaction", "category"], request.url.query,
+        FxService(db).get_version(),
+    )
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+
+    return report_service.get_category_tree_report(current_user.family_id, user_ids, start_date, end_date)
+
 @router.get("/reports/top-expenses")
 def get_top_expenses(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
@@ -120,11 +178,19 @@ def get_top_expenses(
     else:
         user_ids = [current_user.id]
     
+    etag = DataVersionService(db).etag(user_ids, ["transaction"], request.url.query, FxService(db).get_version())
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+
     return report_service.get_top_expenses(user_ids, start_date, end_date, limit)
 
 @router.get("/reports/goals")
 def get_goal_progress_report(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> List[Dict[str, Any]]:
@@ -132,6 +198,20 @@ def get_goal_progress_report(
     Get progress report for all family goals.
     """
     report_service = ReportService(db)
+
+    # Days remaining change daily, so the date is part of the tag
+    family_head_id = current_user.id if current_user.is_family_head else current_user.family_head_id
+    if family_head_id:
+        member_ids = [member.id for member in db.query(User.id).filter(
+            (User.id == family_head_id) | (User.family_head_id == family_head_id)
+        ).all()]
+        etag = DataVersionService(db).etag(
+            member_ids, ["goal", "goal_contribution"], current_user.id, date.today().isoformat()
+        )
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers["ETag"] = etag
     
     # Only family head can see all goals
     if current_user.is_family_head:
@@ -154,6 +234,8 @@ def get_goal_progress_report(
 @router.get("/reports/spending-trends")
 def get_spending_trends(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     months: int = Query(6, description="Number of months to include"),
     user_id: Optional[int] = Query(None, description="User ID (only for family head)"),
@@ -177,12 +259,24 @@ def get_spending_trends(
                 raise HTTPException(status_code=403, detail="Not enough permissions")
         
         target_user_id = user_id
+
+    # The window moves with the current month
+    etag = DataVersionService(db).etag(
+        [target_user_id], ["transaction"], request.url.query, date.today().strftime("%Y-%m"),
+        FxService(db).get_version(),
+    )
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
     
     return report_service.get_user_spending_trends(target_user_id, months)
 
 @router.get("/reports/monthly-summary")
 def get_monthly_summary(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     year: int = Query(..., description="Year"),
     month: int = Query(..., description="Month (1-12)"),
@@ -225,6 +319,12 @@ def get_monthly_summary(
     else:
         user_ids = [current_user.id]
     
+    etag = DataVersionService(db).etag(user_ids, ["transaction"], request.url.query, FxService(db).get_version())
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    response.headers["ETag"] = etag
+
     # Get category breakdown
     categories = report_service.get_category_report(user_ids, start_date, end_date)
     
@@ -0,0 +1,38 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user, get_db
+from app.models.user import User
+from app.schemas.sync import SyncResponse
+from app.services.outbox_service import decode_cursor
+from app.services.sync_service import SyncService
+
+router = APIRouter()
+
+@router.get("/sync", response_model=SyncResponse)
+def sync(
+    db: Session = Depends(get_db),
+    since: Optional[str] = Query(None, description="Token returned by the previous sync, omit for a full sync"),
+    limit: int = Query(5000, gt=0, le=20000, description="Maximum number of changes read per call"),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Get transactions, goals and notifications changed since the last sync.
+
+    Deleted rows (and goals the user no longer takes part in) are listed as
+    tombstones under `deleted`. Call again with the returned token while
+    `has_more` is true. A 410 response means the token is too old and the
+    client must do a full sync.
+    """
+    sync_service = SyncService(db)
+    if since is not None:
+        try:
+            decode_cursor(since)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid sync token")
+        if sync_service.is_expired(since):
+            raise HTTPException(status_code=410, detail="Sync token expired, a full sync is required")
+
+    return sync_service.sync(user=current_user, since=since, limit=limit)
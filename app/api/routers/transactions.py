@@ -1,65 +1,233 @@
 from typing import Any, List, Optional
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user, get_db
+from app.core.deps import check_currencies, get_current_user, resolve_category, get_db, not_modified, replay_idempotent_response
 from app.models.user import User
 from app.models.transaction import TransactionType, TransactionCategory
-from app.schemas.transaction import Transaction, TransactionCreate, TransactionUpdate
-from app.services.transaction_service import TransactionService
-from app.services.notification_service import NotificationService
+from app.schemas.transaction import (
+    Transaction, TransactionCreate, TransactionCreated, TransactionUpdate, TransactionSearchResult, TransactionFilter,
+    TransactionImport, TransactionImportResult, TransactionDuplicateGroup, TRANSACTION_FIELDS
+)
+from app.services.transaction_service import DuplicateTransactionError, TransactionService
+from app.services.idempotency_service import IdempotencyService
+from app.services.data_version_service import DataVersionService
+from app.services.archive_service import ArchiveService
+from app.services.budget_service import enqueue_budget_check
+from app.utils.serialization import get_row_serializer
 
 router = APIRouter()
 
-@router.post("/transactions/", response_model=Transaction)
+@router.post("/transactions/", response_model=TransactionCreated)
 def create_transaction(
     *,
     db: Session = Depends(get_db),
     transaction_in: TransactionCreate,
     current_user: User = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    reject_duplicate: bool = Query(False, description="Reject the transaction with 409 if it looks like a duplicate"),
 ) -> Any:
     """
     Create new transaction.
+
+    Retries sent with the same `Idempotency-Key` header replay the first response.
+    A transaction with the same date, amount and description as a recorded one is
+    flagged with `duplicate_of`, or rejected with 409 when `reject_duplicate` is set.
+    """
+    check_currencies(db, [transaction_in.currency])
+    resolve_category(db, current_user, transaction_in)
+    transaction_service = TransactionService(db)
+    idempotency_service = IdempotencyService(db)
+
+    if idempotency_key:
+        request_hash = IdempotencyService.request_hash("POST /transactions/", transaction_in)
+        stored = idempotency_service.begin(current_user.id, idempotency_key, request_hash)
+        if stored:
+            return replay_idempotent_response(stored, request_hash)
+
+    # Create the transaction, with a key it is committed along with its stored response
+    try:
+        transaction = transaction_service.create(
+            obj_in=transaction_in, user_id=current_user.id, reject_duplicate=reject_duplicate,
+            commit=not idempotency_key,
+        )
+        response_body = TransactionCreated.model_validate(transaction).model_dump_json().encode()
+        if idempotency_key:
+            idempotency_service.complete(current_user.id, idempotency_key, 200, response_body)
+    except Exception as e:
+        if idempotency_key:
+            idempotency_service.release(current_user.id, idempotency_key)
+        if isinstance(e, DuplicateTransactionError):
+            raise HTTPException(status_code=409, detail=str(e))
+        raise
+
+    # Budget notifications are sent in the background
+    if transaction_in.type == TransactionType.EXPENSE:
+        enqueue_budget_check(current_user.id)
+
+    return Response(content=response_body, media_type="application/json")
+
+@router.post("/transactions/import", response_model=TransactionImportResult)
+def import_transactions(
+    *,
+    db: Session = Depends(get_db),
+    rows: List[TransactionImport],
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Import bank statement rows, categorizing them with the family's rules.
+
+    Rows that were already imported are skipped and counted as duplicates.
     """
+    check_currencies(db, {row.currency for row in rows})
     transaction_service = TransactionService(db)
-    notification_service = NotificationService(db)
-    
-    # Create the transaction
-    transaction = transaction_service.create(
-        obj_in=transaction_in, user_id=current_user.id
+
+    result = transaction_service.import_transactions(
+        rows=rows, user_id=current_user.id, family_head_id=current_user.family_id
     )
-    
-    # Check if we need to send budget notifications
-    if transaction.type == TransactionType.EXPENSE:
-        notification_service.check_budget_thresholds(user_id=current_user.id)
-    
-    return transaction
+
+    # One budget check for the whole import
+    if result["created"] and any(row.type == TransactionType.EXPENSE for row in rows):
+        enqueue_budget_check(current_user.id)
+
+    return result
 
 @router.get("/transactions/", response_model=List[Transaction])
 def read_transactions(
+    request: Request,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    transaction_type: Optional[TransactionType] = None,
-    category: Optional[TransactionCategory] = None,
+    transaction_type: Optional[List[TransactionType]] = Query(None),
+    category: Optional[List[TransactionCategory]] = Query(None),
+    category_id: Optional[List[int]] = Query(None, description="Category tree nodes, subcategories included"),
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    user_id: Optional[List[int]] = Query(None, description="User IDs (only for family head)"),
+    sort: str = Query("-date", description="Comma separated fields, prefix with '-' for descending"),
+    fields: Optional[str] = Query(None, description="Comma separated fields to return"),
     current_user: User = Depends(get_current_user),
 ) -> Any:
     """
     Retrieve transactions.
+
+    Repeat `transaction_type`, `category`, `category_id` or `user_id` to match any of several values.
+    Responses carry an ETag; send it back in `If-None-Match` to get a 304 while
+    nothing changed.
     """
+    try:
+        filters = TransactionFilter(
+            start_date=start_date,
+            end_date=end_date,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            types=transaction_type,
+            categories=category,
+            category_ids=category_id,
+            user_ids=user_id,
+            sort=sort.split(","),
+            fields=fields.split(",") if fields else None,
+            skip=skip,
+            limit=limit,
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+
+    user_ids = [current_user.id]
+    if filters.user_ids and filters.user_ids != user_ids:
+        # Only family head can see transactions of other family members
+        if not current_user.is_family_head:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+
+        family_members = db.query(User.id).filter(
+            User.id.in_(filters.user_ids),
+            (User.id == current_user.id) | (User.family_head_id == current_user.id)
+        ).all()
+        if len(family_members) != len(set(filters.user_ids)):
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        user_ids = list(set(filters.user_ids))
+
+    # Answer unchanged polls from the version counters alone
+    etag = DataVersionService(db).etag(user_ids, ["transaction"], request.url.query)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
     transaction_service = TransactionService(db)
-    return transaction_service.get_multi(
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit,
-        start_date=start_date,
-        end_date=end_date,
-        transaction_type=transaction_type,
-        category=category,
+    rows = transaction_service.get_filtered_rows(user_ids=user_ids, filters=filters)
+
+    # Serialize the column tuples directly, projected rows do not match the response model anyway
+    fields = tuple(filters.fields or TRANSACTION_FIELDS)
+    response = get_row_serializer(Transaction, fields).response(rows)
+    response.headers["ETag"] = etag
+    return response
+
+@router.get("/transactions/search", response_model=List[TransactionSearchResult])
+def search_transactions(
+    db: Session = Depends(get_db),
+    q: str = Query(..., min_length=2, description="Text to search in transaction descriptions"),
+    skip: int = 0,
+    limit: int = Query(20, le=100),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Search transactions by description, best matches first.
+    """
+    transaction_service = TransactionService(db)
+    return transaction_service.search(
+        user_id=current_user.id, q=q, skip=skip, limit=limit
+    )
+
+@router.get("/transactions/duplicates", response_model=List[TransactionDuplicateGroup])
+def read_duplicate_transactions(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = Query(100, le=500),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    List groups of suspected duplicate transactions (same date, amount and description).
+    """
+    transaction_service = TransactionService(db)
+    return transaction_service.get_duplicate_groups(
+        user_id=current_user.id, skip=skip, limit=limit
+    )
+
+@router.get("/transactions/archived", response_model=List[Transaction])
+def read_archived_transactions(
+    db: Session = Depends(get_db),
+    start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
+    skip: int = 0,
+    limit: int = Query(100, le=1000),
+    user_id: Optional[int] = Query(None, description="User ID (only for family head)"),
+    current_user: User = Depends(get_current_user),
+) -> Any:
+    """
+    Retrieve archived transactions, newest first.
+
+    Archived months are stored compressed, so this is slower than the live listing;
+    keep the date range narrow.
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=422, detail="start_date must not be after end_date")
+    if user_id and user_id != current_user.id:
+        # Only family head can see transactions of other family members
+        if not current_user.is_family_head:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user or user.family_head_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    archive_service = ArchiveService(db)
+    return archive_service.get_archived_transactions(
+        user_ids=[user_id or current_user.id], start_date=start_date, end_date=end_date,
+        skip=skip, limit=limit
     )
 
 @router.get("/transactions/{transaction_id}", response_model=Transaction)
@@ -97,6 +265,9 @@ def update_transaction(
         raise HTTPException(status_code=404, detail="Transaction not found")
     if transaction.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
+    check_currencies(db, [transaction_in.currency])
+    if transaction_in.category_id is not None:
+        resolve_category(db, current_user, transaction_in)
     transaction = transaction_service.update(db_obj=transaction, obj_in=transaction_in)
     return transaction
 
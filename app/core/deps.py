@@ -1,6 +1,6 @@
-from typing import Generator, Optional
+from typing import Generator, Iterable, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.db.base import get_db
 from app.models.user import User
+from app.models.idempotency import IdempotencyKey
 from app.core.config import settings
 from app.core.security import verify_password
 from app.schemas.auth import TokenPayload
@@ -58,3 +59,53 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     if not verify_password(password, user.hashed_password):
         return None
     return user
+
+def replay_idempotent_response(stored: IdempotencyKey, request_hash: str) -> Response:
+    """Answer a retried request from the response stored under its Idempotency-Key"""
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request",
+        )
+    if stored.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still being processed",
+        )
+    return Response(
+        content=stored.response_body,
+        status_code=stored.status_code,
+        media_type="application/json",
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """Get a 304 response when the request's If-None-Match already holds the ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    # Weak comparison, as required for If-None-Match
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in candidates or etag.removeprefix("W/") in candidates:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
+
+def check_currencies(db: Session, currencies: Iterable[Optional[str]]) -> None:
+    """Reject currencies that cannot be converted to the base currency with 422"""
+    from app.services.fx_service import FxService
+
+    try:
+        FxService(db).check_currencies(currency for currency in currencies if currency)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+def resolve_category(db: Session, user: User, obj_in) -> None:
+    """Fill in `category` and `category_id` of a transaction payload from each other, 422 when invalid"""
+    from app.services.category_service import CategoryService
+
+    try:
+        obj_in.category, obj_in.category_id = CategoryService(db).resolve(
+            user.family_id, obj_in.category, obj_in.category_id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
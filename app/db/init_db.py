@@ -1,4 +1,5 @@
 import logging
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.db.base import Base, engine
@@ -6,14 +7,36 @@ from app.core.security import get_password_hash
 from app.models.user import User
 from app.models.transaction import Transaction
 from app.models.goal import Goal, GoalContribution
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationCounter
+from app.models.idempotency import IdempotencyKey
+from app.models.recurring_transaction import RecurringTransaction
+from app.models.categorization_rule import CategorizationRule
+from app.models.outbox import OutboxEvent
+from app.models.data_version import DataVersion
+from app.models.transaction_archive import TransactionArchiveChunk, TransactionMonthlyAggregate
+from app.models.fx_rate import FxRate
+from app.models.category import Category, CategoryClosure
+from app.models.monthly_total import MonthlyCategoryTotal, MonthlyLedger
+from app.models.budget import Budget, BudgetAlert
+from app.services.category_service import CategoryService
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Postgres extensions required by the indexes declared on the models
+EXTENSIONS = ["pg_trgm", "btree_gin"]
+
 def init_db(db: Session) -> None:
+    # Create extensions
+    with engine.begin() as connection:
+        for extension in EXTENSIONS:
+            connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+
     # Create tables
     Base.metadata.create_all(bind=engine)
+
+    # Root categories, one per TransactionCategory value
+    CategoryService(db).ensure_system_categories()
     
     # Check if we already have users
     user = db.query(User).first()
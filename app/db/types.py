@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+from app.utils.money import to_cents, from_cents
+
+class Money(TypeDecorator):
+    """Money stored as int64 cents and exposed as float currency units.
+
+    Bound values (ORM attributes, bulk rows, filter literals) are rounded to
+    cents on the way in, so sums computed by Postgres are exact integers; the
+    results of SUM/MAX/... over a Money column are converted back on the way out.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return from_cents(value)
@@ -0,0 +1,25 @@
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services.archive_service import ArchiveService
+
+logger = logging.getLogger(__name__)
+
+def run(db: Session) -> int:
+    """Move transactions past the archive age into cold storage"""
+    if settings.TRANSACTION_ARCHIVE_AFTER_MONTHS <= 0:
+        return 0
+    archived = ArchiveService(db).archive_older_than(settings.TRANSACTION_ARCHIVE_AFTER_MONTHS)
+    logger.info("Archived %s transactions", archived)
+    return archived
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        run(db)
+    finally:
+        db.close()
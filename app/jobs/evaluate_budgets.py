@@ -0,0 +1,27 @@
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.db.base import SessionLocal
+from app.services.budget_service import BudgetService, current_month
+from app.services.notification_broker import start_publishing
+from app.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+def run(db: Session) -> int:
+    """Send the month-to-date budget alerts of every user, including those who posted nothing since"""
+    month = current_month()
+    monthly = NotificationService(db).check_all_budget_thresholds(month)
+    category = BudgetService(db).check_all_budgets(month)
+    logger.info("Sent %s monthly and %s category budget alerts", monthly, category)
+    return monthly + category
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    start_publishing()
+    db = SessionLocal()
+    try:
+        run(db)
+    finally:
+        db.close()
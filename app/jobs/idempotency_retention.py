@@ -0,0 +1,22 @@
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.db.base import SessionLocal
+from app.services.idempotency_service import IdempotencyService
+
+logger = logging.getLogger(__name__)
+
+def run(db: Session) -> int:
+    """Delete idempotency keys whose replay window is over"""
+    deleted = IdempotencyService(db).purge_expired()
+    logger.info("Purged %s expired idempotency keys", deleted)
+    return deleted
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        run(db)
+    finally:
+        db.close()
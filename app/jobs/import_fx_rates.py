@@ -0,0 +1,36 @@
+"""
+Import daily FX rates from a CSV file with `date,currency,rate` rows, where
+rate is the value of one unit of the currency in the base currency.
+
+Usage: python -m app.jobs.import_fx_rates [path]  (defaults to FX_RATES_FILE)
+"""
+import logging
+import sys
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services.fx_service import FxService, parse_rates_csv
+
+logger = logging.getLogger(__name__)
+
+def run(db: Session, path: Optional[str] = None) -> int:
+    """Upsert the rates of the file, a no-op when no file is configured"""
+    path = path or settings.FX_RATES_FILE
+    if not path:
+        return 0
+    with open(path, newline="") as file:
+        rows = parse_rates_csv(file)
+    imported = FxService(db).import_rates(rows)
+    logger.info("Imported %s FX rates from %s", imported, path)
+    return imported
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        run(db, sys.argv[1] if len(sys.argv) > 1 else None)
+    finally:
+        db.close()
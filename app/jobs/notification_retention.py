@@ -0,0 +1,25 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+def run(db: Session) -> int:
+    """Delete read notifications older than the retention period"""
+    before = datetime.now(timezone.utc) - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+    deleted = NotificationService(db).purge_read(before, batch_size=settings.NOTIFICATION_RETENTION_BATCH_SIZE)
+    logger.info("Purged %s read notifications", deleted)
+    return deleted
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        run(db)
+    finally:
+        db.close()
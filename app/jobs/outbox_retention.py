@@ -0,0 +1,25 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services.outbox_service import OutboxService
+
+logger = logging.getLogger(__name__)
+
+def run(db: Session) -> int:
+    """Delete change feed events older than the retention window"""
+    before = datetime.now(timezone.utc) - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    deleted = OutboxService(db).purge(before)
+    logger.info("Purged %s outbox events", deleted)
+    return deleted
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        run(db)
+    finally:
+        db.close()
@@ -0,0 +1,47 @@
+"""
+Re-categorize transaction history with the families' categorization rules.
+
+Usage: python -m app.jobs.recategorize_transactions [--family-head-id ID] [--all-categories]
+"""
+import argparse
+import logging
+
+from app.db.base import SessionLocal
+from app.models.categorization_rule import CategorizationRule
+from app.services.categorization_service import CategorizationService
+
+logger = logging.getLogger(__name__)
+
+def run_for_family(family_head_id: int, only_uncategorized: bool = True) -> int:
+    """Re-categorize one family's transactions in its own session"""
+    db = SessionLocal()
+    try:
+        updated = CategorizationService(db).recategorize_history(
+            family_head_id, only_uncategorized=only_uncategorized
+        )
+        logger.info("Re-categorized %s transactions of family %s", updated, family_head_id)
+        return updated
+    finally:
+        db.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--family-head-id", type=int, help="Only this family, defaults to every family with rules")
+    parser.add_argument("--all-categories", action="store_true", help="Also override categories other than OTHER")
+    args = parser.parse_args()
+
+    if args.family_head_id:
+        family_head_ids = [args.family_head_id]
+    else:
+        db = SessionLocal()
+        try:
+            family_head_ids = [row.family_head_id for row in db.query(CategorizationRule.family_head_id).distinct()]
+        finally:
+            db.close()
+
+    for family_head_id in family_head_ids:
+        run_for_family(family_head_id, only_uncategorized=not args.all_categories)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
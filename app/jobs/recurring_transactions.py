@@ -0,0 +1,27 @@
+import logging
+
+from sqlalchemy.orm import Session
+
+from app.db.base import SessionLocal
+from app.services.notification_broker import start_publishing
+from app.services.recurring_transaction_service import RecurringTransactionService
+from app.services.work_queue import get_work_queue
+
+logger = logging.getLogger(__name__)
+
+def run(db: Session) -> int:
+    """Materialize every recurring transaction that is due"""
+    created = RecurringTransactionService(db).materialize_due()
+    logger.info("Materialized %s recurring transactions", created)
+    return created
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    start_publishing()
+    db = SessionLocal()
+    try:
+        run(db)
+    finally:
+        db.close()
+    # Let the queued budget checks finish before exiting
+    get_work_queue().stop()
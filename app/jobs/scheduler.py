@@ -0,0 +1,51 @@
+"""
+Run the periodic background jobs in a single long-lived process.
+
+Usage: python -m app.jobs.scheduler
+"""
+import logging
+import time
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.services.notification_broker import start_publishing
+from app.jobs import (
+    archive_transactions, evaluate_budgets, idempotency_retention, import_fx_rates, notification_retention,
+    outbox_retention, recurring_transactions,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (job, interval in seconds)
+JOBS = [
+    (recurring_transactions.run, settings.RECURRING_TRANSACTIONS_INTERVAL_SECONDS),
+    (outbox_retention.run, settings.OUTBOX_RETENTION_INTERVAL_SECONDS),
+    (archive_transactions.run, settings.TRANSACTION_ARCHIVE_INTERVAL_SECONDS),
+    (import_fx_rates.run, settings.FX_RATES_IMPORT_INTERVAL_SECONDS),
+    (notification_retention.run, settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS),
+    (evaluate_budgets.run, settings.BUDGET_EVALUATION_INTERVAL_SECONDS),
+    (idempotency_retention.run, settings.IDEMPOTENCY_RETENTION_INTERVAL_SECONDS),
+]
+
+def main() -> None:
+    # Notifications created by the jobs reach the push connections
+    start_publishing()
+    next_runs = {job: 0.0 for job, _ in JOBS}
+    while True:
+        for job, interval in JOBS:
+            if time.monotonic() < next_runs[job]:
+                continue
+            db = SessionLocal()
+            try:
+                job(db)
+            except Exception:
+                logger.exception("Job %s.%s failed", job.__module__, job.__name__)
+                db.rollback()
+            finally:
+                db.close()
+            next_runs[job] = time.monotonic() + interval
+        time.sleep(max(0.0, min(next_runs.values()) - time.monotonic()))
+
+if __name__ == "__main__":
+    main()
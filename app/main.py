@@ -1,14 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Depends
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routers import auth, users, transactions, goals, reports, notifications
+from app.api.routers import (
+    auth, users, transactions, goals, reports, notifications, recurring_transactions, categorization_rules,
+    categories, budgets, changes, sync
+)
 from app.core.config import settings
+from app.services.notification_broker import start_publishing
+from app.services.work_queue import get_work_queue
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_publishing()
+    yield
+    # Finish the queued background work before the process exits
+    get_work_queue().stop()
 
 app = FastAPI(
     title="Family Finance Manager",
     description="A system to manage family finances, track expenses and set goals",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -24,9 +39,15 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api", tags=["Authentication"])
 app.include_router(users.router, prefix="/api", tags=["Users"])
 app.include_router(transactions.router, prefix="/api", tags=["Transactions"])
+app.include_router(recurring_transactions.router, prefix="/api", tags=["Recurring Transactions"])
+app.include_router(categories.router, prefix="/api", tags=["Categories"])
+app.include_router(categorization_rules.router, prefix="/api", tags=["Categorization Rules"])
+app.include_router(budgets.router, prefix="/api", tags=["Budgets"])
 app.include_router(goals.router, prefix="/api", tags=["Goals"])
 app.include_router(reports.router, prefix="/api", tags=["Reports"])
 app.include_router(notifications.router, prefix="/api", tags=["Notifications"])
+app.include_router(changes.router, prefix="/api", tags=["Changes"])
+app.include_router(sync.router, prefix="/api", tags=["Sync"])
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -0,0 +1,33 @@
+from sqlalchemy import Boolean, Column, Integer, Float, ForeignKey, Date, DateTime
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.db.types import Money
+
+class Budget(Base):
+    """Monthly spending limit of a category (subcategories included), for a member or the whole family"""
+    __tablename__ = "budgets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    family_head_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Budgets without a user cover the spending of every family member
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+    amount = Column(Money, nullable=False)  # In the base currency
+    warning_threshold = Column(Float, nullable=False)
+    critical_threshold = Column(Float, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    category = relationship("Category")
+
+class BudgetAlert(Base):
+    """Alerts already sent for a budget in a month, so each one goes out once"""
+    __tablename__ = "budget_alerts"
+
+    budget_id = Column(Integer, ForeignKey("budgets.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    warning_sent = Column(Boolean, nullable=False, default=False)
+    critical_sent = Column(Boolean, nullable=False, default=False)
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+
+from app.db.base import Base
+from app.models.transaction import TransactionCategory
+
+class RuleMatchType(str, enum.Enum):
+    KEYWORD = "keyword"
+    REGEX = "regex"
+    MERCHANT = "merchant"  # Alias of a merchant, e.g. "UBER *TRIP" for Uber
+
+class CategorizationRule(Base):
+    __tablename__ = "categorization_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    match_type = Column(Enum(RuleMatchType), nullable=False)
+    pattern = Column(String, nullable=False)
+    merchant = Column(String, nullable=True)
+    category = Column(Enum(TransactionCategory), nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+    family_head_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Rules without a user apply to the whole family
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    user = relationship("User", foreign_keys=[user_id])
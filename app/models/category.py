@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.models.transaction import TransactionCategory
+
+class Category(Base):
+    """Node of a category tree.
+
+    Every tree is rooted at one of the system categories (one per
+    TransactionCategory value, shared by all families); families add their own
+    subcategories below them, e.g. Food > Restaurants > Delivery.
+    """
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    parent_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    # System category at the root of the node's tree, kept on transactions as `category`
+    root_category = Column(Enum(TransactionCategory), nullable=False)
+    # None for the system categories
+    family_head_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    parent = relationship("Category", remote_side=[id])
+
+    __table_args__ = (
+        # Exactly one system root per TransactionCategory value
+        Index("ix_categories_system_root", "root_category", unique=True, postgresql_where=(parent_id == None)),
+    )
+
+class CategoryClosure(Base):
+    """Closure table: one row per (ancestor, descendant) pair, nodes included as their own ancestor"""
+    __tablename__ = "category_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        # Ancestors of a node (rollups join on the descendant)
+        Index("ix_category_closure_descendant", "descendant_id", "ancestor_id", "depth"),
+    )
+
+class CategoryRedirect(Base):
+    """A deleted family category and the category that took over its rows.
+
+    Archived transactions keep the id they had when archived, this resolves it
+    to where the category's totals went.
+    """
+    __tablename__ = "category_redirects"
+
+    # Not a foreign key: the category no longer exists
+    category_id = Column(Integer, primary_key=True)
+    target_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False, index=True)
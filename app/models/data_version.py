@@ -0,0 +1,11 @@
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey
+
+from app.db.base import Base
+
+class DataVersion(Base):
+    """Counter bumped in the same transaction as every change to a user's rows of an entity"""
+    __tablename__ = "data_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    entity = Column(String(32), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
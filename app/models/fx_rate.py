@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Date, DateTime, Numeric, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class FxRate(Base):
+    """Daily exchange rate: base currency units for one unit of `currency`"""
+    __tablename__ = "fx_rates"
+
+    currency = Column(String(3), primary_key=True)
+    date = Column(Date, primary_key=True)
+    rate = Column(Numeric(18, 8), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
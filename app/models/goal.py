@@ -1,8 +1,9 @@
-from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, DateTime, Table
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, Table
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base import Base
+from app.db.types import Money
 
 # Association table for goal participants
 goal_participants = Table(
@@ -18,8 +19,8 @@ class Goal(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    target_amount = Column(Float, nullable=False)
-    current_amount = Column(Float, default=0.0)
+    target_amount = Column(Money, nullable=False)
+    current_amount = Column(Money, default=0.0)
     deadline = Column(DateTime(timezone=True), nullable=True)
     is_completed = Column(Boolean, default=False)
     creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -35,7 +36,7 @@ class GoalContribution(Base):
     __tablename__ = "goal_contributions"
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     goal_id = Column(Integer, ForeignKey("goals.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     date = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,43 @@
+from sqlalchemy import BigInteger, Boolean, Column, Integer, ForeignKey, Date, Enum, Index
+
+from app.db.base import Base
+from app.db.types import Money
+from app.models.transaction import TransactionType
+
+class MonthlyCategoryTotal(Base):
+    """Running totals of a user's transactions per month and category, in the base currency.
+
+    Maintained in the same database transaction as every transaction write (see
+    monthly_totals_service), archived transactions included.
+    """
+    __tablename__ = "monthly_category_totals"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Date, primary_key=True)  # First day of the month
+    type = Column(Enum(TransactionType), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    total = Column(Money, nullable=False, default=0)
+    count = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        # The nightly budget check reads one month of every user
+        Index("ix_monthly_category_totals_month_type_category", "month", "type", "category_id"),
+    )
+
+class MonthlyLedger(Base):
+    """A user's income and expenses of a month in the base currency, plus the budget alerts already sent.
+
+    Maintained alongside MonthlyCategoryTotal, so the monthly budget check reads one row.
+    """
+    __tablename__ = "monthly_ledgers"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Date, primary_key=True)  # First day of the month
+    income = Column(Money, nullable=False, default=0)
+    expenses = Column(Money, nullable=False, default=0)
+    warning_sent = Column(Boolean, nullable=False, default=False)
+    critical_sent = Column(Boolean, nullable=False, default=False)
+
+    __table_args__ = (
+        Index("ix_monthly_ledgers_month", "month"),
+    )
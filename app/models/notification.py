@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, Enum
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String, ForeignKey, DateTime, Enum, Index, and_
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -10,6 +10,7 @@ class NotificationType(str, enum.Enum):
     BUDGET_CRITICAL = "budget_critical"
     GOAL_ACHIEVED = "goal_achieved"
     GOAL_CONTRIBUTION = "goal_contribution"
+    GOAL_ADDED = "goal_added"
     MANUAL = "manual"
 
 class Notification(Base):
@@ -22,6 +23,33 @@ class Notification(Base):
     is_read = Column(Boolean, default=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Digest rows: start of the window whose notifications of the same kind are merged into
+    # this one while it is unread, and how many were merged
+    digest_window = Column(DateTime(timezone=True), nullable=True)
+    count = Column(Integer, nullable=False, default=1)
 
     # Relationships
     user = relationship("User", back_populates="notifications")
+
+    __table_args__ = (
+        # Counts unread notifications when a user has no counter row
+        Index("ix_notifications_user_unread", "user_id", postgresql_where=(is_read == False)),
+        # Pages of a user's notifications, newest first
+        Index("ix_notifications_user_created_at", "user_id", "created_at"),
+        # Read notifications past the retention period
+        Index("ix_notifications_read_created_at", "created_at", postgresql_where=(is_read == True)),
+        # The one unread digest row per user, kind and window
+        Index(
+            "ix_notifications_digest",
+            "user_id", "type", "title", "digest_window",
+            unique=True,
+            postgresql_where=and_(digest_window != None, is_read == False),
+        ),
+    )
+
+class NotificationCounter(Base):
+    """Number of unread notifications of a user, maintained with every notification write"""
+    __tablename__ = "notification_counters"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    unread = Column(BigInteger, nullable=False, default=0)
@@ -0,0 +1,25 @@
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, JSON, Index, text
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class OutboxEvent(Base):
+    """A change to a tracked row, written in the same transaction as the change itself"""
+    __tablename__ = "outbox_events"
+
+    id = Column(BigInteger, primary_key=True)
+    # Id of the writing transaction; the change feed is ordered by (txid, id) so
+    # that a transaction committing late never lands behind a consumer's cursor
+    txid = Column(BigInteger, nullable=False, server_default=text("pg_current_xact_id()::text::bigint"))
+    entity = Column(String(32), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(16), nullable=False)
+    user_id = Column(Integer, nullable=False)  # Owner of the row, used to scope the feed
+    payload = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_outbox_events_user_txid", "user_id", "txid", "id"),
+        Index("ix_outbox_events_txid", "txid", "id"),
+        Index("ix_outbox_events_created_at", "created_at"),
+    )
@@ -0,0 +1,45 @@
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.types import Money
+from app.models.transaction import TransactionType, TransactionCategory
+
+class RecurrenceFrequency(str, enum.Enum):
+    DAILY = "daily"
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    YEARLY = "yearly"
+
+class RecurringTransaction(Base):
+    __tablename__ = "recurring_transactions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    amount = Column(Money, nullable=False)
+    currency = Column(String(3), nullable=False, default=settings.BASE_CURRENCY, server_default=settings.BASE_CURRENCY)
+    description = Column(String, nullable=False)
+    type = Column(Enum(TransactionType), nullable=False)
+    category = Column(Enum(TransactionCategory), nullable=False)
+    # Runs every `interval` days/weeks/months/years from start_date
+    frequency = Column(Enum(RecurrenceFrequency), nullable=False)
+    interval = Column(Integer, nullable=False, default=1)
+    # Anchor day for monthly/yearly rules, clamped to the length of shorter months
+    day_of_month = Column(Integer, nullable=True)
+    start_date = Column(DateTime(timezone=True), nullable=False)
+    end_date = Column(DateTime(timezone=True), nullable=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
+    is_active = Column(Boolean, default=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    user = relationship("User")
+
+    __table_args__ = (
+        # Next-run index: each scheduler tick only reads the rules that are due
+        Index("ix_recurring_transactions_due", "next_run_at", postgresql_where=(is_active == True)),
+    )
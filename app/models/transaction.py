@@ -1,9 +1,12 @@
-from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, DateTime, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, DateTime, Enum, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import enum
 
+from app.core.config import settings
 from app.db.base import Base
+from app.db.types import Money
 
 class TransactionType(str, enum.Enum):
     INCOME = "income"
@@ -30,14 +33,57 @@ class Transaction(Base):
     __tablename__ = "transactions"
 
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
+    # ISO 4217 code, amounts are converted to the base currency in reports
+    currency = Column(String(3), nullable=False, default=settings.BASE_CURRENCY, server_default=settings.BASE_CURRENCY)
+    # Amount in the base currency at the rates in force when it was written, what the monthly
+    # totals hold (see apply_monthly_totals)
+    base_amount = Column(Money, nullable=True)
     description = Column(String, nullable=False)
     type = Column(Enum(TransactionType), nullable=False)
+    # Root of the category tree, kept next to the node so enum filters and rules keep working
     category = Column(Enum(TransactionCategory), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False, index=True)
     date = Column(DateTime(timezone=True), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Hash of the normalized (user_id, date, amount, description), see transaction_fingerprint
+    fingerprint = Column(String(64), nullable=True)
+    # Not stored: id of an already recorded transaction with the same fingerprint, set by TransactionService.create
+    duplicate_of = None
+
+    # Portuguese full-text vector, maintained by Postgres on every write (deferred: only
+    # the search query needs it)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('portuguese'::regconfig, coalesce(description, ''))", persisted=True),
+    ))
 
     # Relationships
     user = relationship("User", back_populates="transactions")
+
+    __table_args__ = (
+        # Serve the transaction filter queries (user, date range, category sets)
+        Index("ix_transactions_user_date", "user_id", "date"),
+        Index("ix_transactions_user_category_date", "user_id", "category", "date"),
+        # Duplicate lookups during imports and in the dedup report
+        Index("ix_transactions_user_fingerprint", "user_id", "fingerprint"),
+        # Rows to convert again when rates of past days are imported
+        Index(
+            "ix_transactions_foreign_currency_date", "currency", "date",
+            postgresql_where=(currency != settings.BASE_CURRENCY),
+        ),
+        # Per-user search indexes (require the btree_gin and pg_trgm extensions)
+        Index(
+            "ix_transactions_user_search_vector",
+            "user_id", "search_vector",
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_transactions_user_description_trgm",
+            "user_id", "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+    )
@@ -0,0 +1,36 @@
+from sqlalchemy import BigInteger, Column, Integer, ForeignKey, Date, DateTime, Enum, LargeBinary, Index
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.db.types import Money
+from app.models.transaction import TransactionType, TransactionCategory
+
+class TransactionArchiveChunk(Base):
+    """Archived transactions of one user and month, as zlib-compressed JSON rows.
+
+    A month can have several chunks when late rows get archived after it.
+    """
+    __tablename__ = "transaction_archive_chunks"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    month = Column(Date, nullable=False)  # First day of the month
+    row_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_transaction_archive_chunks_user_month", "user_id", "month"),
+    )
+
+class TransactionMonthlyAggregate(Base):
+    """Exact monthly totals of archived transactions, used by the reports"""
+    __tablename__ = "transaction_monthly_aggregates"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    type = Column(Enum(TransactionType), primary_key=True)
+    category = Column(Enum(TransactionCategory), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+    total = Column(Money, nullable=False)
+    count = Column(BigInteger, nullable=False)
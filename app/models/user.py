@@ -23,3 +23,10 @@ class User(Base):
     notifications = relationship("Notification", back_populates="user")
     goals = relationship("Goal", back_populates="creator")
     goal_contributions = relationship("GoalContribution", back_populates="user")
+
+    @property
+    def family_id(self) -> int:
+        """Id of the family head, which identifies the user's family"""
+        if self.is_family_head or not self.family_head_id:
+            return self.id
+        return self.family_head_id
@@ -0,0 +1,56 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+from datetime import date, datetime
+
+from app.core.config import settings
+
+# Shared properties
+class BudgetBase(BaseModel):
+    category_id: int
+    amount: float = Field(..., gt=0)  # Monthly limit in the base currency
+    warning_threshold: float = Field(settings.BUDGET_WARNING_THRESHOLD, gt=0)
+    critical_threshold: float = Field(settings.BUDGET_CRITICAL_THRESHOLD, gt=0)
+
+    @model_validator(mode="after")
+    def validate_thresholds(self):
+        if self.warning_threshold > self.critical_threshold:
+            raise ValueError("warning_threshold must not be greater than critical_threshold")
+        return self
+
+# Properties to receive via API on creation
+class BudgetCreate(BudgetBase):
+    user_id: Optional[int] = None  # Only for family head, defaults to the whole family
+
+# Properties to receive via API on update
+class BudgetUpdate(BaseModel):
+    amount: Optional[float] = Field(None, gt=0)
+    warning_threshold: Optional[float] = Field(None, gt=0)
+    critical_threshold: Optional[float] = Field(None, gt=0)
+
+# Properties shared by models stored in DB
+class BudgetInDBBase(BudgetBase):
+    id: int
+    family_head_id: int
+    user_id: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Properties to return via API
+class Budget(BudgetInDBBase):
+    pass
+
+# Spending of a budget's category tree in a month
+class BudgetStatus(BaseModel):
+    budget_id: int
+    category_id: int
+    category_name: str
+    user_id: Optional[int] = None
+    month: date
+    amount: float
+    spent: float
+    remaining: float
+    percentage: float
+    status: str  # "ok", "warning" or "critical"
@@ -0,0 +1,56 @@
+from pydantic import BaseModel, model_validator
+from typing import Optional
+from datetime import datetime
+import re
+
+from app.models.transaction import TransactionCategory
+from app.models.categorization_rule import RuleMatchType
+
+# Shared properties
+class CategorizationRuleBase(BaseModel):
+    match_type: RuleMatchType
+    pattern: str
+    merchant: Optional[str] = None
+    category: TransactionCategory
+    priority: int = 0
+
+    @model_validator(mode="after")
+    def validate_pattern(self):
+        if not self.pattern.strip():
+            raise ValueError("pattern must not be empty")
+        if self.match_type == RuleMatchType.REGEX:
+            try:
+                re.compile(self.pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression: {e}")
+        return self
+
+# Properties to receive via API on creation
+class CategorizationRuleCreate(CategorizationRuleBase):
+    user_id: Optional[int] = None  # Only for family head, defaults to the whole family
+
+# Properties to receive via API on update
+class CategorizationRuleUpdate(BaseModel):
+    pattern: Optional[str] = None
+    merchant: Optional[str] = None
+    category: Optional[TransactionCategory] = None
+    priority: Optional[int] = None
+
+# Properties shared by models stored in DB
+class CategorizationRuleInDBBase(CategorizationRuleBase):
+    id: int
+    family_head_id: int
+    user_id: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Properties to return via API
+class CategorizationRule(CategorizationRuleInDBBase):
+    pass
+
+# Result of a re-categorization run
+class RecategorizeResult(BaseModel):
+    updated: int
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from app.models.transaction import TransactionCategory
+
+# Shared properties
+class CategoryBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+# Properties to receive via API on creation
+class CategoryCreate(CategoryBase):
+    parent_id: int  # Family categories always hang below a system category or another family category
+
+# Properties to receive via API on update
+class CategoryUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+
+# Properties shared by models stored in DB
+class CategoryInDBBase(CategoryBase):
+    id: int
+    parent_id: Optional[int] = None
+    root_category: TransactionCategory
+    family_head_id: Optional[int] = None  # None for system categories
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Properties to return via API
+class Category(CategoryInDBBase):
+    pass
+
+# Totals of a category and all of its subcategories
+class CategoryTreeTotal(BaseModel):
+    id: int
+    name: str
+    parent_id: Optional[int] = None
+    expenses: float = 0.0
+    income: float = 0.0
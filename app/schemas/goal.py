@@ -39,6 +39,9 @@ class Goal(GoalInDBBase):
     participants: List[int]  # List of participant IDs
     progress_percentage: float
 
+# Response columns in serialization order
+GOAL_FIELDS = list(Goal.model_fields)
+
 # Properties stored in DB
 class GoalInDB(GoalInDBBase):
     pass
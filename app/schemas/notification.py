@@ -23,6 +23,8 @@ class NotificationInDBBase(NotificationBase):
     is_read: bool
     user_id: int
     created_at: datetime
+    # Number of notifications merged into this one by digests
+    count: int = 1
 
     class Config:
         from_attributes = True
@@ -31,6 +33,12 @@ class NotificationInDBBase(NotificationBase):
 class Notification(NotificationInDBBase):
     pass
 
+class NotificationUnreadCount(BaseModel):
+    unread: int
+
+# Response columns in serialization order
+NOTIFICATION_FIELDS = list(Notification.model_fields)
+
 # Properties stored in DB
 class NotificationInDB(NotificationInDBBase):
     pass
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+class ChangeEvent(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    op: str
+    user_id: int
+    payload: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+# A page of the change feed, pass `cursor` back to continue after it
+class ChangeFeed(BaseModel):
+    events: List[ChangeEvent]
+    cursor: str
+    has_more: bool
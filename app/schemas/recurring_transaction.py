@@ -0,0 +1,60 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Optional
+from datetime import datetime
+from app.models.transaction import TransactionType, TransactionCategory
+from app.models.recurring_transaction import RecurrenceFrequency
+from app.schemas.transaction import CURRENCY_PATTERN
+from app.core.config import settings
+
+# Shared properties
+class RecurringTransactionBase(BaseModel):
+    amount: float = Field(..., gt=0)
+    currency: str = Field(settings.BASE_CURRENCY, pattern=CURRENCY_PATTERN)
+    description: str
+    type: TransactionType
+    category: TransactionCategory
+    frequency: RecurrenceFrequency
+    interval: int = Field(1, ge=1)
+    day_of_month: Optional[int] = Field(None, ge=1, le=31)
+    start_date: datetime
+    end_date: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def validate_dates(self):
+        if self.end_date and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+# Properties to receive via API on creation
+class RecurringTransactionCreate(RecurringTransactionBase):
+    pass
+
+# Properties to receive via API on update
+class RecurringTransactionUpdate(BaseModel):
+    amount: Optional[float] = Field(None, gt=0)
+    currency: Optional[str] = Field(None, pattern=CURRENCY_PATTERN)
+    description: Optional[str] = None
+    category: Optional[TransactionCategory] = None
+    # Changing the schedule moves the next run, see RecurringTransactionService.update
+    frequency: Optional[RecurrenceFrequency] = None
+    interval: Optional[int] = Field(None, ge=1)
+    day_of_month: Optional[int] = Field(None, ge=1, le=31)
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    is_active: Optional[bool] = None
+
+# Properties shared by models stored in DB
+class RecurringTransactionInDBBase(RecurringTransactionBase):
+    id: int
+    user_id: int
+    next_run_at: datetime
+    is_active: bool
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Properties to return via API
+class RecurringTransaction(RecurringTransactionInDBBase):
+    pass
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List
+
+from app.schemas.transaction import Transaction
+from app.schemas.goal import Goal
+from app.schemas.notification import Notification
+
+# Ids removed since the token, or no longer visible to the user
+class SyncDeleted(BaseModel):
+    transactions: List[int] = []
+    goals: List[int] = []
+    notifications: List[int] = []
+
+# Rows created or updated since the token; pass `token` to the next sync
+class SyncResponse(BaseModel):
+    token: str
+    has_more: bool
+    transactions: List[Transaction]
+    goals: List[Goal]
+    notifications: List[Notification]
+    deleted: SyncDeleted
@@ -1,27 +1,56 @@
-from pydantic import BaseModel, Field
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional, List
+from datetime import date, datetime
+from app.core.config import settings
 from app.models.transaction import TransactionType, TransactionCategory
 
+# ISO 4217 currency code
+CURRENCY_PATTERN = "^[A-Z]{3}$"
+
 # Shared properties
 class TransactionBase(BaseModel):
     amount: float = Field(..., gt=0)
+    currency: str = Field(settings.BASE_CURRENCY, pattern=CURRENCY_PATTERN)
     description: str
     type: TransactionType
     category: TransactionCategory
+    category_id: Optional[int] = None  # Node of the category tree, under `category`
     date: datetime
 
 # Properties to receive via API on creation
 class TransactionCreate(TransactionBase):
-    pass
+    # Either one is enough: the root of a category tree, or any node of it
+    category: Optional[TransactionCategory] = None
+
+    @model_validator(mode="after")
+    def validate_category(self) -> "TransactionCreate":
+        if self.category is None and self.category_id is None:
+            raise ValueError("Either category or category_id is required")
+        return self
 
 # Properties to receive via API on update
 class TransactionUpdate(BaseModel):
     amount: Optional[float] = Field(None, gt=0)
+    currency: Optional[str] = Field(None, pattern=CURRENCY_PATTERN)
     description: Optional[str] = None
     category: Optional[TransactionCategory] = None
+    category_id: Optional[int] = None
     date: Optional[datetime] = None
 
+# Row of an imported bank statement, the category is inferred when missing
+class TransactionImport(BaseModel):
+    amount: float = Field(..., gt=0)
+    currency: str = Field(settings.BASE_CURRENCY, pattern=CURRENCY_PATTERN)
+    description: str
+    type: TransactionType
+    date: datetime
+    category: Optional[TransactionCategory] = None
+
+class TransactionImportResult(BaseModel):
+    created: int
+    categorized: int
+    duplicates: int = 0  # Rows skipped because they were already recorded
+
 # Properties shared by models stored in DB
 class TransactionInDBBase(TransactionBase):
     id: int
@@ -36,6 +65,64 @@ class TransactionInDBBase(TransactionBase):
 class Transaction(TransactionInDBBase):
     pass
 
+# A created transaction, flagged when it looks like a recorded one
+class TransactionCreated(Transaction):
+    duplicate_of: Optional[int] = None
+
+# Search hit with its relevance score
+class TransactionSearchResult(TransactionInDBBase):
+    rank: float
+
+# Transactions sharing the same fingerprint
+class TransactionDuplicateGroup(BaseModel):
+    fingerprint: str
+    count: int
+    transactions: List[Transaction]
+
 # Properties stored in DB
 class TransactionInDB(TransactionInDBBase):
     pass
+
+# Columns that can be sorted on and projected in transaction queries
+TRANSACTION_SORT_FIELDS = {"date", "amount", "created_at", "category", "type", "description", "id"}
+TRANSACTION_FIELDS = list(Transaction.model_fields)
+
+# Filter query accepted by the transaction list endpoint
+class TransactionFilter(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    min_amount: Optional[float] = Field(None, ge=0)
+    max_amount: Optional[float] = Field(None, ge=0)
+    types: Optional[List[TransactionType]] = None
+    categories: Optional[List[TransactionCategory]] = None
+    category_ids: Optional[List[int]] = None  # Category tree nodes, subcategories included
+    user_ids: Optional[List[int]] = None  # Family members to include, defaults to the current user
+    sort: List[str] = ["-date"]  # Prefix a field with "-" for descending order
+    fields: Optional[List[str]] = None  # Columns to return, defaults to all of them
+    skip: int = Field(0, ge=0)
+    limit: int = Field(100, gt=0, le=1000)
+
+    @field_validator("sort")
+    @classmethod
+    def validate_sort(cls, value: List[str]) -> List[str]:
+        for item in value:
+            if item.lstrip("-") not in TRANSACTION_SORT_FIELDS:
+                raise ValueError(f"Cannot sort by '{item}'")
+        return value
+
+    @field_validator("fields")
+    @classmethod
+    def validate_fields(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        if value is not None:
+            unknown = set(value) - set(TRANSACTION_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return value
+
+    @model_validator(mode="after")
+    def validate_ranges(self) -> "TransactionFilter":
+        if self.min_amount is not None and self.max_amount is not None and self.min_amount > self.max_amount:
+            raise ValueError("min_amount must not be greater than max_amount")
+        if self.start_date and self.end_date and self.start_date > self.end_date:
+            raise ValueError("start_date must not be after end_date")
+        return self
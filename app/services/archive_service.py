@@ -0,0 +1,156 @@
+from typing import List, Optional, Dict, Any, Iterable, Set
+from datetime import date, datetime
+import json
+import zlib
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, cast, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.category import CategoryClosure
+from app.models.transaction import Transaction, TransactionType, TransactionCategory
+from app.models.transaction_archive import TransactionArchiveChunk, TransactionMonthlyAggregate
+from app.schemas.transaction import TRANSACTION_FIELDS
+from app.services.fx_service import amount_in_base_currency
+from app.services.outbox_service import bump_data_versions
+from app.utils.date_utils import add_months
+
+# Columns kept for archived transactions
+ARCHIVE_FIELDS = TRANSACTION_FIELDS + ["fingerprint"]
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+def wall_clock(value: datetime) -> datetime:
+    """Drop the offset of an archived date, to compare it with naive bounds the way Postgres does"""
+    return value.replace(tzinfo=None)
+
+class ArchiveService:
+    """Cold storage for old transactions.
+
+    Whole months of a user's transactions are moved out of the live table into
+    compressed chunks, and their exact totals per type and category are kept in
+    monthly aggregates. Reports add the aggregates to what is still live, so
+    archiving never changes a report; individual archived rows are only read
+    back by decompressing their month.
+
+    Dates follow the database session's timezone, like the live report queries.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def archive_older_than(self, months: int, batch_size: int = 50) -> int:
+        """Archive every transaction dated before the first day of the month `months` ago"""
+        cutoff = add_months(month_start(datetime.now()), -months)
+        month = cast(func.date_trunc("month", Transaction.date), Date).label("month")
+        archived = 0
+        while True:
+            groups = self.db.query(Transaction.user_id, month).filter(
+                Transaction.date < cutoff
+            ).group_by(Transaction.user_id, month).order_by(Transaction.user_id, month).limit(batch_size).all()
+            if not groups:
+                break
+            for user_id, group_month in groups:
+                archived += self._archive_month(user_id, group_month)
+            # One commit per batch of user-months keeps the locks short
+            self.db.commit()
+        return archived
+
+    def _archive_month(self, user_id: int, month: date) -> int:
+        start = datetime.combine(month, datetime.min.time())
+        rows = self.db.query(*[getattr(Transaction, field) for field in ARCHIVE_FIELDS]).filter(
+            Transaction.user_id == user_id,
+            Transaction.date >= start,
+            Transaction.date < add_months(start, 1)
+        ).order_by(Transaction.date, Transaction.id).with_for_update().all()
+        if not rows:
+            return 0
+        ids = [row.id for row in rows]
+
+        # Totals are summed by Postgres in the base currency, the same way the live report queries
+        # do it (rates imported later do not change archived months)
+        totals = select(
+            literal(user_id), literal(month), Transaction.type, Transaction.category, Transaction.category_id,
+            func.sum(amount_in_base_currency()), func.count(Transaction.id)
+        ).where(Transaction.id.in_(ids)).group_by(Transaction.type, Transaction.category, Transaction.category_id)
+        stmt = pg_insert(TransactionMonthlyAggregate).from_select(
+            ["user_id", "month", "type", "category", "category_id", "total", "count"], totals
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "month", "type", "category", "category_id"],
+            set_={
+                "total": TransactionMonthlyAggregate.total + stmt.excluded.total,
+                "count": TransactionMonthlyAggregate.count + stmt.excluded.count,
+            },
+        ))
+
+        payload = json.dumps(jsonable_encoder([dict(zip(ARCHIVE_FIELDS, row)) for row in rows]))
+        self.db.add(TransactionArchiveChunk(
+            user_id=user_id, month=month, row_count=len(rows), data=zlib.compress(payload.encode(), 9)
+        ))
+        self.db.query(Transaction).filter(Transaction.id.in_(ids)).delete(synchronize_session=False)
+        # Transaction lists change (reports do not), so their ETags must too
+        bump_data_versions(self.db, [(user_id, "transaction")])
+        return len(rows)
+
+    def get_archived_months(self, user_ids: Iterable[int]) -> Set[date]:
+        """Get the months with archived transactions of any of the users"""
+        return {month for month, in self.db.query(TransactionMonthlyAggregate.month).filter(
+            TransactionMonthlyAggregate.user_id.in_(list(user_ids))
+        ).distinct()}
+
+    def get_monthly_totals(
+        self, user_ids: Iterable[int], months: Iterable[date], rollup: bool = False
+    ) -> Dict[tuple, float]:
+        """Get archived totals by (type, category) over whole months.
+
+        With `rollup` they are by (type, category tree node) instead, each node
+        including its subcategories.
+        """
+        aggregate = TransactionMonthlyAggregate
+        key = CategoryClosure.ancestor_id if rollup else aggregate.category
+        query = self.db.query(aggregate.type, key, func.sum(aggregate.total))
+        if rollup:
+            query = query.join(CategoryClosure, CategoryClosure.descendant_id == aggregate.category_id)
+        rows = query.filter(
+            aggregate.user_id.in_(list(user_ids)),
+            aggregate.month.in_(list(months))
+        ).group_by(aggregate.type, key).all()
+        return {(type, category): total for type, category, total in rows}
+
+    def get_month_rows(self, user_ids: Iterable[int], month: date) -> List[Dict[str, Any]]:
+        """Decompress the archived transactions of one month"""
+        chunks = self.db.query(TransactionArchiveChunk.data).filter(
+            TransactionArchiveChunk.user_id.in_(list(user_ids)),
+            TransactionArchiveChunk.month == month
+        ).all()
+        rows = []
+        for data, in chunks:
+            for row in json.loads(zlib.decompress(data)):
+                row["date"] = datetime.fromisoformat(row["date"])
+                row["type"] = TransactionType(row["type"])
+                row["category"] = TransactionCategory(row["category"])
+                rows.append(row)
+        return rows
+
+    def get_archived_transactions(
+        self, user_ids: List[int], start_date: date, end_date: date,
+        skip: int = 0, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Slow path: decompress the archived transactions dated in a range, newest first"""
+        start = datetime.combine(start_date, datetime.min.time())
+        end = datetime.combine(end_date, datetime.max.time())
+        archived_months = self.get_archived_months(user_ids)
+        rows = []
+        month = month_start(start)
+        while month <= end:
+            if month.date() in archived_months:
+                rows.extend(
+                    row for row in self.get_month_rows(user_ids, month.date())
+                    if start <= wall_clock(row["date"]) <= end
+                )
+            month = add_months(month, 1)
+        rows.sort(key=lambda row: (row["date"], row["id"]), reverse=True)
+        return rows[skip:skip + limit if limit is not None else None]
@@ -0,0 +1,218 @@
+from typing import List, Optional, Dict, Any, Set, Tuple, Union
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+from sqlalchemy import Float, and_, cast, func, or_, select, type_coerce
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.types import Money
+from app.models.budget import Budget, BudgetAlert
+from app.models.category import Category, CategoryClosure
+from app.models.monthly_total import MonthlyCategoryTotal
+from app.models.transaction import TransactionType
+from app.models.user import User
+from app.schemas.budget import BudgetCreate, BudgetUpdate
+from app.services.notification_service import NotificationService, category_budget_notification_row
+from app.services.work_queue import get_work_queue, register
+
+BUDGET_CHECK = "budget_check"
+
+def current_month() -> date:
+    today = datetime.now().date()
+    return today.replace(day=1)
+
+class BudgetService:
+    """Category budgets, evaluated against the maintained monthly category totals.
+
+    A budget covers its category's whole subtree, so its spending is the sum of
+    the monthly totals of every descendant: one join on the closure table,
+    grouped by budget, evaluates all of a family's budgets at once.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, id: int) -> Optional[Budget]:
+        return self.db.query(Budget).filter(Budget.id == id).first()
+
+    def get_family_budgets(self, family_head_id: int, user_id: Optional[int] = None) -> List[Budget]:
+        """Get the budgets of a family, only the family-wide ones and those of `user_id` if given"""
+        query = self.db.query(Budget).filter(Budget.family_head_id == family_head_id)
+        if user_id is not None:
+            query = query.filter(or_(Budget.user_id.is_(None), Budget.user_id == user_id))
+        return query.order_by(Budget.id).all()
+
+    def create(self, obj_in: BudgetCreate, family_head_id: int) -> Budget:
+        db_obj = Budget(
+            family_head_id=family_head_id,
+            user_id=obj_in.user_id,
+            category_id=obj_in.category_id,
+            amount=obj_in.amount,
+            warning_threshold=obj_in.warning_threshold,
+            critical_threshold=obj_in.critical_threshold,
+        )
+        self.db.add(db_obj)
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def update(self, db_obj: Budget, obj_in: Union[BudgetUpdate, Dict[str, Any]]) -> Budget:
+        """Update a budget, raising ValueError when the thresholds end up inverted"""
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+
+        warning = update_data.get("warning_threshold") or db_obj.warning_threshold
+        critical = update_data.get("critical_threshold") or db_obj.critical_threshold
+        if warning > critical:
+            raise ValueError("warning_threshold must not be greater than critical_threshold")
+
+        for field in update_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+
+        self.db.add(db_obj)
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def remove(self, id: int) -> Budget:
+        obj = self.db.query(Budget).get(id)
+        self.db.delete(obj)
+        self.db.commit()
+        return obj
+
+    def get_status(
+        self, family_head_id: int, month: date, user_id: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Evaluate the family's budgets for a month in a single query.
+
+        With `user_id`, only the budgets that the user's spending counts towards
+        are evaluated: the family-wide ones and the user's own.
+        """
+        members = select(User.id).where((User.id == family_head_id) | (User.family_head_id == family_head_id))
+        spent = type_coerce(func.coalesce(func.sum(MonthlyCategoryTotal.total), 0), Money)
+        query = self.db.query(Budget, Category.name, spent).join(
+            Category, Category.id == Budget.category_id
+        ).join(
+            CategoryClosure, CategoryClosure.ancestor_id == Budget.category_id
+        ).outerjoin(MonthlyCategoryTotal, and_(
+            MonthlyCategoryTotal.category_id == CategoryClosure.descendant_id,
+            MonthlyCategoryTotal.month == month,
+            MonthlyCategoryTotal.type == TransactionType.EXPENSE,
+            MonthlyCategoryTotal.user_id.in_(members),
+            or_(Budget.user_id.is_(None), MonthlyCategoryTotal.user_id == Budget.user_id),
+        )).filter(Budget.family_head_id == family_head_id)
+        if user_id is not None:
+            query = query.filter(or_(Budget.user_id.is_(None), Budget.user_id == user_id))
+
+        result = []
+        for budget, category_name, spent in query.group_by(Budget.id, Category.name).order_by(Budget.id):
+            percentage = spent / budget.amount
+            if percentage >= budget.critical_threshold:
+                status = "critical"
+            elif percentage >= budget.warning_threshold:
+                status = "warning"
+            else:
+                status = "ok"
+            result.append({
+                "budget_id": budget.id,
+                "category_id": budget.category_id,
+                "category_name": category_name,
+                "user_id": budget.user_id,
+                "month": month,
+                "amount": budget.amount,
+                "spent": spent,
+                "remaining": max(0.0, budget.amount - spent),
+                "percentage": percentage,
+                "status": status,
+            })
+        return result
+
+    def check_budgets(self, user_id: int) -> None:
+        """Notify about the budgets that the user's spending pushed past a threshold this month"""
+        user = self.db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return
+        month = current_month()
+        statuses = [
+            (status["budget_id"], status["user_id"] or user.family_id, status["category_name"], status["percentage"],
+             status["status"] == "critical")
+            for status in self.get_status(user.family_id, month, user_id=user_id) if status["status"] != "ok"
+        ]
+        self._notify(statuses, month)
+        self.db.commit()
+
+    def check_all_budgets(self, month: date) -> int:
+        """Notify about every family's budgets past a threshold for the month, returning how many alerts were sent.
+
+        Spending of all budgets is evaluated with one grouped query over the
+        monthly category totals, alerts are claimed with one upsert per level
+        and the notifications inserted in bulk.
+        """
+        family_of = func.coalesce(User.family_head_id, User.id)
+        percentage = cast(func.sum(MonthlyCategoryTotal.total), Float) / cast(Budget.amount, Float)
+        rows = self.db.query(
+            Budget.id,
+            func.coalesce(Budget.user_id, Budget.family_head_id),
+            Category.name,
+            percentage,
+            percentage >= Budget.critical_threshold,
+        ).join(
+            Category, Category.id == Budget.category_id
+        ).join(
+            CategoryClosure, CategoryClosure.ancestor_id == Budget.category_id
+        ).join(MonthlyCategoryTotal, and_(
+            MonthlyCategoryTotal.category_id == CategoryClosure.descendant_id,
+            MonthlyCategoryTotal.month == month,
+            MonthlyCategoryTotal.type == TransactionType.EXPENSE,
+            or_(Budget.user_id.is_(None), MonthlyCategoryTotal.user_id == Budget.user_id),
+        )).join(
+            User, and_(User.id == MonthlyCategoryTotal.user_id, family_of == Budget.family_head_id)
+        ).group_by(Budget.id, Category.name).having(percentage >= Budget.warning_threshold).all()
+
+        sent = self._notify(rows, month)
+        self.db.commit()
+        return sent
+
+    def _notify(self, statuses: List[Tuple[int, int, str, float, bool]], month: date) -> int:
+        """Claim and send the alerts of (budget id, recipient, category name, percentage, critical) rows"""
+        notifications = []
+        for critical in (True, False):
+            level = [status for status in statuses if status[4] == critical]
+            claimed = self._claim_alerts([budget_id for budget_id, *_ in level], month, critical)
+            notifications.extend(
+                category_budget_notification_row(recipient, category_name, percentage, critical)
+                for budget_id, recipient, category_name, percentage, _ in level if budget_id in claimed
+            )
+        NotificationService(self.db).insert_rows(notifications, commit=False)
+        return len(notifications)
+
+    def _claim_alerts(self, budget_ids: List[int], month: date, critical: bool) -> Set[int]:
+        """Mark alerts as sent for the month, returning the budgets whose alert (or a critical one) was not yet"""
+        if not budget_ids:
+            return set()
+        flag = "critical_sent" if critical else "warning_sent"
+        stmt = pg_insert(BudgetAlert).values([
+            {"budget_id": budget_id, "month": month, "warning_sent": False, "critical_sent": False, flag: True}
+            for budget_id in sorted(set(budget_ids))
+        ])
+        # A conditional upsert: concurrent checks cannot both claim the same alert
+        not_sent = BudgetAlert.critical_sent == False
+        if not critical:
+            not_sent = and_(not_sent, BudgetAlert.warning_sent == False)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[BudgetAlert.budget_id, BudgetAlert.month], set_={flag: True}, where=not_sent
+        ).returning(BudgetAlert.budget_id)
+        return set(self.db.scalars(stmt).all())
+
+@register(BUDGET_CHECK)
+def evaluate_budgets(db: Session, user_id: int) -> None:
+    """Run the monthly and the category budget checks of a user"""
+    NotificationService(db).check_budget_thresholds(user_id=user_id)
+    BudgetService(db).check_budgets(user_id=user_id)
+
+def enqueue_budget_check(user_id: int) -> None:
+    """Evaluate the user's budgets in the background, once for a burst of writes"""
+    get_work_queue().enqueue(BUDGET_CHECK, user_id)
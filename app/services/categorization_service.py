@@ -0,0 +1,157 @@
+from typing import List, Optional, Dict, Any, Tuple, Union
+
+from sqlalchemy.orm import Session
+from sqlalchemy import func, update
+
+from app.models.categorization_rule import CategorizationRule, RuleMatchType
+from app.models.transaction import Transaction, TransactionCategory
+from app.models.user import User
+from app.schemas.categorization_rule import CategorizationRuleCreate, CategorizationRuleUpdate
+from app.services.category_service import CategoryService
+from app.services.monthly_totals_service import apply_monthly_totals
+from app.services.outbox_service import OutboxService, UPDATED
+from app.utils.category_matcher import CategoryMatcher, MatcherRule
+
+# Compiled matchers per family, kept until the family's rules change
+_matchers: Dict[int, Tuple[Tuple, CategoryMatcher]] = {}
+
+class CategorizationService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, id: int) -> Optional[CategorizationRule]:
+        return self.db.query(CategorizationRule).filter(CategorizationRule.id == id).first()
+
+    def get_family_rules(self, family_head_id: int) -> List[CategorizationRule]:
+        """Get all categorization rules of a family"""
+        return self.db.query(CategorizationRule).filter(
+            CategorizationRule.family_head_id == family_head_id
+        ).order_by(CategorizationRule.priority.desc(), CategorizationRule.id).all()
+
+    def create(self, obj_in: CategorizationRuleCreate, family_head_id: int) -> CategorizationRule:
+        db_obj = CategorizationRule(
+            match_type=obj_in.match_type,
+            pattern=obj_in.pattern,
+            merchant=obj_in.merchant,
+            category=obj_in.category,
+            priority=obj_in.priority,
+            family_head_id=family_head_id,
+            user_id=obj_in.user_id,
+        )
+        self.db.add(db_obj)
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def update(
+        self, db_obj: CategorizationRule, obj_in: Union[CategorizationRuleUpdate, Dict[str, Any]]
+    ) -> CategorizationRule:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+
+        for field in update_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+
+        self.db.add(db_obj)
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def remove(self, id: int) -> CategorizationRule:
+        obj = self.db.query(CategorizationRule).get(id)
+        self.db.delete(obj)
+        self.db.commit()
+        return obj
+
+    def get_matcher(self, family_head_id: int) -> CategoryMatcher:
+        """Get the compiled matcher of a family, rebuilding it only when its rules changed"""
+        # Any insert, update or delete of a rule changes this fingerprint
+        version = tuple(self.db.query(
+            func.count(CategorizationRule.id),
+            func.max(CategorizationRule.id),
+            func.max(func.coalesce(CategorizationRule.updated_at, CategorizationRule.created_at)),
+        ).filter(CategorizationRule.family_head_id == family_head_id).one())
+
+        cached = _matchers.get(family_head_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        matcher = CategoryMatcher(
+            MatcherRule(
+                id=rule.id,
+                pattern=rule.pattern,
+                is_regex=rule.match_type == RuleMatchType.REGEX,
+                category=rule.category,
+                priority=rule.priority,
+                user_id=rule.user_id,
+                merchant=rule.merchant,
+            )
+            for rule in self.get_family_rules(family_head_id)
+        )
+        _matchers[family_head_id] = (version, matcher)
+        return matcher
+
+    def categorize(
+        self, family_head_id: int, descriptions: List[str], user_id: Optional[int] = None
+    ) -> List[Optional[TransactionCategory]]:
+        """Classify descriptions with the family's rules, None where no rule matches"""
+        matcher = self.get_matcher(family_head_id)
+        return [match.category if match else None for match in matcher.match_many(descriptions, user_id)]
+
+    def recategorize_history(
+        self, family_head_id: int, only_uncategorized: bool = True, batch_size: int = 1000
+    ) -> int:
+        """Apply the family's rules to existing transactions with batched updates.
+
+        By default only transactions filed under OTHER are touched. Returns the
+        number of transactions whose category changed.
+        """
+        matcher = self.get_matcher(family_head_id)
+        root_ids = CategoryService(self.db).get_root_ids()
+        member_ids = [member.id for member in self.db.query(User.id).filter(
+            (User.id == family_head_id) | (User.family_head_id == family_head_id)
+        ).all()]
+
+        updated = 0
+        last_id = 0
+        while True:
+            # Keyset pagination over the primary key keeps every batch an index range scan
+            query = self.db.query(
+                Transaction.id, Transaction.description, Transaction.category, Transaction.user_id
+            ).filter(
+                Transaction.user_id.in_(member_ids),
+                Transaction.id > last_id
+            )
+            if only_uncategorized:
+                query = query.filter(Transaction.category == TransactionCategory.OTHER)
+            rows = query.order_by(Transaction.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            changes = []
+            owners = {}
+            for row in rows:
+                match = matcher.match(row.description, row.user_id)
+                if match and match.category != row.category:
+                    changes.append({
+                        "id": row.id, "category": match.category, "category_id": root_ids[match.category]
+                    })
+                    owners[row.id] = row.user_id
+
+            if changes:
+                changed_ids = [change["id"] for change in changes]
+                apply_monthly_totals(self.db, changed_ids, -1)
+                # Executemany UPDATE ... WHERE id = :id for the whole batch
+                self.db.execute(update(Transaction), changes)
+                apply_monthly_totals(self.db, changed_ids, 1)
+                OutboxService(self.db).record(
+                    Transaction, UPDATED, [{**change, "user_id": owners[change["id"]]} for change in changes]
+                )
+                self.db.commit()
+                updated += len(changes)
+
+        return updated
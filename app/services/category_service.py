@@ -0,0 +1,203 @@
+from typing import List, Optional, Dict, Any, Iterable, Tuple, Union
+
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.category import Category, CategoryClosure, CategoryRedirect
+from app.models.monthly_total import MonthlyCategoryTotal
+from app.models.transaction import Transaction, TransactionCategory
+from app.models.transaction_archive import TransactionMonthlyAggregate
+from app.schemas.category import CategoryCreate, CategoryUpdate
+from app.services.outbox_service import OutboxService, UPDATED, bump_data_versions
+
+# System category ids by TransactionCategory value, they never change once created
+_root_ids: Dict[TransactionCategory, int] = {}
+
+class CategoryService:
+    """Category trees stored with a closure table.
+
+    Every (ancestor, descendant) pair has a row, so the subtree or the
+    ancestors of a node are one indexed lookup, and rollups are a single join
+    on descendant_id followed by a group-by on ancestor_id.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, id: int) -> Optional[Category]:
+        return self.db.query(Category).filter(Category.id == id).first()
+
+    def ensure_system_categories(self) -> None:
+        """Create the root category of every TransactionCategory value that is missing"""
+        for value in TransactionCategory:
+            created = self.db.execute(
+                pg_insert(Category).values(name=value.value.capitalize(), root_category=value).on_conflict_do_nothing(
+                    index_elements=[Category.root_category], index_where=Category.parent_id.is_(None)
+                ).returning(Category.id)
+            ).scalar()
+            if created:
+                self.db.execute(insert(CategoryClosure).values(ancestor_id=created, descendant_id=created, depth=0))
+        self.db.commit()
+
+    def get_root_ids(self) -> Dict[TransactionCategory, int]:
+        """Get the system category id of every TransactionCategory value"""
+        if not _root_ids:
+            _root_ids.update(self.db.query(Category.root_category, Category.id).filter(Category.parent_id.is_(None)).all())
+        return _root_ids
+
+    def get_family_categories(self, family_head_id: int) -> List[Category]:
+        """Get the system categories and the family's own categories"""
+        return self.db.query(Category).filter(
+            (Category.family_head_id.is_(None)) | (Category.family_head_id == family_head_id)
+        ).order_by(Category.root_category, Category.id).all()
+
+    def is_visible(self, category: Category, family_head_id: int) -> bool:
+        return category.family_head_id is None or category.family_head_id == family_head_id
+
+    def resolve(
+        self, family_head_id: int, category: Optional[TransactionCategory], category_id: Optional[int]
+    ) -> Tuple[TransactionCategory, int]:
+        """Get the (root category, category id) pair of a transaction, raising ValueError when invalid"""
+        if category_id is None:
+            if category is None:
+                raise ValueError("Either category or category_id is required")
+            return category, self.get_root_ids()[category]
+        node = self.get(category_id)
+        if not node or not self.is_visible(node, family_head_id):
+            raise ValueError(f"Category {category_id} not found")
+        if category is not None and category != node.root_category:
+            raise ValueError(f"Category {category_id} is not under {category.value}")
+        return node.root_category, node.id
+
+    def get_ancestor_ids(self, category_ids: Iterable[int]) -> Dict[int, List[int]]:
+        """Get the ancestors of each category, itself included.
+
+        Deleted categories get the ancestors of the category that took over their
+        rows (see remove), unknown ones are left out.
+        """
+        category_ids = set(category_ids)
+        ancestors: Dict[int, List[int]] = {}
+        for ancestor_id, descendant_id in self.db.query(CategoryClosure.ancestor_id, CategoryClosure.descendant_id).filter(
+            CategoryClosure.descendant_id.in_(list(category_ids))
+        ):
+            ancestors.setdefault(descendant_id, []).append(ancestor_id)
+
+        deleted = category_ids - set(ancestors)
+        if deleted:
+            redirects = dict(self.db.query(CategoryRedirect.category_id, CategoryRedirect.target_id).filter(
+                CategoryRedirect.category_id.in_(list(deleted))
+            ).all())
+            # Redirects always point at existing categories, one more lookup resolves them
+            targets = self.get_ancestor_ids(set(redirects.values())) if redirects else {}
+            for category_id, target_id in redirects.items():
+                if target_id in targets:
+                    ancestors[category_id] = targets[target_id]
+        return ancestors
+
+    def get_subtree_ids(self, category_ids: Iterable[int]):
+        """Subquery of the categories in the subtrees of the given ones"""
+        return select(CategoryClosure.descendant_id).where(CategoryClosure.ancestor_id.in_(list(category_ids)))
+
+    def create(self, obj_in: CategoryCreate, family_head_id: int) -> Category:
+        """Create a family category below `obj_in.parent_id`, raising ValueError for unknown parents"""
+        parent = self.get(obj_in.parent_id)
+        if not parent or not self.is_visible(parent, family_head_id):
+            raise ValueError(f"Category {obj_in.parent_id} not found")
+        db_obj = Category(
+            name=obj_in.name,
+            parent_id=parent.id,
+            root_category=parent.root_category,
+            family_head_id=family_head_id,
+        )
+        self.db.add(db_obj)
+        self.db.flush()
+
+        # The new node's paths: the parent's ancestors one level further, plus itself
+        paths = union_all(
+            select(CategoryClosure.ancestor_id, literal(db_obj.id), CategoryClosure.depth + 1).where(
+                CategoryClosure.descendant_id == parent.id
+            ),
+            select(literal(db_obj.id), literal(db_obj.id), literal(0)),
+        )
+        self.db.execute(insert(CategoryClosure).from_select(["ancestor_id", "descendant_id", "depth"], paths))
+        bump_data_versions(self.db, [(family_head_id, "category")])
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def update(self, db_obj: Category, obj_in: Union[CategoryUpdate, Dict[str, Any]]) -> Category:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+
+        for field in update_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+
+        self.db.add(db_obj)
+        bump_data_versions(self.db, [(db_obj.family_head_id, "category")])
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def remove(self, db_obj: Category) -> Category:
+        """Delete a family category, its subcategories and transactions move up to its parent.
+
+        Budgets of the category are deleted with it. A redirect to the parent is
+        kept so that archived transactions of the category roll up like its
+        merged monthly totals.
+        """
+        node_id, parent_id = db_obj.id, db_obj.parent_id
+
+        # Descendants are one level closer to every ancestor above the node
+        subtree = select(CategoryClosure.descendant_id).where(
+            CategoryClosure.ancestor_id == node_id, CategoryClosure.descendant_id != node_id
+        )
+        above = select(CategoryClosure.ancestor_id).where(
+            CategoryClosure.descendant_id == node_id, CategoryClosure.ancestor_id != node_id
+        )
+        self.db.execute(
+            update(CategoryClosure).where(
+                CategoryClosure.descendant_id.in_(subtree), CategoryClosure.ancestor_id.in_(above)
+            ).values(depth=CategoryClosure.depth - 1)
+        )
+        self.db.execute(update(Category).where(Category.parent_id == node_id).values(parent_id=parent_id))
+
+        moved = self.db.execute(
+            update(Transaction).where(Transaction.category_id == node_id).values(
+                category_id=parent_id
+            ).returning(Transaction.id, Transaction.user_id)
+        ).all()
+        OutboxService(self.db).record(
+            Transaction, UPDATED,
+            [{"id": id, "user_id": user_id, "category_id": parent_id} for id, user_id in moved]
+        )
+
+        # Archived and monthly totals of the node are merged into the parent's
+        for totals, keys in (
+            (TransactionMonthlyAggregate, ["user_id", "month", "type", "category"]),
+            (MonthlyCategoryTotal, ["user_id", "month", "type"]),
+        ):
+            merged = select(
+                *[getattr(totals, key) for key in keys], literal(parent_id), totals.total, totals.count
+            ).where(totals.category_id == node_id)
+            stmt = pg_insert(totals).from_select(keys + ["category_id", "total", "count"], merged)
+            self.db.execute(stmt.on_conflict_do_update(
+                index_elements=keys + ["category_id"],
+                set_={"total": totals.total + stmt.excluded.total, "count": totals.count + stmt.excluded.count},
+            ))
+            self.db.query(totals).filter(totals.category_id == node_id).delete(synchronize_session=False)
+
+        # Categories deleted earlier into this one now resolve to the parent as well
+        self.db.execute(
+            update(CategoryRedirect).where(CategoryRedirect.target_id == node_id).values(target_id=parent_id)
+        )
+        self.db.execute(insert(CategoryRedirect).values(category_id=node_id, target_id=parent_id))
+
+        # The node's own closure rows go with it (ON DELETE CASCADE)
+        self.db.delete(db_obj)
+        bump_data_versions(self.db, [(db_obj.family_head_id, "category")])
+        self.db.commit()
+        return db_obj
@@ -0,0 +1,32 @@
+from typing import Any, Iterable, List, Tuple
+import hashlib
+
+from sqlalchemy.orm import Session
+
+from app.models.data_version import DataVersion
+
+class DataVersionService:
+    """Read the data version counters that back ETags.
+
+    The counters are bumped by the outbox flush hook, so any write to a
+    transaction, goal, contribution or notification invalidates the tags of
+    its owner. A family-scoped tag combines the counters of every member it
+    covers, so adding a member changes it too.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_versions(self, user_ids: Iterable[int], entities: Iterable[str]) -> List[Tuple[int, str, int]]:
+        """Get (user_id, entity, version) for the existing counters, a primary key lookup"""
+        return self.db.query(DataVersion.user_id, DataVersion.entity, DataVersion.version).filter(
+            DataVersion.user_id.in_(list(user_ids)),
+            DataVersion.entity.in_(list(entities))
+        ).order_by(DataVersion.user_id, DataVersion.entity).all()
+
+    def etag(self, user_ids: Iterable[int], entities: Iterable[str], *parts: Any) -> str:
+        """Weak ETag over the users' counters, the users themselves and any extra request parts"""
+        user_ids = sorted(set(user_ids))
+        entities = sorted(set(entities))
+        key = repr((user_ids, entities, self.get_versions(user_ids, entities), parts))
+        return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
@@ -0,0 +1,133 @@
+from typing import Iterable, List, Optional, Tuple, TextIO
+from datetime import date
+from decimal import Decimal, InvalidOperation
+import csv
+
+from sqlalchemy.orm import Session
+from sqlalchemy import BigInteger, Date, and_, case, cast, func, or_, select, type_coerce
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.db.types import Money
+from app.models.fx_rate import FxRate
+from app.models.transaction import Transaction
+from app.utils.fx_table import FxTable
+
+# Rates loaded from the database, kept until the rate table changes
+_table: Optional[Tuple[Tuple, FxTable]] = None
+
+def amount_in_base_currency():
+    """SQL expression converting Transaction.amount to the base currency, row by row.
+
+    Uses the same rate as FxTable: the latest one on or before the transaction's
+    day, or the first known one for older days, rounded to whole cents. Base
+    currency rows skip the lookup, the others are one primary key probe each.
+    """
+    day = cast(Transaction.date, Date)
+    latest = select(FxRate.rate).where(
+        FxRate.currency == Transaction.currency, FxRate.date <= day
+    ).order_by(FxRate.date.desc()).limit(1).correlate(Transaction).scalar_subquery()
+    first = select(FxRate.rate).where(
+        FxRate.currency == Transaction.currency
+    ).order_by(FxRate.date).limit(1).correlate(Transaction).scalar_subquery()
+    # Converted amounts are rounded to whole cents, so sums stay exact
+    cents = type_coerce(Transaction.amount, BigInteger)
+    return type_coerce(case(
+        (Transaction.currency == settings.BASE_CURRENCY, cents),
+        else_=cast(func.round(cents * func.coalesce(latest, first)), BigInteger),
+    ), Money)
+
+def parse_rates_csv(file: TextIO) -> List[Tuple[str, date, Decimal]]:
+    """Read `date,currency,rate` rows (header optional), raising ValueError on bad rows"""
+    rows = []
+    for line_number, record in enumerate(csv.reader(file), start=1):
+        if not record or (line_number == 1 and record[0].strip().lower() == "date"):
+            continue
+        try:
+            day, currency, rate = (value.strip() for value in record)
+            rows.append((currency.upper(), date.fromisoformat(day), Decimal(rate)))
+        except (ValueError, InvalidOperation):
+            raise ValueError(f"Invalid FX rate on line {line_number}: {','.join(record)}")
+    return rows
+
+class FxService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def import_rates(self, rows: Iterable[Tuple[str, date, Decimal]], batch_size: int = 5000) -> int:
+        """Upsert daily rates, a rate imported again for the same day replaces the old one.
+
+        Transactions on or after the earliest imported day of each currency are
+        converted again, with their monthly totals, in the same transaction.
+        """
+        rows = [
+            {"currency": currency, "date": day, "rate": rate}
+            for currency, day, rate in rows if currency != settings.BASE_CURRENCY
+        ]
+        # First known day of each currency, before the new rates land
+        first_days = dict(self.db.query(FxRate.currency, func.min(FxRate.date)).group_by(FxRate.currency).all())
+        for start in range(0, len(rows), batch_size):
+            stmt = pg_insert(FxRate).values(rows[start:start + batch_size])
+            self.db.execute(stmt.on_conflict_do_update(
+                index_elements=[FxRate.currency, FxRate.date],
+                set_={"rate": stmt.excluded.rate, "updated_at": func.now()},
+            ))
+        self._convert_again(rows, first_days, batch_size)
+        self.db.commit()
+        return len(rows)
+
+    def _convert_again(self, rows: List[dict], first_days: dict, batch_size: int) -> None:
+        """Move the transactions whose rate may have changed to their new base amounts, in id batches"""
+        from app.services.monthly_totals_service import apply_monthly_totals
+
+        earliest = {}
+        for row in rows:
+            earliest[row["currency"]] = min(row["date"], earliest.get(row["currency"], row["date"]))
+        conditions = []
+        for currency, day in earliest.items():
+            first_day = first_days.get(currency)
+            if first_day is None or day <= first_day:
+                # The first rate also converts every earlier day
+                conditions.append(Transaction.currency == currency)
+            else:
+                conditions.append(and_(Transaction.currency == currency, Transaction.date >= day))
+        if not conditions:
+            return
+
+        last_id = 0
+        while True:
+            ids = self.db.scalars(
+                select(Transaction.id).where(or_(*conditions), Transaction.id > last_id).order_by(
+                    Transaction.id
+                ).limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            apply_monthly_totals(self.db, ids, -1)
+            apply_monthly_totals(self.db, ids, 1)
+            last_id = ids[-1]
+
+    def get_version(self) -> Tuple:
+        """Get a value that changes whenever rates are imported, for caches of converted amounts"""
+        return tuple(self.db.query(func.count(FxRate.date), func.max(FxRate.updated_at)).one())
+
+    def get_table(self) -> FxTable:
+        """Get the rates as an in-memory table, reloading it only when rates changed"""
+        global _table
+        version = self.get_version()
+        if _table and _table[0] == version:
+            return _table[1]
+
+        table = FxTable(
+            settings.BASE_CURRENCY,
+            self.db.query(FxRate.currency, FxRate.date, FxRate.rate).all(),
+        )
+        _table = (version, table)
+        return table
+
+    def check_currencies(self, currencies: Iterable[str]) -> None:
+        """Raise ValueError for currencies without exchange rates"""
+        table = self.get_table()
+        unknown = sorted({currency for currency in currencies if not table.supports(currency)})
+        if unknown:
+            raise ValueError(f"No exchange rates for currency {', '.join(unknown)}")
@@ -1,12 +1,27 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import List, NamedTuple, Optional, Dict, Any, Tuple, Union
+from collections import defaultdict
 from datetime import datetime
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import Float, and_, case, cast, exists, insert, literal, or_, select, true, type_coerce, update
 
-from app.models.goal import Goal, GoalContribution
+from app.db.types import Money
+from app.models.goal import Goal, GoalContribution, goal_participants
 from app.models.user import User
-from app.schemas.goal import GoalCreate, GoalUpdate
+from app.schemas.goal import GoalCreate, GoalUpdate, GOAL_FIELDS
+from app.services.notification_service import NotificationService
+from app.services.outbox_service import OutboxService, CREATED, UPDATED
+
+# Computed response fields that are not goal columns
+GOAL_COMPUTED_FIELDS = ("participants", "progress_percentage")
+
+class GoalContributionRow(NamedTuple):
+    """A contribution as written by add_contribution"""
+    id: int
+    amount: float
+    goal_id: int
+    user_id: int
+    date: datetime
 
 class GoalService:
     def __init__(self, db: Session):
@@ -15,28 +30,55 @@ class GoalService:
     def get(self, id: int) -> Optional[Goal]:
         return self.db.query(Goal).filter(Goal.id == id).first()
 
-    def get_user_goals(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Goal]:
-        """Get goals where user is creator or participant"""
-        return self.db.query(Goal).filter(
-            (Goal.creator_id == user_id) | 
-            (Goal.participants.any(User.id == user_id))
-        ).order_by(Goal.created_at.desc()).offset(skip).limit(limit).all()
-        
-    def get_family_goals(self, family_head_id: int, skip: int = 0, limit: int = 100) -> List[Goal]:
-        """Get all goals for a family"""
-        # Get all family members including head
-        family_members = self.db.query(User).filter(
-            (User.id == family_head_id) | (User.family_head_id == family_head_id)
-        ).all()
-        
-        family_member_ids = [member.id for member in family_members]
-        
-        return self.db.query(Goal).filter(
-            Goal.creator_id.in_(family_member_ids)
-        ).order_by(Goal.created_at.desc()).offset(skip).limit(limit).all()
+    def get_user_goal_rows(
+        self, user_id: int, skip: int = 0, limit: Optional[int] = 100, goal_ids: Optional[List[int]] = None
+    ) -> List[Tuple]:
+        """Get goals where user is creator or participant as tuples in response schema order"""
+        is_participant = exists().where(
+            goal_participants.c.goal_id == Goal.id,
+            goal_participants.c.user_id == user_id,
+        )
+        return self._goal_rows(
+            (Goal.creator_id == user_id) | is_participant, skip=skip, limit=limit, goal_ids=goal_ids
+        )
+
+    def get_goal_row(self, goal_id: int) -> Optional[Tuple]:
+        """Get a goal as a tuple in response schema order"""
+        rows = self._goal_rows(true(), limit=None, goal_ids=[goal_id])
+        return rows[0] if rows else None
+
+    def _goal_rows(
+        self, condition: Any, skip: int = 0, limit: Optional[int] = 100, goal_ids: Optional[List[int]] = None
+    ) -> List[Tuple]:
+        columns = [getattr(Goal, field) for field in GOAL_FIELDS if field not in GOAL_COMPUTED_FIELDS]
+        # Both amounts are in cents, their ratio needs no conversion
+        progress = case(
+            (Goal.target_amount > 0, cast(Goal.current_amount, Float) * 100 / cast(Goal.target_amount, Float)),
+            else_=0.0,
+        )
+        query = self.db.query(*columns, progress).filter(condition)
+        if goal_ids is not None:
+            query = query.filter(Goal.id.in_(goal_ids))
+        rows = query.order_by(Goal.created_at.desc()).offset(skip).limit(limit).all()
+
+        # Load the participant ids of the whole page in one extra query
+        participants = defaultdict(list)
+        if rows:
+            links = self.db.query(goal_participants.c.goal_id, goal_participants.c.user_id).filter(
+                goal_participants.c.goal_id.in_([row.id for row in rows])
+            ).all()
+            for goal_id, participant_id in links:
+                participants[goal_id].append(participant_id)
+
+        return [(*row[:-1], participants[row.id], row[-1]) for row in rows]
 
     def create(self, obj_in: GoalCreate, creator_id: int) -> Goal:
-        # Create the goal
+        """Create a goal, link its participants and notify them in a single transaction.
+
+        Participants are linked by id with one INSERT ... SELECT, which skips
+        unknown users, and notified with one bulk insert: creation takes the
+        same number of statements whatever the number of participants.
+        """
         db_obj = Goal(
             title=obj_in.title,
             description=obj_in.description,
@@ -47,16 +89,18 @@ class GoalService:
             creator_id=creator_id,
         )
         self.db.add(db_obj)
+        self.db.flush()
+
+        participant_ids = self.db.scalars(
+            insert(goal_participants).from_select(
+                ["goal_id", "user_id"],
+                select(literal(db_obj.id), User.id).where(User.id.in_(obj_in.participant_ids)).order_by(User.id),
+            ).returning(goal_participants.c.user_id)
+        ).all()
+        NotificationService(self.db).create_goal_notifications(
+            participant_ids, goal_id=db_obj.id, goal_title=db_obj.title, commit=False
+        )
         self.db.commit()
-        self.db.refresh(db_obj)
-        
-        # Add participants
-        participants = self.db.query(User).filter(User.id.in_(obj_in.participant_ids)).all()
-        db_obj.participants = participants
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
-        
         return db_obj
 
     def update(self, db_obj: Goal, obj_in: Union[GoalUpdate, Dict[str, Any]]) -> Goal:
@@ -74,42 +118,60 @@ class GoalService:
         
         # Update participants if provided
         if participant_ids is not None:
+            removed = {participant.id for participant in db_obj.participants} - set(participant_ids)
             participants = self.db.query(User).filter(User.id.in_(participant_ids)).all()
             db_obj.participants = participants
+            # The goal's own event belongs to its creator: removed users of other families need theirs
+            OutboxService(self.db).record_for_users(Goal, UPDATED, {
+                "id": db_obj.id, "creator_id": db_obj.creator_id,
+                "participants": [participant.id for participant in participants],
+            }, removed)
         
         self.db.add(db_obj)
         self.db.commit()
         self.db.refresh(db_obj)
         return db_obj
 
-    def add_contribution(self, goal_id: int, user_id: int, amount: float) -> GoalContribution:
-        """Add a contribution to a goal"""
-        # Create contribution
-        contribution = GoalContribution(
-            amount=amount,
-            goal_id=goal_id,
-            user_id=user_id,
-        )
-        self.db.add(contribution)
-        
-        # Update goal current amount
-        goal = self.get(id=goal_id)
-        goal.current_amount += amount
-        self.db.add(goal)
-        
-        self.db.commit()
-        self.db.refresh(contribution)
-        return contribution
+    def add_contribution(self, goal_id: int, user_id: int, amount: float, commit: bool = True) -> Tuple[Any, bool]:
+        """Add a contribution to a goal, returning it and whether it completed the goal.
+
+        The goal update and the contribution insert are a single statement: the
+        amount is added in SQL under the row lock, so concurrent contributions
+        all count, and the goal is flagged completed by the contribution that
+        reaches the target. Raises ValueError for unknown goals.
+        """
+        new_amount = Goal.current_amount + amount
+        updated = update(Goal).where(Goal.id == goal_id).values(
+            current_amount=new_amount,
+            is_completed=or_(Goal.is_completed == True, new_amount >= Goal.target_amount),
+        ).returning(
+            Goal.id, Goal.creator_id, Goal.current_amount, Goal.is_completed,
+            # RETURNING sees the new amount: this contribution crossed the target
+            and_(Goal.current_amount >= Goal.target_amount, Goal.current_amount - amount < Goal.target_amount).label("completed"),
+        ).cte("updated")
+        inserted = insert(GoalContribution).from_select(
+            ["amount", "goal_id", "user_id"],
+            select(type_coerce(literal(amount), Money), updated.c.id, literal(user_id)),
+        ).returning(
+            GoalContribution.id, GoalContribution.amount, GoalContribution.goal_id, GoalContribution.user_id,
+            GoalContribution.date,
+        ).cte("inserted")
+        row = self.db.execute(select(inserted, updated.c.creator_id, updated.c.current_amount, updated.c.is_completed,
+                                     updated.c.completed).select_from(inserted).join(updated, true())).first()
+        if row is None:
+            self.db.rollback()
+            raise ValueError(f"Goal {goal_id} not found")
+
+        contribution = GoalContributionRow(row.id, row.amount, row.goal_id, row.user_id, row.date)
+        OutboxService(self.db).record(GoalContribution, CREATED, [contribution._asdict()])
+        OutboxService(self.db).record(Goal, UPDATED, [{
+            "id": goal_id, "creator_id": row.creator_id,
+            "current_amount": row.current_amount, "is_completed": row.is_completed,
+        }])
+        if commit:
+            self.db.commit()
+        return contribution, row.completed
 
-    def mark_as_completed(self, goal_id: int) -> Goal:
-        """Mark a goal as completed"""
-        goal = self.get(id=goal_id)
-        goal.is_completed = True
-        self.db.add(goal)
-        self.db.commit()
-        self.db.refresh(goal)
-        return goal
-        
     def get_goal_contributions(self, goal_id: int) -> List[GoalContribution]:
         """Get all contributions for a goal"""
         return self.db.query(GoalContribution).filter(
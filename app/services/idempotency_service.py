@@ -0,0 +1,89 @@
+from typing import Optional
+from datetime import timedelta
+import hashlib
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql import func
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+class IdempotencyService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def request_hash(path: str, payload: BaseModel) -> str:
+        """Fingerprint a request so a key cannot be replayed for a different one"""
+        return hashlib.sha256(f"{path}\n{payload.model_dump_json()}".encode()).hexdigest()
+
+    def get(self, user_id: int, key: str) -> Optional[IdempotencyKey]:
+        return self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+        ).first()
+
+    def begin(self, user_id: int, key: str, request_hash: str) -> Optional[IdempotencyKey]:
+        """Reserve a key for a new request.
+
+        Returns None when the caller should execute the request, or the stored
+        record when the key was already used and has not expired yet.
+        """
+        ttl = timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        stmt = insert(IdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            request_hash=request_hash,
+            expires_at=func.now() + ttl,
+        )
+        # Expired keys are taken over in the same statement
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={
+                "request_hash": stmt.excluded.request_hash,
+                "status_code": None,
+                "response_body": None,
+                "created_at": func.now(),
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at <= func.now(),
+        ).returning(IdempotencyKey.key)
+
+        reserved = self.db.execute(stmt).first()
+        self.db.commit()
+        if reserved:
+            return None
+        return self.get(user_id=user_id, key=key)
+
+    def complete(self, user_id: int, key: str, status_code: int, response_body: bytes, commit: bool = True) -> None:
+        """Store the response of a request so retries can replay it.
+
+        Callers write with commit=False first and let this commit, so that the
+        write and its stored response are committed together.
+        """
+        self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+        ).update({"status_code": status_code, "response_body": response_body})
+        if commit:
+            self.db.commit()
+
+    def release(self, user_id: int, key: str) -> None:
+        """Drop a reservation whose request failed, so the client can retry it"""
+        self.db.rollback()
+        self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+        ).delete()
+        self.db.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired keys"""
+        result = self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.expires_at <= func.now()
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return result
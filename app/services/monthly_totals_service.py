@@ -0,0 +1,105 @@
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import BigInteger, Date, case, cast, event, func, inspect, select, type_coerce, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.monthly_total import MonthlyCategoryTotal, MonthlyLedger
+from app.models.transaction import Transaction, TransactionType
+from app.services.fx_service import amount_in_base_currency
+
+# Columns a monthly total depends on
+TOTAL_FIELDS = ("amount", "currency", "date", "type", "category_id", "user_id")
+
+# Session.info key holding the updated transactions whose new values still have to be added
+_PENDING = "monthly_totals_pending"
+
+def transaction_month():
+    """SQL expression for the first day of a transaction's month, in the session's timezone like the reports"""
+    return cast(func.date_trunc("month", Transaction.date), Date)
+
+def apply_monthly_totals(session: Session, transaction_ids: Iterable[int], sign: int) -> None:
+    """Add (sign=1) or subtract (sign=-1) the current rows of some transactions to their monthly totals.
+
+    Adding first stores each row's amount converted to the base currency like
+    the report queries do it, subtracting takes that stored amount back out:
+    rates imported in between cannot leave anything behind. The amounts are
+    read back from the table in grouped INSERT ... SELECT statements, so they
+    are bucketed like the reports too. Both the category totals and the users'
+    monthly ledgers are updated. Call it with -1 before changing or deleting
+    rows and with 1 after writing them.
+    """
+    ids = sorted(set(transaction_ids))
+    if not ids:
+        return
+    if sign > 0:
+        # Not an edit of the row: updated_at keeps its value
+        session.connection().execute(
+            update(Transaction).where(Transaction.id.in_(ids)).values(
+                base_amount=amount_in_base_currency(), updated_at=Transaction.updated_at
+            )
+        )
+    month = transaction_month()
+    # Summed as plain cents: a Money-typed operand would turn the sign into cents too
+    amount = type_coerce(Transaction.base_amount, BigInteger)
+    keys = (Transaction.user_id, month, Transaction.type, Transaction.category_id)
+    rows = select(
+        *keys, func.sum(amount) * sign, func.count(Transaction.id) * sign
+    ).where(Transaction.id.in_(ids)).group_by(*keys).order_by(*keys)
+    stmt = pg_insert(MonthlyCategoryTotal).from_select(
+        ["user_id", "month", "type", "category_id", "total", "count"], rows
+    )
+    session.connection().execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "month", "type", "category_id"],
+        set_={
+            "total": MonthlyCategoryTotal.total + stmt.excluded.total,
+            "count": MonthlyCategoryTotal.count + stmt.excluded.count,
+        },
+    ))
+
+    def total_of(type: TransactionType):
+        return func.coalesce(func.sum(case((Transaction.type == type, amount))), 0) * sign
+
+    keys = (Transaction.user_id, month)
+    rows = select(
+        *keys, total_of(TransactionType.INCOME), total_of(TransactionType.EXPENSE)
+    ).where(Transaction.id.in_(ids)).group_by(*keys).order_by(*keys)
+    stmt = pg_insert(MonthlyLedger).from_select(["user_id", "month", "income", "expenses"], rows)
+    session.connection().execute(stmt.on_conflict_do_update(
+        index_elements=["user_id", "month"],
+        set_={
+            "income": MonthlyLedger.income + stmt.excluded.income,
+            "expenses": MonthlyLedger.expenses + stmt.excluded.expenses,
+        },
+    ))
+
+def _identity(obj: Any) -> Optional[int]:
+    state = inspect(obj)
+    # New rows have no identity key until the flush completes, but their id is loaded
+    if "id" in state.dict:
+        return state.dict["id"]
+    return state.identity[0] if state.identity else None
+
+def _totals_changed(obj: Any) -> bool:
+    attrs = inspect(obj).attrs
+    return any(attrs[field].history.has_changes() for field in TOTAL_FIELDS)
+
+@event.listens_for(Session, "before_flush")
+def _subtract_old_rows(session: Session, flush_context: Any, instances: Any) -> None:
+    # The rows still hold their old values: take them out before they are overwritten
+    updated = [
+        _identity(obj) for obj in session.dirty
+        if isinstance(obj, Transaction) and _identity(obj) and _totals_changed(obj)
+    ]
+    deleted = [_identity(obj) for obj in session.deleted if isinstance(obj, Transaction) and _identity(obj)]
+    apply_monthly_totals(session, updated + deleted, -1)
+    session.info.setdefault(_PENDING, []).extend(updated)
+
+@event.listens_for(Session, "after_flush")
+def _add_new_rows(session: Session, flush_context: Any) -> None:
+    created = [_identity(obj) for obj in session.new if isinstance(obj, Transaction)]
+    apply_monthly_totals(session, created + session.info.pop(_PENDING, []), 1)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_rows(session: Session) -> None:
+    session.info.pop(_PENDING, None)
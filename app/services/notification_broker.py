@@ -0,0 +1,200 @@
+"""
+Push delivery of new notifications to connected clients.
+
+Once start_publishing() ran, every committed notification insert is published
+through the broker, which hands it to the push connections (see
+GET /notifications/stream) of its user in this process. With several worker processes, the "postgres" backend
+relays publications through LISTEN/NOTIFY so that every process sees them;
+the "local" backend only delivers within the publishing process.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy import select as sql_select
+
+from app.core.config import settings
+from app.db.base import engine
+from app.services.outbox_service import CREATED, Change, subscribe
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[int, Dict[str, Any]], None]
+# (recipient user id, notification payload)
+Message = Tuple[int, Dict[str, Any]]
+
+class Subscription:
+    """New notifications of one user for one push connection, read from its event loop"""
+
+    def __init__(self, broker: "NotificationBroker", user_id: int):
+        self.broker = broker
+        self.user_id = user_id
+        self._loop = asyncio.get_running_loop()
+        self._queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=settings.NOTIFICATION_STREAM_QUEUE_SIZE)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for the next notification, None after `timeout` seconds without one"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+    def _put(self, payload: Dict[str, Any]) -> None:
+        # Called from any thread: hand over to the subscription's event loop
+        try:
+            self._loop.call_soon_threadsafe(self._put_nowait, payload)
+        except RuntimeError:
+            # The loop is closed, the connection is going away
+            pass
+
+    def _put_nowait(self, payload: Dict[str, Any]) -> None:
+        try:
+            self._queue.put_nowait(payload)
+        except asyncio.QueueFull:
+            # The client can catch up from GET /notifications/ or the change feed
+            logger.warning("Dropped a notification push for user %s, the connection is not reading", self.user_id)
+
+class LocalBackend:
+    """Delivers publications in the publishing process only"""
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def listen(self) -> None:
+        pass
+
+    def publish(self, messages: List[Message]) -> None:
+        for user_id, payload in messages:
+            self._deliver(user_id, payload)
+
+class PostgresBackend:
+    """Relays publications to every process through Postgres LISTEN/NOTIFY"""
+
+    CHANNEL = "notifications"
+    # NOTIFY payloads must stay under 8000 bytes
+    MAX_PAYLOAD = 7000
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+        self._listener: Optional[threading.Thread] = None
+        self._listener_lock = threading.Lock()
+
+    def listen(self) -> None:
+        """Start relaying to this process, once it has push connections: publishers alone need no listener"""
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name="notification-listener", daemon=True)
+                self._listener.start()
+
+    def publish(self, messages: List[Message]) -> None:
+        encoded = []
+        for user_id, payload in messages:
+            message = json.dumps({"user_id": user_id, "payload": payload})
+            if len(message.encode()) > self.MAX_PAYLOAD:
+                # Too long to relay whole: clients fetch it by id
+                message = json.dumps({"user_id": user_id, "payload": {"id": payload["id"], "user_id": user_id}})
+            encoded.append(message)
+        # One round trip for the whole batch, delivered to the listeners on commit
+        with engine.connect() as connection:
+            connection.execute(sql_select(func.pg_notify(self.CHANNEL, func.unnest(encoded))))
+            connection.commit()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                self._listen_once()
+            except Exception:
+                logger.exception("Notification listener failed, reconnecting")
+                time.sleep(settings.NOTIFICATION_LISTENER_RETRY_SECONDS)
+
+    def _listen_once(self) -> None:
+        # A dedicated DBAPI connection, it stays in LISTEN for the life of the process
+        connection = engine.raw_connection()
+        dbapi_connection = connection.driver_connection
+        connection.detach()
+        try:
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.CHANNEL}")
+            while True:
+                select.select([dbapi_connection], [], [], 60)
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    message = json.loads(dbapi_connection.notifies.pop(0).payload)
+                    self._deliver(message["user_id"], message["payload"])
+        finally:
+            dbapi_connection.close()
+
+_BACKENDS = {"local": LocalBackend, "postgres": PostgresBackend}
+
+class NotificationBroker:
+    """In-process pub/sub of new notifications, keyed by recipient"""
+
+    def __init__(self, backend):
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.backend = backend
+        backend.start(self.deliver)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Subscribe to a user's new notifications, from the event loop that will read them"""
+        subscription = Subscription(self, user_id)
+        self.backend.listen()
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.user_id, None)
+
+    def publish(self, messages: List[Message]) -> None:
+        """Send notifications to their users' connections, in every process with the postgres backend"""
+        if messages:
+            self.backend.publish(messages)
+
+    def deliver(self, user_id: int, payload: Dict[str, Any]) -> None:
+        """Hand a notification to the user's connections in this process"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription._put(payload)
+
+_broker: Optional[NotificationBroker] = None
+_broker_lock = threading.Lock()
+
+def get_broker() -> NotificationBroker:
+    """The process-wide broker, with the NOTIFICATION_PUSH_BACKEND backend"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = NotificationBroker(_BACKENDS[settings.NOTIFICATION_PUSH_BACKEND]())
+        return _broker
+
+_publishing = False
+
+def _publish_created(changes: List[Change]) -> None:
+    get_broker().publish([(change.user_id, change.payload) for change in changes if change.op == CREATED])
+
+def start_publishing() -> None:
+    """Publish the notifications this process commits, whichever path inserted them.
+
+    Called once at startup by the processes that create notifications: the API
+    and the job runners.
+    """
+    global _publishing
+    with _broker_lock:
+        if not _publishing:
+            subscribe(_publish_created, entities=["notification"])
+            _publishing = True
@@ -1,13 +1,52 @@
-from typing import List, Optional, Dict, Any, Union
-from datetime import datetime
+from collections import Counter
+from typing import Iterable, List, Optional, Dict, Any, Tuple, Union
+from datetime import date, datetime
 
 from sqlalchemy.orm import Session
+from sqlalchemy import Float, and_, cast, delete, func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.config import settings
-from app.models.notification import Notification, NotificationType
-from app.models.transaction import Transaction, TransactionType
+from app.models.monthly_total import MonthlyLedger
+from app.models.notification import Notification, NotificationCounter, NotificationType
 from app.models.user import User
-from app.schemas.notification import NotificationUpdate
+from app.schemas.notification import NotificationUpdate, NOTIFICATION_FIELDS
+from app.services.outbox_service import OutboxService, CREATED, DELETED, UPDATED
+from app.services.unread_count_service import apply_unread_counts
+
+def budget_notification_row(user_id: int, percentage: float, critical: bool) -> Dict[str, Any]:
+    """Columns of a monthly budget warning or critical notification"""
+    if critical:
+        return {
+            "title": "Alerta Crítico de Orçamento",
+            "message": f"Crítico: Você já utilizou {percentage:.0%} do seu orçamento mensal!",
+            "type": NotificationType.BUDGET_CRITICAL,
+            "user_id": user_id,
+        }
+    return {
+        "title": "Alerta de Orçamento",
+        "message": f"Você já utilizou {percentage:.0%} do seu orçamento mensal.",
+        "type": NotificationType.BUDGET_WARNING,
+        "user_id": user_id,
+    }
+
+def category_budget_notification_row(
+    user_id: int, category_name: str, percentage: float, critical: bool
+) -> Dict[str, Any]:
+    """Columns of a category budget warning or critical notification"""
+    if critical:
+        return {
+            "title": "Alerta Crítico de Orçamento",
+            "message": f"Crítico: Você já utilizou {percentage:.0%} do orçamento de '{category_name}'!",
+            "type": NotificationType.BUDGET_CRITICAL,
+            "user_id": user_id,
+        }
+    return {
+        "title": "Alerta de Orçamento",
+        "message": f"Você já utilizou {percentage:.0%} do orçamento de '{category_name}'.",
+        "type": NotificationType.BUDGET_WARNING,
+        "user_id": user_id,
+    }
 
 class NotificationService:
     def __init__(self, db: Session):
@@ -26,6 +65,30 @@ class NotificationService:
         
         return query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
 
+    def get_unread_count(self, user_id: int) -> int:
+        """Get the number of unread notifications from the user's counter"""
+        unread = self.db.query(NotificationCounter.unread).filter(NotificationCounter.user_id == user_id).scalar()
+        if unread is None:
+            # No counter yet: count through the partial index of unread notifications
+            unread = self.db.query(func.count(Notification.id)).filter(
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            ).scalar()
+        return unread
+
+    def get_user_notification_rows(
+        self, user_id: int, skip: int = 0, limit: int = 100, unread_only: bool = False
+    ) -> List[Tuple]:
+        """Get a page of notifications as column tuples in response schema order"""
+        query = self.db.query(
+            *[getattr(Notification, field) for field in NOTIFICATION_FIELDS]
+        ).filter(Notification.user_id == user_id)
+
+        if unread_only:
+            query = query.filter(Notification.is_read == False)
+
+        return query.order_by(Notification.created_at.desc()).offset(skip).limit(limit).all()
+
     def create_manual_notification(self, user_id: int, title: str, message: str) -> Notification:
         """Create a manual notification"""
         notification = Notification(
@@ -39,158 +102,176 @@ class NotificationService:
         self.db.refresh(notification)
         return notification
         
+    def create_many(
+        self, user_ids: Iterable[int], title: str, message: str, type: NotificationType, commit: bool = True
+    ) -> List[Notification]:
+        """Send the same notification to many users with a single multi-row INSERT ... RETURNING.
+
+        Types listed in NOTIFICATION_DIGEST_TYPES are merged into the user's
+        unread notification with the same title of the current window, if any:
+        its count goes up and it takes the new message and time.
+        """
+        rows = [
+            {"title": title, "message": message, "type": type, "user_id": user_id}
+            for user_id in dict.fromkeys(user_ids)
+        ]
+        if not rows:
+            return []
+        if type.value not in settings.NOTIFICATION_DIGEST_TYPES:
+            return self.insert_rows(rows, commit=commit)
+
+        window = settings.NOTIFICATION_DIGEST_WINDOW_MINUTES * 60
+        stmt = pg_insert(Notification).values([
+            {**row, "digest_window": func.to_timestamp(func.floor(func.date_part("epoch", func.now()) / window) * window)}
+            for row in rows
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Notification.user_id, Notification.type, Notification.title, Notification.digest_window],
+            index_where=and_(Notification.digest_window != None, Notification.is_read == False),
+            set_={"count": Notification.count + 1, "message": stmt.excluded.message, "created_at": func.now()},
+        ).returning(Notification)
+        notifications = list(self.db.scalars(stmt, execution_options={"populate_existing": True}))
+        created = [notification for notification in notifications if notification.count == 1]
+        merged = [notification for notification in notifications if notification.count > 1]
+        OutboxService(self.db).record(Notification, CREATED, created)
+        OutboxService(self.db).record(Notification, UPDATED, merged)
+        apply_unread_counts(self.db, {notification.user_id: 1 for notification in created})
+        if commit:
+            self.db.commit()
+        return notifications
+
     def create_family_notification(self, family_head_id: int, title: str, message: str) -> List[Notification]:
         """Create a notification for all family members"""
         # Get all family members including head
-        family_members = self.db.query(User).filter(
-            (User.id == family_head_id) | (User.family_head_id == family_head_id)
+        member_ids = self.db.scalars(
+            select(User.id).where((User.id == family_head_id) | (User.family_head_id == family_head_id))
         ).all()
-        
-        notifications = []
-        for member in family_members:
-            notification = Notification(
-                title=title,
-                message=message,
-                type=NotificationType.MANUAL,
-                user_id=member.id,
-            )
-            self.db.add(notification)
-            notifications.append(notification)
-            
-        self.db.commit()
-        for notification in notifications:
-            self.db.refresh(notification)
-            
-        return notifications
+        return self.create_many(member_ids, title, message, NotificationType.MANUAL)
 
     def create_budget_warning_notification(self, user_id: int, percentage: float) -> Notification:
         """Create a budget warning notification"""
-        notification = Notification(
-            title="Alerta de Orçamento",
-            message=f"Você já utilizou {percentage:.0%} do seu orçamento mensal.",
-            type=NotificationType.BUDGET_WARNING,
-            user_id=user_id,
-        )
-        self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
-        return notification
+        return self._create(budget_notification_row(user_id, percentage, critical=False))
 
     def create_budget_critical_notification(self, user_id: int, percentage: float) -> Notification:
         """Create a budget critical notification"""
-        notification = Notification(
-            title="Alerta Crítico de Orçamento",
-            message=f"Crítico: Você já utilizou {percentage:.0%} do seu orçamento mensal!",
-            type=NotificationType.BUDGET_CRITICAL,
-            user_id=user_id,
-        )
+        return self._create(budget_notification_row(user_id, percentage, critical=True))
+
+    def insert_rows(self, rows: List[Dict[str, Any]], commit: bool = True) -> List[Notification]:
+        """Insert notifications given as column dicts with a single multi-row INSERT ... RETURNING"""
+        if not rows:
+            return []
+        notifications = list(self.db.scalars(insert(Notification).returning(Notification), rows))
+        OutboxService(self.db).record(Notification, CREATED, notifications)
+        apply_unread_counts(self.db, Counter(notification.user_id for notification in notifications))
+        if commit:
+            self.db.commit()
+        return notifications
+
+    def _create(self, row: Dict[str, Any]) -> Notification:
+        notification = Notification(**row)
         self.db.add(notification)
         self.db.commit()
         self.db.refresh(notification)
         return notification
 
-    def create_goal_notification(self, user_id: int, goal_id: int, goal_title: str) -> Notification:
-        """Create a notification for a new goal"""
-        notification = Notification(
+    def create_goal_notifications(
+        self, user_ids: Iterable[int], goal_id: int, goal_title: str, commit: bool = True
+    ) -> List[Notification]:
+        """Notify the participants of a new goal"""
+        return self.create_many(
+            user_ids,
             title="Nova Meta Adicionada",
             message=f"Você foi adicionado a uma nova meta: {goal_title}",
-            type=NotificationType.GOAL_CONTRIBUTION,
-            user_id=user_id,
+            type=NotificationType.GOAL_ADDED,
+            commit=commit,
         )
-        self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
-        return notification
 
-    def create_goal_achieved_notification(self, user_id: int, goal_id: int, goal_title: str) -> Notification:
-        """Create a notification for an achieved goal"""
-        notification = Notification(
+    def create_goal_achieved_notifications(self, user_ids: Iterable[int], goal_id: int, goal_title: str) -> List[Notification]:
+        """Notify the participants of an achieved goal"""
+        return self.create_many(
+            user_ids,
             title="Meta Alcançada! 🎉",
             message=f"Parabéns! A meta '{goal_title}' foi totalmente financiada.",
             type=NotificationType.GOAL_ACHIEVED,
-            user_id=user_id,
         )
-        self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
-        return notification
-        
-    def create_contribution_notification(self, user_id: int, contributor_name: str, goal_title: str, amount: float) -> Notification:
-        """Create a notification for a contribution to a goal"""
-        notification = Notification(
+
+    def create_contribution_notifications(
+        self, user_ids: Iterable[int], contributor_name: str, goal_title: str, amount: float
+    ) -> List[Notification]:
+        """Notify the participants of a goal about a contribution, merged per user into the window's digest"""
+        return self.create_many(
+            user_ids,
             title="Nova Contribuição para Meta",
             message=f"{contributor_name} contribuiu R${amount:.2f} para a meta '{goal_title}'.",
             type=NotificationType.GOAL_CONTRIBUTION,
-            user_id=user_id,
         )
-        self.db.add(notification)
-        self.db.commit()
-        self.db.refresh(notification)
-        return notification
 
     def check_budget_thresholds(self, user_id: int) -> None:
         """Check if user has exceeded budget thresholds and send notifications"""
-        # Get current month's data
-        now = datetime.now()
-        year, month = now.year, now.month
-        
-        # Calculate month start and end
-        month_start = datetime(year, month, 1)
-        if month == 12:
-            month_end = datetime(year + 1, 1, 1)
-        else:
-            month_end = datetime(year, month + 1, 1)
-        
-        # Get total income for the month
-        total_income = self.db.query(Transaction).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.INCOME,
-            Transaction.date >= month_start,
-            Transaction.date < month_end
-        ).with_entities(Transaction.amount).all()
-        total_income = sum(amount for amount, in total_income) if total_income else 0
-        
-        # Get total expenses for the month
-        total_expenses = self.db.query(Transaction).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= month_start,
-            Transaction.date < month_end
-        ).with_entities(Transaction.amount).all()
-        total_expenses = sum(amount for amount, in total_expenses) if total_expenses else 0
-        
+        month = datetime.now().date().replace(day=1)
+        # The ledger row holds the month's running totals and the alerts already sent
+        ledger = self.db.query(MonthlyLedger).filter(
+            MonthlyLedger.user_id == user_id,
+            MonthlyLedger.month == month,
+        ).first()
+
         # If no income, we can't calculate budget percentage
-        if total_income == 0:
+        if not ledger or ledger.income <= 0:
             return
-        
+
         # Calculate percentage of budget used
-        budget_percentage = total_expenses / total_income
-        
-        # Check thresholds and send notifications
+        budget_percentage = ledger.expenses / ledger.income
+
+        # Check thresholds and send notifications, each one at most once a month
         if budget_percentage >= settings.BUDGET_CRITICAL_THRESHOLD:
-            # Check if we already sent a critical notification this month
-            existing = self.db.query(Notification).filter(
-                Notification.user_id == user_id,
-                Notification.type == NotificationType.BUDGET_CRITICAL,
-                Notification.created_at >= month_start,
-                Notification.created_at < month_end
-            ).first()
-            
-            if not existing:
+            if self._claim_budget_alert(user_id, month, "critical_sent"):
                 self.create_budget_critical_notification(user_id, budget_percentage)
-        
+
         elif budget_percentage >= settings.BUDGET_WARNING_THRESHOLD:
-            # Check if we already sent a warning notification this month
-            existing = self.db.query(Notification).filter(
-                Notification.user_id == user_id,
-                Notification.type == NotificationType.BUDGET_WARNING,
-                Notification.created_at >= month_start,
-                Notification.created_at < month_end
-            ).first()
-            
-            if not existing:
+            if self._claim_budget_alert(user_id, month, "warning_sent"):
                 self.create_budget_warning_notification(user_id, budget_percentage)
 
+    def check_all_budget_thresholds(self, month: date) -> int:
+        """Send the month's budget notifications of every user, returning how many were sent.
+
+        Each threshold level is one UPDATE ... RETURNING over the month's ledger
+        rows, which flips the sent flag of the users past the threshold and
+        skips those already notified, then one bulk insert of the notifications.
+        """
+        percentage = cast(MonthlyLedger.expenses, Float) / cast(MonthlyLedger.income, Float)
+        levels = (
+            # (critical, flag, range of the level)
+            (True, "critical_sent", percentage >= settings.BUDGET_CRITICAL_THRESHOLD),
+            (False, "warning_sent", and_(
+                percentage >= settings.BUDGET_WARNING_THRESHOLD, percentage < settings.BUDGET_CRITICAL_THRESHOLD
+            )),
+        )
+        rows = []
+        for critical, flag, in_level in levels:
+            claimed = self.db.execute(
+                update(MonthlyLedger).where(
+                    MonthlyLedger.month == month,
+                    MonthlyLedger.income > 0,
+                    in_level,
+                    getattr(MonthlyLedger, flag) == False,
+                ).values({flag: True}).returning(MonthlyLedger.user_id, percentage)
+            ).all()
+            rows.extend(budget_notification_row(user_id, user_percentage, critical) for user_id, user_percentage in claimed)
+        self.insert_rows(rows, commit=False)
+        self.db.commit()
+        return len(rows)
+
+    def _claim_budget_alert(self, user_id: int, month: date, flag: str) -> bool:
+        """Set a sent flag of the user's ledger, False when another request already set it"""
+        claimed = self.db.execute(
+            update(MonthlyLedger).where(
+                MonthlyLedger.user_id == user_id,
+                MonthlyLedger.month == month,
+                getattr(MonthlyLedger, flag) == False,
+            ).values({flag: True}).returning(MonthlyLedger.user_id)
+        ).first()
+        return claimed is not None
+
     def update(self, db_obj: Notification, obj_in: Union[NotificationUpdate, Dict[str, Any]]) -> Notification:
         if isinstance(obj_in, dict):
             update_data = obj_in
@@ -200,6 +281,9 @@ class NotificationService:
         for field in update_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
+        if update_data.get("is_read") == False:
+            # Unread again: it leaves its digest window rather than competing with the current row
+            db_obj.digest_window = None
         
         self.db.add(db_obj)
         self.db.commit()
@@ -214,10 +298,40 @@ class NotificationService:
         
     def mark_all_as_read(self, user_id: int) -> int:
         """Mark all notifications as read for a user"""
-        result = self.db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).update({"is_read": True})
-        
+        notification_ids = self.db.scalars(
+            update(Notification).where(
+                Notification.user_id == user_id,
+                Notification.is_read == False
+            ).values(is_read=True).returning(Notification.id)
+        ).all()
+        OutboxService(self.db).record(
+            Notification, UPDATED,
+            [{"id": id, "user_id": user_id, "is_read": True} for id in notification_ids]
+        )
+        apply_unread_counts(self.db, {user_id: -len(notification_ids)})
+
         self.db.commit()
-        return result
+        return len(notification_ids)
+
+    def purge_read(self, before: datetime, batch_size: int = 5000) -> int:
+        """Delete read notifications created before a point in time, committing batch by batch.
+
+        Batches lock their rows with SKIP LOCKED, so the purge does not wait on
+        (or block) users marking notifications as read.
+        """
+        deleted = 0
+        while True:
+            batch = select(Notification.id).where(
+                Notification.is_read == True,
+                Notification.created_at < before,
+            ).limit(batch_size).with_for_update(skip_locked=True).scalar_subquery()
+            rows = self.db.execute(
+                delete(Notification).where(Notification.id.in_(batch)).returning(Notification.id, Notification.user_id)
+            ).all()
+            OutboxService(self.db).record(
+                Notification, DELETED, [{"id": id, "user_id": user_id} for id, user_id in rows]
+            )
+            self.db.commit()
+            deleted += len(rows)
+            if len(rows) < batch_size:
+                return deleted
@@ -0,0 +1,221 @@
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Type
+import logging
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import BigInteger, Text, cast, event, func, insert, inspect, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.data_version import DataVersion
+
+from app.models.goal import Goal, GoalContribution
+from app.models.notification import Notification
+from app.models.outbox import OutboxEvent
+from app.models.transaction import Transaction
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+# Tracked models: entity name and the column holding the owning user
+TRACKED: Dict[Type, Tuple[str, str]] = {
+    Transaction: ("transaction", "user_id"),
+    Goal: ("goal", "creator_id"),
+    GoalContribution: ("goal_contribution", "user_id"),
+    Notification: ("notification", "user_id"),
+}
+
+# Session.info key holding the events flushed in the current transaction
+_PENDING = "outbox_pending"
+
+class Change(NamedTuple):
+    id: int
+    entity: str
+    entity_id: int
+    op: str
+    user_id: int
+    payload: Optional[Dict[str, Any]]
+
+Subscriber = Callable[[List[Change]], None]
+
+_subscribers: List[Tuple[Subscriber, Optional[frozenset]]] = []
+
+def subscribe(callback: Subscriber, entities: Optional[Iterable[str]] = None) -> Callable[[], None]:
+    """Call `callback` with the changes of every committed transaction, in this process.
+
+    Callbacks run synchronously right after the commit, so they should be
+    cheap (update a cache, enqueue work); exceptions are logged and swallowed.
+    Returns a function that removes the subscription.
+    """
+    entry = (callback, frozenset(entities) if entities else None)
+    _subscribers.append(entry)
+    return lambda: _subscribers.remove(entry)
+
+def _snapshot(obj: Any) -> Dict[str, Any]:
+    """Column values of an ORM object known at flush time, deferred columns excluded"""
+    state = inspect(obj)
+    loaded = state.dict
+    return jsonable_encoder({
+        prop.key: loaded[prop.key]
+        for prop in state.mapper.column_attrs
+        if not prop.deferred and prop.key in loaded
+    })
+
+def _event_rows(model: Type, op: str, items: Iterable[Any]) -> List[Dict[str, Any]]:
+    entity, owner = TRACKED[model]
+    rows = []
+    for item in items:
+        if isinstance(item, dict):
+            payload = jsonable_encoder(item)
+            entity_id, user_id = payload["id"], payload[owner]
+        else:
+            payload = _snapshot(item)
+            # New rows have no identity key until the flush completes, expired ones no loaded id
+            entity_id = payload["id"] if "id" in payload else inspect(item).identity[0]
+            user_id = payload[owner] if owner in payload else getattr(item, owner)
+        rows.append({
+            "entity": entity,
+            "entity_id": entity_id,
+            "op": op,
+            "user_id": user_id,
+            "payload": payload,
+        })
+    return rows
+
+def _write(session: Session, rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    # Core insert on the session's connection: same transaction, and safe inside a flush
+    result = session.connection().execute(
+        insert(OutboxEvent.__table__).returning(OutboxEvent.id, sort_by_parameter_order=True), rows
+    )
+    pending = session.info.setdefault(_PENDING, [])
+    for (event_id,), row in zip(result.all(), rows):
+        pending.append(Change(event_id, row["entity"], row["entity_id"], row["op"], row["user_id"], row["payload"]))
+
+    bump_data_versions(session, {(row["user_id"], row["entity"]) for row in rows})
+
+def bump_data_versions(session: Session, keys: Iterable[Tuple[int, str]]) -> None:
+    """Bump the (user_id, entity) data versions behind ETags, in the session's transaction"""
+    # Sorted so that concurrent writers lock the counters in the same order
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    stmt = pg_insert(DataVersion.__table__).values(
+        [{"user_id": user_id, "entity": entity, "version": 1} for user_id, entity in keys]
+    )
+    session.connection().execute(stmt.on_conflict_do_update(
+        index_elements=[DataVersion.user_id, DataVersion.entity],
+        set_={"version": DataVersion.__table__.c.version + 1},
+    ))
+
+@event.listens_for(Session, "after_flush")
+def _record_flushed_changes(session: Session, flush_context: Any) -> None:
+    rows = []
+    for op, objects in (
+        (CREATED, session.new),
+        (UPDATED, [obj for obj in session.dirty if session.is_modified(obj)]),
+        (DELETED, session.deleted),
+    ):
+        by_model: Dict[Type, List[Any]] = {}
+        for obj in objects:
+            if type(obj) in TRACKED:
+                by_model.setdefault(type(obj), []).append(obj)
+        for model, items in by_model.items():
+            rows.extend(_event_rows(model, op, items))
+    _write(session, rows)
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_committed_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING, None)
+    if not changes:
+        return
+    for callback, entities in list(_subscribers):
+        selected = changes if entities is None else [change for change in changes if change.entity in entities]
+        if not selected:
+            continue
+        try:
+            callback(selected)
+        except Exception:
+            logger.exception("Outbox subscriber %r failed", callback)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_changes(session: Session) -> None:
+    session.info.pop(_PENDING, None)
+
+def visible_horizon():
+    """SQL expression for the oldest transaction id still in progress.
+
+    Events written by older transactions are all committed (or gone), so
+    reading only below it keeps (txid, id) cursors gap free.
+    """
+    # xid8 has no cast to bigint, go through text like the txid column default does
+    return cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+
+def encode_cursor(txid: int, event_id: int) -> str:
+    return f"{txid}-{event_id}"
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """Parse a change feed cursor, raising ValueError when it is malformed"""
+    if not cursor:
+        return (0, 0)
+    txid, _, event_id = cursor.partition("-")
+    return (int(txid), int(event_id))
+
+class OutboxService:
+    """Outbox writes for bulk statements and reads of the change feed.
+
+    Changes made through the unit of work (add, attribute changes, delete) of
+    tracked models are recorded automatically on flush; bulk INSERT/UPDATE
+    statements bypass it and must call `record` themselves.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def record(self, model: Type, op: str, items: Iterable[Any]) -> None:
+        """Record changes of ORM objects or column dicts (with id and owner) in the current transaction"""
+        _write(self.db, _event_rows(model, op, items))
+
+    def record_for_users(self, model: Type, op: str, item: Any, user_ids: Iterable[int]) -> None:
+        """Record a change of one row for users other than its owner, e.g. participants removed from a goal"""
+        row = _event_rows(model, op, [item])[0]
+        _write(self.db, [{**row, "user_id": user_id} for user_id in sorted(set(user_ids))])
+
+    def get_changes(
+        self,
+        user_ids: List[int],
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        entities: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Get the changes after a cursor for the given users, oldest first.
+
+        Only transactions older than every transaction still in progress are
+        returned, so a cursor never skips a change that commits later.
+        """
+        txid, event_id = decode_cursor(cursor)
+        query = self.db.query(OutboxEvent).filter(
+            OutboxEvent.user_id.in_(user_ids),
+            tuple_(OutboxEvent.txid, OutboxEvent.id) > tuple_(txid, event_id),
+            OutboxEvent.txid < visible_horizon(),
+        )
+        if entities:
+            query = query.filter(OutboxEvent.entity.in_(entities))
+        events = query.order_by(OutboxEvent.txid, OutboxEvent.id).limit(limit + 1).all()
+
+        has_more = len(events) > limit
+        events = events[:limit]
+        if events:
+            cursor = encode_cursor(events[-1].txid, events[-1].id)
+        return {"events": events, "cursor": cursor or encode_cursor(txid, event_id), "has_more": has_more}
+
+    def purge(self, before: Any) -> int:
+        """Delete events created before a point in time"""
+        deleted = self.db.query(OutboxEvent).filter(
+            OutboxEvent.created_at < before
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
@@ -0,0 +1,160 @@
+from typing import List, Optional, Dict, Any, Union
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.models.recurring_transaction import RecurringTransaction, RecurrenceFrequency
+from app.models.transaction import TransactionType
+from app.schemas.recurring_transaction import RecurringTransactionCreate, RecurringTransactionUpdate
+from app.services.transaction_service import TransactionService
+from app.services.budget_service import enqueue_budget_check
+from app.utils.date_utils import add_months
+
+# Fields that decide when a rule runs
+SCHEDULE_FIELDS = ("frequency", "interval", "day_of_month", "start_date")
+
+class RecurringTransactionService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(self, id: int) -> Optional[RecurringTransaction]:
+        return self.db.query(RecurringTransaction).filter(RecurringTransaction.id == id).first()
+
+    def get_user_rules(self, user_id: int, skip: int = 0, limit: int = 100) -> List[RecurringTransaction]:
+        """Get recurring transaction rules of a user"""
+        return self.db.query(RecurringTransaction).filter(
+            RecurringTransaction.user_id == user_id
+        ).order_by(RecurringTransaction.next_run_at).offset(skip).limit(limit).all()
+
+    def create(self, obj_in: RecurringTransactionCreate, user_id: int) -> RecurringTransaction:
+        db_obj = RecurringTransaction(
+            amount=obj_in.amount,
+            currency=obj_in.currency,
+            description=obj_in.description,
+            type=obj_in.type,
+            category=obj_in.category,
+            frequency=obj_in.frequency,
+            interval=obj_in.interval,
+            day_of_month=obj_in.day_of_month,
+            start_date=obj_in.start_date,
+            end_date=obj_in.end_date,
+            next_run_at=self._first_occurrence(obj_in),
+            is_active=True,
+            user_id=user_id,
+        )
+        self.db.add(db_obj)
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def update(
+        self, db_obj: RecurringTransaction, obj_in: Union[RecurringTransactionUpdate, Dict[str, Any]]
+    ) -> RecurringTransaction:
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+
+        reschedule = any(field in update_data for field in SCHEDULE_FIELDS)
+        if reschedule:
+            never_ran = db_obj.next_run_at == self._first_occurrence(db_obj)
+            covered_until = db_obj.next_run_at
+
+        for field in update_data:
+            if field in update_data:
+                setattr(db_obj, field, update_data[field])
+
+        if reschedule:
+            # Read the new schedule back so that every date carries the same timezone
+            self.db.flush()
+            self.db.refresh(db_obj)
+            next_run_at = self._first_occurrence(db_obj)
+            if not never_ran:
+                # Occurrences before the old next run were already posted
+                while next_run_at < covered_until:
+                    next_run_at = self.next_occurrence(db_obj, next_run_at)
+            db_obj.next_run_at = next_run_at
+
+        self.db.add(db_obj)
+        self.db.commit()
+        self.db.refresh(db_obj)
+        return db_obj
+
+    def remove(self, id: int) -> RecurringTransaction:
+        obj = self.db.query(RecurringTransaction).get(id)
+        self.db.delete(obj)
+        self.db.commit()
+        return obj
+
+    @staticmethod
+    def _first_occurrence(rule: Union[RecurringTransaction, RecurringTransactionCreate]) -> datetime:
+        """Get the first run of a rule, honouring its anchor day"""
+        if rule.frequency in (RecurrenceFrequency.MONTHLY, RecurrenceFrequency.YEARLY) and rule.day_of_month:
+            first = add_months(rule.start_date, 0, rule.day_of_month)
+            if first < rule.start_date:
+                # Past the anchor day: the next month, or the same month next year
+                months = 1 if rule.frequency == RecurrenceFrequency.MONTHLY else 12
+                first = add_months(rule.start_date, months, rule.day_of_month)
+            return first
+        return rule.start_date
+
+    @staticmethod
+    def next_occurrence(rule: RecurringTransaction, current: datetime) -> datetime:
+        """Get the run following `current` for a rule"""
+        if rule.frequency == RecurrenceFrequency.DAILY:
+            return current + timedelta(days=rule.interval)
+        if rule.frequency == RecurrenceFrequency.WEEKLY:
+            return current + timedelta(weeks=rule.interval)
+        # Months are stepped from the anchor day so that e.g. the 31st does not drift to the 28th
+        months = rule.interval if rule.frequency == RecurrenceFrequency.MONTHLY else 12 * rule.interval
+        return add_months(current, months, rule.day_of_month or rule.start_date.day)
+
+    def materialize_due(self, now: Optional[datetime] = None, batch_size: int = 500) -> int:
+        """Create the transactions of all rules that are due, for all users.
+
+        Due rules are read through the next-run index in batches; each batch is
+        materialized with one multi-row insert and committed together with the
+        advanced next_run_at values. Budget checks are queued once per affected
+        user. Returns the number of transactions created.
+        """
+        now = now or datetime.now(timezone.utc)
+        transaction_service = TransactionService(self.db)
+        created = 0
+
+        while True:
+            # Concurrent schedulers skip each other's rules instead of double-posting them
+            rules = self.db.query(RecurringTransaction).filter(
+                RecurringTransaction.is_active == True,
+                RecurringTransaction.next_run_at <= now
+            ).order_by(RecurringTransaction.next_run_at).limit(batch_size).with_for_update(skip_locked=True).all()
+            if not rules:
+                break
+
+            rows = []
+            for rule in rules:
+                run_at = rule.next_run_at
+                # Catch up on every occurrence missed since the last tick
+                while run_at <= now and (rule.end_date is None or run_at <= rule.end_date):
+                    rows.append({
+                        "amount": rule.amount,
+                        "currency": rule.currency,
+                        "description": rule.description,
+                        "type": rule.type,
+                        "category": rule.category,
+                        "date": run_at,
+                        "user_id": rule.user_id,
+                    })
+                    run_at = self.next_occurrence(rule, run_at)
+                rule.next_run_at = run_at
+                if rule.end_date is not None and run_at > rule.end_date:
+                    rule.is_active = False
+
+            transaction_service.create_many(rows, commit=False)
+            self.db.commit()
+            created += len(rows)
+
+            # Budget evaluations run in the background, coalesced per user across batches
+            for user_id in {row["user_id"] for row in rows if row["type"] == TransactionType.EXPENSE}:
+                enqueue_budget_check(user_id)
+
+        return created
@@ -1,18 +1,119 @@
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 import calendar
 
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, extract, desc
 
+from app.core.config import settings
+from app.models.category import CategoryClosure
 from app.models.transaction import Transaction, TransactionType, TransactionCategory
 from app.models.user import User
 from app.models.goal import Goal, GoalContribution
 from app.schemas.report import Report, ReportPeriod, TransactionSummary, UserSummary, PeriodSummary
+from app.services.archive_service import ArchiveService, month_start, wall_clock
+from app.services.category_service import CategoryService
+from app.services.fx_service import FxService, amount_in_base_currency
+from app.utils.date_utils import add_months
 
 class ReportService:
     def __init__(self, db: Session):
         self.db = db
+        self.archive_service = ArchiveService(db)
+        self.category_service = CategoryService(db)
+        self._ancestor_ids: Dict[int, List[int]] = {}
+        self._archived_months: Dict[Tuple[int, ...], set] = {}
+        self._archived_rows: Dict[Tuple[Tuple[int, ...], date], List[Dict[str, Any]]] = {}
+
+    def _totals(
+        self, user_ids: List[int], start_date: datetime, end_date: datetime, rollup: bool = False
+    ) -> Dict[Tuple[TransactionType, Any], float]:
+        """Totals by (type, category) in the base currency of the transactions dated in
+        [start_date, end_date], archive included.
+
+        With `rollup` they are by (type, category tree node id) instead, each node
+        including its whole subtree: one join on the closure table and a group-by.
+        """
+        totals = defaultdict(float)
+        key_column = CategoryClosure.ancestor_id if rollup else Transaction.category
+        live = self.db.query(Transaction.type, key_column, func.sum(amount_in_base_currency()))
+        if rollup:
+            live = live.join(CategoryClosure, CategoryClosure.descendant_id == Transaction.category_id)
+        live = live.filter(
+            Transaction.user_id.in_(user_ids),
+            Transaction.date >= start_date,
+            Transaction.date <= end_date
+        ).group_by(Transaction.type, key_column).all()
+        for type, category, amount in live:
+            totals[(type, category)] += amount
+
+        key = tuple(sorted(user_ids))
+        if key not in self._archived_months:
+            self._archived_months[key] = self.archive_service.get_archived_months(user_ids)
+        if not self._archived_months[key]:
+            return totals
+
+        # Whole archived months come from their aggregates, partly covered ones from their rows
+        full_months = []
+        month = month_start(start_date)
+        while month <= end_date:
+            if month.date() in self._archived_months[key]:
+                month_end = add_months(month, 1) - timedelta(microseconds=1)
+                if start_date <= month and month_end <= end_date:
+                    full_months.append(month.date())
+                else:
+                    rows = [
+                        row for row in self._get_archived_rows(key, month.date())
+                        if start_date <= wall_clock(row["date"]) <= end_date
+                    ]
+                    amounts = self._base_amounts(rows)
+                    if rollup:
+                        for row, amount in zip(rows, amounts):
+                            for ancestor_id in self._get_ancestor_ids(rows, row):
+                                totals[(row["type"], ancestor_id)] += amount
+                    else:
+                        for row, amount in zip(rows, amounts):
+                            totals[(row["type"], row["category"])] += amount
+            month = add_months(month, 1)
+        if full_months:
+            archived = self.archive_service.get_monthly_totals(user_ids, full_months, rollup=rollup)
+            for type_category, amount in archived.items():
+                totals[type_category] += amount
+        return totals
+
+    def _get_ancestor_ids(self, rows: List[Dict[str, Any]], row: Dict[str, Any]) -> List[int]:
+        """Category tree path of one of the archived `rows`, loading the paths of all of them at once"""
+        root_ids = self.category_service.get_root_ids()
+        # Rows archived before the tree existed sit at its root
+        category_id = row.get("category_id") or root_ids[row["category"]]
+        if category_id not in self._ancestor_ids:
+            missing = {other.get("category_id") or root_ids[other["category"]] for other in rows}
+            self._ancestor_ids.update({id: [] for id in missing})
+            self._ancestor_ids.update(self.category_service.get_ancestor_ids(missing))
+        # Deleted categories resolve to the parent that took over their totals, those deleted
+        # before redirects were recorded fall back to their root
+        return self._ancestor_ids[category_id] or [root_ids[row["category"]]]
+
+    def _get_archived_rows(self, user_ids: Tuple[int, ...], month: date) -> List[Dict[str, Any]]:
+        if (user_ids, month) not in self._archived_rows:
+            self._archived_rows[(user_ids, month)] = self.archive_service.get_month_rows(user_ids, month)
+        return self._archived_rows[(user_ids, month)]
+
+    def _base_amounts(self, rows: List[Dict[str, Any]]) -> List[float]:
+        """Amounts of archived rows in the base currency, converted in one pass"""
+        # Rows archived before currencies existed are in the base currency
+        return FxService(self.db).get_table().convert_many(
+            [row["amount"] for row in rows],
+            [row.get("currency", settings.BASE_CURRENCY) for row in rows],
+            [wall_clock(row["date"]) for row in rows],
+        )
+
+    def _income_and_expenses(self, user_ids: List[int], start_date: datetime, end_date: datetime) -> Tuple[float, float]:
+        totals = self._totals(user_ids, start_date, end_date)
+        income = sum(amount for (type, _), amount in totals.items() if type == TransactionType.INCOME)
+        expenses = sum(amount for (type, _), amount in totals.items() if type == TransactionType.EXPENSE)
+        return income, expenses
 
     def generate_report(
         self,
@@ -77,35 +178,16 @@ class ReportService:
         self, start_date: datetime, end_date: datetime, user_ids: List[int]
     ) -> TransactionSummary:
         """Calculate transaction summary for given users and date range"""
-        # Get total income
-        total_income = self.db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id.in_(user_ids),
-            Transaction.type == TransactionType.INCOME,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).scalar() or 0.0
-        
-        # Get total expenses
-        total_expenses = self.db.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id.in_(user_ids),
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).scalar() or 0.0
+        # One grouped query gives income, expenses and the expense categories
+        totals = self._totals(user_ids, start_date, end_date)
+        total_income = sum(amount for (type, _), amount in totals.items() if type == TransactionType.INCOME)
+        total_expenses = sum(amount for (type, _), amount in totals.items() if type == TransactionType.EXPENSE)
         
         # Get expenses by category
         categories = {}
-        category_expenses = self.db.query(
-            Transaction.category, func.sum(Transaction.amount)
-        ).filter(
-            Transaction.user_id.in_(user_ids),
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).group_by(Transaction.category).all()
-        
-        for category, amount in category_expenses:
-            categories[category.value] = amount
+        for (type, category), amount in totals.items():
+            if type == TransactionType.EXPENSE:
+                categories[category.value] = amount
         
         return TransactionSummary(
             total_income=total_income,
@@ -127,19 +209,7 @@ class ReportService:
                 start_datetime = datetime.combine(current_date, datetime.min.time())
                 end_datetime = datetime.combine(current_date, datetime.max.time())
                 
-                income = self.db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id.in_(user_ids),
-                    Transaction.type == TransactionType.INCOME,
-                    Transaction.date >= start_datetime,
-                    Transaction.date <= end_datetime
-                ).scalar() or 0.0
-                
-                expenses = self.db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id.in_(user_ids),
-                    Transaction.type == TransactionType.EXPENSE,
-                    Transaction.date >= start_datetime,
-                    Transaction.date <= end_datetime
-                ).scalar() or 0.0
+                income, expenses = self._income_and_expenses(user_ids, start_datetime, end_datetime)
                 
                 period_summaries.append(
                     PeriodSummary(
@@ -169,19 +239,7 @@ class ReportService:
                 start_datetime = datetime.combine(week_start, datetime.min.time())
                 end_datetime = datetime.combine(week_end, datetime.max.time())
                 
-                income = self.db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id.in_(user_ids),
-                    Transaction.type == TransactionType.INCOME,
-                    Transaction.date >= start_datetime,
-                    Transaction.date <= end_datetime
-                ).scalar() or 0.0
-                
-                expenses = self.db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id.in_(user_ids),
-                    Transaction.type == TransactionType.EXPENSE,
-                    Transaction.date >= start_datetime,
-                    Transaction.date <= end_datetime
-                ).scalar() or 0.0
+                income, expenses = self._income_and_expenses(user_ids, start_datetime, end_datetime)
                 
                 period_summaries.append(
                     PeriodSummary(
@@ -217,19 +275,7 @@ class ReportService:
                 start_datetime = datetime.combine(month_start, datetime.min.time())
                 end_datetime = datetime.combine(month_end, datetime.max.time())
                 
-                income = self.db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id.in_(user_ids),
-                    Transaction.type == TransactionType.INCOME,
-                    Transaction.date >= start_datetime,
-                    Transaction.date <= end_datetime
-                ).scalar() or 0.0
-                
-                expenses = self.db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id.in_(user_ids),
-                    Transaction.type == TransactionType.EXPENSE,
-                    Transaction.date >= start_datetime,
-                    Transaction.date <= end_datetime
-                ).scalar() or 0.0
+                income, expenses = self._income_and_expenses(user_ids, start_datetime, end_datetime)
                 
                 period_summaries.append(
                     PeriodSummary(
@@ -265,19 +311,7 @@ class ReportService:
                 start_datetime = datetime.combine(year_start, datetime.min.time())
                 end_datetime = datetime.combine(year_end, datetime.max.time())
                 
-                income = self.db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id.in_(user_ids),
-                    Transaction.type == TransactionType.INCOME,
-                    Transaction.date >= start_datetime,
-                    Transaction.date <= end_datetime
-                ).scalar() or 0.0
-                
-                expenses = self.db.query(func.sum(Transaction.amount)).filter(
-                    Transaction.user_id.in_(user_ids),
-                    Transaction.type == TransactionType.EXPENSE,
-                    Transaction.date >= start_datetime,
-                    Transaction.date <= end_datetime
-                ).scalar() or 0.0
+                income, expenses = self._income_and_expenses(user_ids, start_datetime, end_datetime)
                 
                 period_summaries.append(
                     PeriodSummary(
@@ -298,61 +332,93 @@ class ReportService:
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date, datetime.max.time())
         
-        # Get expenses by category
-        category_expenses = self.db.query(
-            Transaction.category, func.sum(Transaction.amount)
-        ).filter(
-            Transaction.user_id.in_(user_ids),
-            Transaction.type == TransactionType.EXPENSE,
-            Transaction.date >= start_datetime,
-            Transaction.date <= end_datetime
-        ).group_by(Transaction.category).all()
-        
-        # Get income by category
-        category_income = self.db.query(
-            Transaction.category, func.sum(Transaction.amount)
-        ).filter(
-            Transaction.user_id.in_(user_ids),
-            Transaction.type == TransactionType.INCOME,
-            Transaction.date >= start_datetime,
-            Transaction.date <= end_datetime
-        ).group_by(Transaction.category).all()
-        
         result = {
             "expenses": {},
             "income": {}
         }
         
-        for category, amount in category_expenses:
-            result["expenses"][category.value] = amount
-            
-        for category, amount in category_income:
-            result["income"][category.value] = amount
+        # Expenses and income by category
+        for (type, category), amount in self._totals(user_ids, start_datetime, end_datetime).items():
+            key = "expenses" if type == TransactionType.EXPENSE else "income"
+            result[key][category.value] = amount
             
         return result
         
+    def get_category_tree_report(
+        self, family_head_id: int, user_ids: List[int], start_date: date, end_date: date
+    ) -> List[Dict[str, Any]]:
+        """Get income and expenses of every category of the family, subcategories rolled up"""
+        start_datetime = datetime.combine(start_date, datetime.min.time())
+        end_datetime = datetime.combine(end_date, datetime.max.time())
+        totals = self._totals(user_ids, start_datetime, end_datetime, rollup=True)
+        return [
+            {
+                "id": category.id,
+                "name": category.name,
+                "parent_id": category.parent_id,
+                "expenses": totals.get((TransactionType.EXPENSE, category.id), 0.0),
+                "income": totals.get((TransactionType.INCOME, category.id), 0.0),
+            }
+            for category in self.category_service.get_family_categories(family_head_id)
+        ]
+
     def get_top_expenses(self, user_ids: List[int], start_date: date, end_date: date, limit: int = 5) -> List[Dict[str, Any]]:
         """Get top expenses in the given period"""
         start_datetime = datetime.combine(start_date, datetime.min.time())
         end_datetime = datetime.combine(end_date, datetime.max.time())
         
-        top_expenses = self.db.query(Transaction).filter(
+        # Ranked by their value in the base currency
+        base_amount = amount_in_base_currency().label("base_amount")
+        top_expenses = self.db.query(Transaction, base_amount).filter(
             Transaction.user_id.in_(user_ids),
             Transaction.type == TransactionType.EXPENSE,
             Transaction.date >= start_datetime,
             Transaction.date <= end_datetime
-        ).order_by(Transaction.amount.desc()).limit(limit).all()
+        ).order_by(base_amount.desc()).limit(limit).all()
         
-        result = []
-        for expense in top_expenses:
-            user = self.db.query(User).filter(User.id == expense.user_id).first()
-            result.append({
+        expenses = [
+            {
                 "id": expense.id,
                 "amount": expense.amount,
+                "currency": expense.currency,
+                "base_amount": amount,
                 "description": expense.description,
-                "category": expense.category.value,
+                "category": expense.category,
                 "date": expense.date,
                 "user_id": expense.user_id,
+            }
+            for expense, amount in top_expenses
+        ]
+
+        # Archived months in the range are read back through their rows
+        archived_months = self.archive_service.get_archived_months(user_ids)
+        month = month_start(start_datetime)
+        while archived_months and month <= end_datetime:
+            if month.date() in archived_months:
+                rows = [
+                    row for row in self._get_archived_rows(tuple(sorted(user_ids)), month.date())
+                    if row["type"] == TransactionType.EXPENSE and start_datetime <= wall_clock(row["date"]) <= end_datetime
+                ]
+                expenses.extend(
+                    {"currency": settings.BASE_CURRENCY, **row, "base_amount": amount}
+                    for row, amount in zip(rows, self._base_amounts(rows))
+                )
+            month = add_months(month, 1)
+        if archived_months:
+            expenses = sorted(expenses, key=lambda expense: expense["base_amount"], reverse=True)[:limit]
+
+        result = []
+        for expense in expenses:
+            user = self.db.query(User).filter(User.id == expense["user_id"]).first()
+            result.append({
+                "id": expense["id"],
+                "amount": expense["amount"],
+                "currency": expense["currency"],
+                "base_amount": expense["base_amount"],
+                "description": expense["description"],
+                "category": expense["category"].value,
+                "date": expense["date"],
+                "user_id": expense["user_id"],
                 "user_name": user.full_name if user else "Unknown"
             })
             
@@ -446,35 +512,15 @@ class ReportService:
             start_datetime = datetime.combine(month_start, datetime.min.time())
             end_datetime = datetime.combine(month_end, datetime.max.time())
             
-            # Get income
-            income = self.db.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == TransactionType.INCOME,
-                Transaction.date >= start_datetime,
-                Transaction.date <= end_datetime
-            ).scalar() or 0.0
-            
-            # Get expenses
-            expenses = self.db.query(func.sum(Transaction.amount)).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.date >= start_datetime,
-                Transaction.date <= end_datetime
-            ).scalar() or 0.0
+            # Get income, expenses and expenses by category
+            totals = self._totals([user_id], start_datetime, end_datetime)
+            income = sum(amount for (type, _), amount in totals.items() if type == TransactionType.INCOME)
+            expenses = sum(amount for (type, _), amount in totals.items() if type == TransactionType.EXPENSE)
             
-            # Get expenses by category
             category_expenses = {}
-            categories = self.db.query(
-                Transaction.category, func.sum(Transaction.amount)
-            ).filter(
-                Transaction.user_id == user_id,
-                Transaction.type == TransactionType.EXPENSE,
-                Transaction.date >= start_datetime,
-                Transaction.date <= end_datetime
-            ).group_by(Transaction.category).all()
-            
-            for category, amount in categories:
-                category_expenses[category.value] = amount
+            for (type, category), amount in totals.items():
+                if type == TransactionType.EXPENSE:
+                    category_expenses[category.value] = amount
             
             monthly_data.append({
                 "year": current_year,
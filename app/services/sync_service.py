@@ -0,0 +1,121 @@
+from typing import List, Optional, Dict, Any, Set
+
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, or_, select, tuple_
+
+from app.models.goal import goal_participants
+from app.models.notification import Notification
+from app.models.outbox import OutboxEvent
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.schemas.goal import GOAL_FIELDS
+from app.schemas.notification import NOTIFICATION_FIELDS
+from app.schemas.transaction import TRANSACTION_FIELDS
+from app.services.goal_service import GoalService
+from app.services.outbox_service import decode_cursor, encode_cursor, visible_horizon
+
+class SyncService:
+    """Delta sync for offline clients, driven by the outbox change sequence.
+
+    A token is a change feed cursor: a sync returns the current state of every
+    row with an outbox event after it, and tombstones for rows that are gone.
+    Without a token the user's full data set is returned.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def latest_token(self) -> str:
+        """Get a token positioned after every committed change"""
+        latest = self.db.query(OutboxEvent.txid, OutboxEvent.id).filter(
+            OutboxEvent.txid < visible_horizon()
+        ).order_by(OutboxEvent.txid.desc(), OutboxEvent.id.desc()).first()
+        return encode_cursor(*latest) if latest else encode_cursor(0, 0)
+
+    def is_expired(self, token: str) -> bool:
+        """Whether events after the token may already have been purged by the retention job"""
+        _, event_id = decode_cursor(token)
+        oldest = self.db.query(func.min(OutboxEvent.id)).scalar()
+        return oldest is not None and event_id < oldest - 1
+
+    def _event_scope(self, user: User):
+        family_ids = select(User.id).where(
+            (User.id == user.family_id) | (User.family_head_id == user.family_id)
+        )
+        participating = select(goal_participants.c.goal_id).where(goal_participants.c.user_id == user.id)
+        return or_(
+            and_(OutboxEvent.entity.in_(("transaction", "notification")), OutboxEvent.user_id == user.id),
+            # Goals can be shared, follow the family's goals and any goal the user takes part in
+            and_(
+                OutboxEvent.entity == "goal",
+                or_(OutboxEvent.user_id.in_(family_ids), OutboxEvent.entity_id.in_(participating)),
+            ),
+        )
+
+    def _transaction_rows(self, user_id: int, ids: Optional[Set[int]]) -> List[Dict[str, Any]]:
+        query = self.db.query(*[getattr(Transaction, field) for field in TRANSACTION_FIELDS]).filter(
+            Transaction.user_id == user_id
+        )
+        if ids is not None:
+            query = query.filter(Transaction.id.in_(ids))
+        return [dict(zip(TRANSACTION_FIELDS, row)) for row in query.order_by(Transaction.id)]
+
+    def _notification_rows(self, user_id: int, ids: Optional[Set[int]]) -> List[Dict[str, Any]]:
+        query = self.db.query(*[getattr(Notification, field) for field in NOTIFICATION_FIELDS]).filter(
+            Notification.user_id == user_id
+        )
+        if ids is not None:
+            query = query.filter(Notification.id.in_(ids))
+        return [dict(zip(NOTIFICATION_FIELDS, row)) for row in query.order_by(Notification.id)]
+
+    def _goal_rows(self, user_id: int, ids: Optional[Set[int]]) -> List[Dict[str, Any]]:
+        rows = GoalService(self.db).get_user_goal_rows(
+            user_id=user_id, limit=None, goal_ids=list(ids) if ids is not None else None
+        )
+        return [dict(zip(GOAL_FIELDS, row)) for row in rows]
+
+    def sync(self, user: User, since: Optional[str] = None, limit: int = 5000) -> Dict[str, Any]:
+        """Get what changed for a user after a token, reading at most `limit` change events"""
+        if since is None:
+            token = self.latest_token()
+            return {
+                "token": token,
+                "has_more": False,
+                "transactions": self._transaction_rows(user.id, None),
+                "goals": self._goal_rows(user.id, None),
+                "notifications": self._notification_rows(user.id, None),
+                "deleted": {},
+            }
+
+        txid, event_id = decode_cursor(since)
+        events = self.db.query(OutboxEvent.txid, OutboxEvent.id, OutboxEvent.entity, OutboxEvent.entity_id).filter(
+            self._event_scope(user),
+            tuple_(OutboxEvent.txid, OutboxEvent.id) > tuple_(txid, event_id),
+            OutboxEvent.txid < visible_horizon(),
+        ).order_by(OutboxEvent.txid, OutboxEvent.id).limit(limit + 1).all()
+
+        has_more = len(events) > limit
+        events = events[:limit]
+        token = encode_cursor(events[-1].txid, events[-1].id) if events else since
+
+        # Several events on the same row collapse into its current state
+        changed: Dict[str, Set[int]] = {"transaction": set(), "goal": set(), "notification": set()}
+        for event in events:
+            changed[event.entity].add(event.entity_id)
+
+        transactions = self._transaction_rows(user.id, changed["transaction"]) if changed["transaction"] else []
+        goals = self._goal_rows(user.id, changed["goal"]) if changed["goal"] else []
+        notifications = self._notification_rows(user.id, changed["notification"]) if changed["notification"] else []
+
+        return {
+            "token": token,
+            "has_more": has_more,
+            "transactions": transactions,
+            "goals": goals,
+            "notifications": notifications,
+            "deleted": {
+                "transactions": sorted(changed["transaction"] - {row["id"] for row in transactions}),
+                "goals": sorted(changed["goal"] - {row["id"] for row in goals}),
+                "notifications": sorted(changed["notification"] - {row["id"] for row in notifications}),
+            },
+        }
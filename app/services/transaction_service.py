@@ -1,11 +1,27 @@
-from typing import List, Optional, Dict, Any, Union
+from typing import List, Optional, Dict, Any, Tuple, Union
+from collections import Counter
 from datetime import date, datetime
 
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, literal, or_, desc, insert
 
 from app.models.transaction import Transaction, TransactionType, TransactionCategory
-from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.schemas.transaction import (
+    Transaction as TransactionSchema, TransactionCreate, TransactionUpdate, TransactionFilter,
+    TransactionImport, TRANSACTION_FIELDS
+)
+from app.services.category_service import CategoryService
+from app.services.fx_service import amount_in_base_currency
+from app.services.monthly_totals_service import apply_monthly_totals
+from app.services.outbox_service import OutboxService, CREATED
+from app.utils.fingerprint import transaction_fingerprint
+
+class DuplicateTransactionError(ValueError):
+    """Raised when creating a transaction that was already recorded"""
+
+    def __init__(self, duplicate: Transaction):
+        super().__init__(f"Possible duplicate of transaction {duplicate.id}")
+        self.duplicate = duplicate
 
 class TransactionService:
     def __init__(self, db: Session):
@@ -37,29 +53,255 @@ class TransactionService:
         
         return query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
 
-    def create(self, obj_in: TransactionCreate, user_id: int) -> Transaction:
+    def get_filtered(
+        self, user_ids: List[int], filters: TransactionFilter
+    ) -> Union[List[Transaction], List[Dict[str, Any]]]:
+        """Get transactions matching a filter query with a single SQL statement.
+
+        Returns ORM objects, or plain dicts holding only the requested columns when
+        the filter carries a field projection.
+        """
+        results = self.build_filter_query(user_ids, filters).all()
+        if filters.fields:
+            return [dict(row._mapping) for row in results]
+        return results
+
+    def get_filtered_rows(self, user_ids: List[int], filters: TransactionFilter) -> List[Tuple]:
+        """Get matching transactions as plain column tuples, skipping ORM instances entirely.
+
+        Columns follow the filter's field projection, or the full response schema order.
+        """
+        if not filters.fields:
+            filters = filters.model_copy(update={"fields": TRANSACTION_FIELDS})
+        return self.build_filter_query(user_ids, filters).all()
+
+    def build_filter_query(self, user_ids: List[int], filters: TransactionFilter):
+        """Compile a filter query over the given users' transactions"""
+        if filters.fields:
+            query = self.db.query(*[getattr(Transaction, field) for field in filters.fields])
+        else:
+            query = self.db.query(Transaction)
+
+        # Equality/range predicates on user_id, date and category line up with the
+        # (user_id, date) and (user_id, category, date) indexes
+        if len(user_ids) == 1:
+            query = query.filter(Transaction.user_id == user_ids[0])
+        else:
+            query = query.filter(Transaction.user_id.in_(user_ids))
+        if filters.start_date:
+            query = query.filter(Transaction.date >= datetime.combine(filters.start_date, datetime.min.time()))
+        if filters.end_date:
+            query = query.filter(Transaction.date <= datetime.combine(filters.end_date, datetime.max.time()))
+        if filters.categories:
+            query = query.filter(Transaction.category.in_(filters.categories))
+        if filters.category_ids:
+            query = query.filter(
+                Transaction.category_id.in_(CategoryService(self.db).get_subtree_ids(filters.category_ids))
+            )
+        if filters.types:
+            query = query.filter(Transaction.type.in_(filters.types))
+        if filters.min_amount is not None:
+            query = query.filter(Transaction.amount >= filters.min_amount)
+        if filters.max_amount is not None:
+            query = query.filter(Transaction.amount <= filters.max_amount)
+
+        order_by = []
+        for item in filters.sort:
+            column = getattr(Transaction, item.lstrip("-"))
+            order_by.append(column.desc() if item.startswith("-") else column.asc())
+        # Tie-break on id so that skip/limit pages are stable
+        if not any(item.lstrip("-") == "id" for item in filters.sort):
+            order_by.append(Transaction.id.desc() if filters.sort[0].startswith("-") else Transaction.id.asc())
+
+        return query.order_by(*order_by).offset(filters.skip).limit(filters.limit)
+
+    def search(
+        self, user_id: int, q: str, skip: int = 0, limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """Search descriptions using Portuguese full-text matching plus trigram fuzzy matching"""
+        ts_query = func.websearch_to_tsquery("portuguese", q)
+        # Both predicates are served by the per-user GIN indexes on transactions
+        full_text_match = Transaction.search_vector.op("@@")(ts_query)
+        fuzzy_match = literal(q).op("<%")(Transaction.description)
+        rank = (
+            func.ts_rank_cd(Transaction.search_vector, ts_query)
+            + func.word_similarity(q, Transaction.description)
+        ).label("rank")
+
+        results = self.db.query(Transaction, rank).filter(
+            Transaction.user_id == user_id,
+            or_(full_text_match, fuzzy_match)
+        ).order_by(desc("rank"), Transaction.date.desc()).offset(skip).limit(limit).all()
+
+        return [
+            {**TransactionSchema.model_validate(transaction).model_dump(), "rank": score}
+            for transaction, score in results
+        ]
+
+    def count_existing(self, user_id: int, fingerprints: List[str]) -> Dict[str, int]:
+        """Count the stored transactions of a user for each fingerprint, in one indexed query"""
+        if not fingerprints:
+            return {}
+        return dict(self.db.query(Transaction.fingerprint, func.count(Transaction.id)).filter(
+            Transaction.user_id == user_id,
+            Transaction.fingerprint.in_(set(fingerprints))
+        ).group_by(Transaction.fingerprint).all())
+
+    def find_duplicate(self, obj_in: TransactionCreate, user_id: int) -> Optional[Transaction]:
+        """Get an already recorded transaction with the same fingerprint, if any, through the fingerprint index"""
+        fingerprint = transaction_fingerprint(
+            user_id, obj_in.date, obj_in.amount, obj_in.description, obj_in.currency
+        )
+        return self.db.query(Transaction).filter(
+            Transaction.user_id == user_id,
+            Transaction.fingerprint == fingerprint
+        ).order_by(Transaction.id).first()
+
+    def get_duplicate_groups(self, user_id: int, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get groups of a user's transactions that share a fingerprint, newest first"""
+        groups = self.db.query(
+            Transaction.fingerprint, func.count(Transaction.id).label("count")
+        ).filter(
+            Transaction.user_id == user_id,
+            Transaction.fingerprint.isnot(None)
+        ).group_by(Transaction.fingerprint).having(
+            func.count(Transaction.id) > 1
+        ).order_by(func.max(Transaction.date).desc(), Transaction.fingerprint).offset(skip).limit(limit).all()
+        if not groups:
+            return []
+
+        # Fetch the members of every group at once through the fingerprint index
+        members: Dict[str, List[Transaction]] = {fingerprint: [] for fingerprint, _ in groups}
+        for transaction in self.db.query(Transaction).filter(
+            Transaction.user_id == user_id,
+            Transaction.fingerprint.in_(list(members))
+        ).order_by(Transaction.id):
+            members[transaction.fingerprint].append(transaction)
+
+        return [
+            {"fingerprint": fingerprint, "count": count, "transactions": members[fingerprint]}
+            for fingerprint, count in groups
+        ]
+
+    def create(
+        self, obj_in: TransactionCreate, user_id: int, reject_duplicate: bool = False, commit: bool = True
+    ) -> Transaction:
+        """Record a transaction, flagging it with `duplicate_of` when one with the same fingerprint exists.
+
+        Identical entries are legitimate (two coffees on the same day), so they
+        are only rejected, with DuplicateTransactionError, when `reject_duplicate`
+        is set.
+        """
+        duplicate = self.find_duplicate(obj_in=obj_in, user_id=user_id)
+        if duplicate and reject_duplicate:
+            raise DuplicateTransactionError(duplicate)
         db_obj = Transaction(
             amount=obj_in.amount,
+            currency=obj_in.currency,
             description=obj_in.description,
             type=obj_in.type,
             category=obj_in.category,
+            category_id=obj_in.category_id or CategoryService(self.db).get_root_ids()[obj_in.category],
             date=obj_in.date,
             user_id=user_id,
+            fingerprint=transaction_fingerprint(
+                user_id, obj_in.date, obj_in.amount, obj_in.description, obj_in.currency
+            ),
         )
         self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        if commit:
+            self.db.commit()
+            self.db.refresh(db_obj)
+        else:
+            self.db.flush()
+        db_obj.duplicate_of = duplicate.id if duplicate else None
         return db_obj
 
+    def create_many(self, rows: List[Dict[str, Any]], commit: bool = True) -> List[Transaction]:
+        """Insert many transactions with a single multi-row INSERT ... RETURNING, outbox events and
+        monthly totals included"""
+        if not rows:
+            return []
+        root_ids = CategoryService(self.db).get_root_ids()
+        for row in rows:
+            if "category_id" not in row:
+                row["category_id"] = root_ids[row["category"]]
+            if "fingerprint" not in row:
+                row["fingerprint"] = transaction_fingerprint(
+                    row["user_id"], row["date"], row["amount"], row["description"], row.get("currency")
+                )
+        transactions = list(self.db.scalars(insert(Transaction).returning(Transaction), rows))
+        OutboxService(self.db).record(Transaction, CREATED, transactions)
+        apply_monthly_totals(self.db, [transaction.id for transaction in transactions], 1)
+        if commit:
+            self.db.commit()
+        return transactions
+
+    def import_transactions(
+        self, rows: List[TransactionImport], user_id: int, family_head_id: int
+    ) -> Dict[str, int]:
+        """Import statement rows in one insert, categorizing rows without a category.
+
+        Rows already recorded are skipped, so overlapping statements can be
+        re-imported safely. Identical rows are legitimate (two coffees on the same
+        day), so only as many copies as are already stored get skipped.
+        """
+        from app.services.categorization_service import CategorizationService
+
+        fingerprints = [
+            transaction_fingerprint(user_id, row.date, row.amount, row.description, row.currency)
+            for row in rows
+        ]
+        existing = Counter(self.count_existing(user_id, fingerprints))
+        new_rows = []
+        for row, fingerprint in zip(rows, fingerprints):
+            if existing[fingerprint] > 0:
+                existing[fingerprint] -= 1
+                continue
+            new_rows.append((row, fingerprint))
+        duplicates = len(rows) - len(new_rows)
+
+        uncategorized = [row for row, _ in new_rows if row.category is None]
+        categories = CategorizationService(self.db).categorize(
+            family_head_id, [row.description for row in uncategorized], user_id=user_id
+        )
+        inferred = {id(row): category for row, category in zip(uncategorized, categories)}
+
+        transactions = self.create_many([
+            {
+                "amount": row.amount,
+                "currency": row.currency,
+                "description": row.description,
+                "type": row.type,
+                "category": row.category or inferred[id(row)] or TransactionCategory.OTHER,
+                "date": row.date,
+                "user_id": user_id,
+                "fingerprint": fingerprint,
+            }
+            for row, fingerprint in new_rows
+        ])
+        return {
+            "created": len(transactions),
+            "categorized": sum(1 for category in categories if category is not None),
+            "duplicates": duplicates,
+        }
+
     def update(self, db_obj: Transaction, obj_in: Union[TransactionUpdate, Dict[str, Any]]) -> Transaction:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
         
+        # A new root category without a node files the transaction directly under it
+        if update_data.get("category") not in (None, db_obj.category) and not update_data.get("category_id"):
+            update_data["category_id"] = CategoryService(self.db).get_root_ids()[update_data["category"]]
+
         for field in update_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
+        db_obj.fingerprint = transaction_fingerprint(
+            db_obj.user_id, db_obj.date, db_obj.amount, db_obj.description, db_obj.currency
+        )
         
         self.db.add(db_obj)
         self.db.commit()
@@ -73,21 +315,21 @@ class TransactionService:
         return obj
 
     def get_monthly_totals(self, user_id: int, year: int, month: int) -> Dict[str, float]:
-        """Get total income and expenses for a specific month"""
+        """Get total income and expenses for a specific month, in the base currency"""
         start_date = datetime(year, month, 1)
         if month == 12:
             end_date = datetime(year + 1, 1, 1)
         else:
             end_date = datetime(year, month + 1, 1)
         
-        income = self.db.query(func.sum(Transaction.amount)).filter(
+        income = self.db.query(func.sum(amount_in_base_currency())).filter(
             Transaction.user_id == user_id,
             Transaction.type == TransactionType.INCOME,
             Transaction.date >= start_date,
             Transaction.date < end_date
         ).scalar() or 0.0
         
-        expenses = self.db.query(func.sum(Transaction.amount)).filter(
+        expenses = self.db.query(func.sum(amount_in_base_currency())).filter(
             Transaction.user_id == user_id,
             Transaction.type == TransactionType.EXPENSE,
             Transaction.date >= start_date,
@@ -0,0 +1,51 @@
+from collections import Counter
+from typing import Any, Dict
+
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.notification import Notification, NotificationCounter
+
+def apply_unread_counts(session: Session, deltas: Dict[int, int]) -> None:
+    """Add per-user deltas to the unread notification counters, in the session's transaction"""
+    # Sorted so that concurrent writers lock the counters in the same order
+    rows = [{"user_id": user_id, "unread": delta} for user_id, delta in sorted(deltas.items()) if delta]
+    if not rows:
+        return
+    stmt = pg_insert(NotificationCounter).values(rows)
+    session.connection().execute(stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread": NotificationCounter.unread + stmt.excluded.unread},
+    ))
+
+def _is_unread(value: Any) -> bool:
+    # New notifications get is_read=False from the column default
+    return not value
+
+@event.listens_for(Session, "before_flush")
+def _count_unread_changes(session: Session, flush_context: Any, instances: Any) -> None:
+    # Bulk statements bypass this and call apply_unread_counts themselves
+    deltas: Dict[int, int] = Counter()
+    for obj in session.new:
+        if isinstance(obj, Notification) and _is_unread(obj.is_read):
+            deltas[obj.user_id] += 1
+    for obj in session.deleted:
+        if isinstance(obj, Notification) and _is_unread(obj.is_read):
+            deltas[obj.user_id] -= 1
+    for obj in session.dirty:
+        if not isinstance(obj, Notification):
+            continue
+        attrs = inspect(obj).attrs
+        if not (attrs.is_read.history.has_changes() or attrs.user_id.history.has_changes()):
+            continue
+        # Take the old state out and put the new one in
+        old_read, old_user = (
+            attr.history.deleted[0] if attr.history.deleted else attr.value
+            for attr in (attrs.is_read, attrs.user_id)
+        )
+        if _is_unread(old_read):
+            deltas[old_user] -= 1
+        if _is_unread(obj.is_read):
+            deltas[obj.user_id] += 1
+    apply_unread_counts(session, deltas)
@@ -0,0 +1,121 @@
+"""
+Background work queue for side effects of writes, such as budget evaluations.
+
+Tasks are registered by name and enqueued with a key. A task that is already
+waiting with the same (name, key) is not queued again: a burst of writes by
+one user results in a single evaluation, run after the last of them was
+queued. Each task runs with its own database session.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+Task = Callable[[Session, Hashable], None]
+
+# Task functions by name, see register()
+_tasks: Dict[str, Task] = {}
+
+def register(name: str) -> Callable[[Task], Task]:
+    """Decorator registering `task(db, key)` under `name`"""
+    def decorator(task: Task) -> Task:
+        _tasks[name] = task
+        return task
+    return decorator
+
+def _run(name: str, key: Hashable) -> None:
+    db = SessionLocal()
+    try:
+        _tasks[name](db, key)
+    except Exception:
+        logger.exception("Task %s(%r) failed", name, key)
+        db.rollback()
+    finally:
+        db.close()
+
+class InlineWorkQueue:
+    """Runs tasks right away in the caller's thread, for scripts and one-shot jobs"""
+
+    def enqueue(self, name: str, key: Hashable) -> None:
+        _run(name, key)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def stop(self) -> None:
+        pass
+
+class LocalWorkQueue:
+    """In-process queue served by one daemon thread, coalescing tasks waiting with the same key"""
+
+    def __init__(self):
+        self._pending: "OrderedDict[Tuple[str, Hashable], None]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._running = 0
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, name: str, key: Hashable) -> None:
+        if name not in _tasks:
+            raise KeyError(f"Unknown task {name}")
+        with self._condition:
+            stopped = self._stopped
+            if not stopped:
+                # A task that already started is queued again: it may have read the data before this write
+                self._pending[(name, key)] = None
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._work, name="work-queue", daemon=True)
+                    self._thread.start()
+                self._condition.notify_all()
+        if stopped:
+            # Writes that arrive while shutting down still get their side effects
+            _run(name, key)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued task ran, False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._running, timeout)
+
+    def stop(self) -> None:
+        """Run the remaining tasks, then stop the worker"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopped)
+                if not self._pending:
+                    return
+                (name, key), _ = self._pending.popitem(last=False)
+                self._running += 1
+            try:
+                _run(name, key)
+            finally:
+                with self._condition:
+                    self._running -= 1
+                    self._condition.notify_all()
+
+_BACKENDS = {"local": LocalWorkQueue, "inline": InlineWorkQueue}
+
+_queue = None
+_queue_lock = threading.Lock()
+
+def get_work_queue():
+    """The process-wide work queue, of the WORK_QUEUE_BACKEND kind"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = _BACKENDS[settings.WORK_QUEUE_BACKEND]()
+        return _queue
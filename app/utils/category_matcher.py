@@ -0,0 +1,119 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import re
+import unicodedata
+
+_NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+def normalize_description(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces"""
+    text = text.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFKD", text)
+        text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_ALPHANUMERIC.sub(" ", text).strip()
+
+class MatcherRule(NamedTuple):
+    id: int
+    pattern: str
+    is_regex: bool
+    category: Any
+    priority: int = 0
+    user_id: Optional[int] = None  # None applies to the whole family
+    merchant: Optional[str] = None
+
+class CategoryMatch(NamedTuple):
+    category: Any
+    merchant: Optional[str]
+    rule_id: int
+
+# Trie key holding the rules that end at a node
+_END = ""
+
+class CategoryMatcher:
+    """Classify descriptions against a family's rules in a single pass.
+
+    Keywords and merchant aliases are compiled into a trie over normalized
+    tokens, so a description is matched against every keyword at once by
+    walking its tokens. Regex rules are folded into one alternation that acts
+    as a prefilter when they can be (see _build_prefilter); they are only
+    evaluated one by one when it matches. The
+    highest priority rule wins, then the longest keyword, then the oldest rule.
+    Results are memoized per description, since statements repeat merchants a lot.
+    """
+
+    def __init__(self, rules: Iterable[MatcherRule], cache_size: int = 50000):
+        self._trie: Dict[str, Any] = {}
+        self._regex_rules: List[Tuple[MatcherRule, re.Pattern]] = []
+        for rule in rules:
+            if rule.is_regex:
+                self._regex_rules.append((rule, re.compile(rule.pattern, re.IGNORECASE)))
+                continue
+            tokens = normalize_description(rule.pattern).split()
+            if not tokens:
+                continue
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(_END, []).append((rule, len(tokens)))
+
+        self._regex_rules.sort(key=lambda item: (-item[0].priority, item[0].id))
+        self._regex_prefilter = self._build_prefilter([pattern for _, pattern in self._regex_rules])
+        self._cache: Dict[Tuple[str, Optional[int]], Optional[CategoryMatch]] = {}
+        self._cache_size = cache_size
+
+    @staticmethod
+    def _build_prefilter(patterns: List[re.Pattern]) -> Optional[re.Pattern]:
+        """One alternation of all the regex rules, None when they must be searched one by one.
+
+        Joined patterns share their group numbers and names, and global flags
+        are only allowed at the very start: rules with groups (and thus
+        backreferences) or that do not compile together are not combined.
+        """
+        if not patterns or any(pattern.groups for pattern in patterns):
+            return None
+        try:
+            return re.compile("|".join(f"(?:{pattern.pattern})" for pattern in patterns), re.IGNORECASE)
+        except re.error:
+            return None
+
+    def match(self, description: str, user_id: Optional[int] = None) -> Optional[CategoryMatch]:
+        """Get the best matching rule for a description, as seen by the given user"""
+        key = (description, user_id)
+        if key in self._cache:
+            return self._cache[key]
+
+        best = None
+        best_rank = None
+        tokens = normalize_description(description).split()
+        for start in range(len(tokens)):
+            node = self._trie
+            for token in tokens[start:]:
+                node = node.get(token)
+                if node is None:
+                    break
+                for rule, length in node.get(_END, ()):
+                    if rule.user_id is not None and rule.user_id != user_id:
+                        continue
+                    rank = (rule.priority, length, -rule.id)
+                    if best_rank is None or rank > best_rank:
+                        best, best_rank = rule, rank
+
+        if self._regex_rules and (self._regex_prefilter is None or self._regex_prefilter.search(description)):
+            for rule, pattern in self._regex_rules:
+                if best_rank is not None and rule.priority <= best_rank[0]:
+                    break
+                if rule.user_id is not None and rule.user_id != user_id:
+                    continue
+                if pattern.search(description):
+                    best = rule
+                    break
+
+        result = CategoryMatch(best.category, best.merchant, best.id) if best else None
+        if len(self._cache) >= self._cache_size:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+    def match_many(self, descriptions: Iterable[str], user_id: Optional[int] = None) -> List[Optional[CategoryMatch]]:
+        match = self.match
+        return [match(description, user_id) for description in descriptions]
@@ -1,4 +1,5 @@
 from datetime import datetime, date, timedelta
+from typing import Optional, Tuple
 import calendar
 
 def get_month_range(year: int, month: int) -> Tuple[date, date]:
@@ -8,6 +9,13 @@ def get_month_range(year: int, month: int) -> Tuple[date, date]:
     last_day = date(year, month, last_day_num)
     return first_day, last_day
 
+def add_months(dt: datetime, months: int, day: Optional[int] = None) -> datetime:
+    """Move a datetime by a number of months, keeping `day` (or its own day) when the month allows it"""
+    month_index = dt.month - 1 + months
+    year, month = dt.year + month_index // 12, month_index % 12 + 1
+    _, last_day = calendar.monthrange(year, month)
+    return dt.replace(year=year, month=month, day=min(day or dt.day, last_day))
+
 def get_week_range(dt: date) -> Tuple[date, date]:
     """Get the first and last day of the week for a given date"""
     start = dt - timedelta(days=dt.weekday())
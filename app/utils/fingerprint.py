@@ -0,0 +1,28 @@
+from datetime import date, datetime, timezone
+from typing import Optional, Union
+import hashlib
+
+from app.core.config import settings
+from app.utils.category_matcher import normalize_description
+
+def transaction_fingerprint(
+    user_id: int, when: Union[date, datetime], amount: float, description: str,
+    currency: Optional[str] = None,
+) -> str:
+    """Hash a transaction's identifying fields, normalized so that re-imports collide.
+
+    Only the calendar day is kept from the date (statements carry no time),
+    taken in UTC whatever offset the value carries (naive values are UTC), the
+    amount is rounded to cents and the description is normalized like the
+    categorization rules see it. The currency only enters the key when it is
+    not the base one, so fingerprints recorded before currencies still match.
+    """
+    day = when
+    if isinstance(when, datetime):
+        if when.tzinfo is not None:
+            when = when.astimezone(timezone.utc)
+        day = when.date()
+    key = f"{user_id}|{day.isoformat()}|{round(amount, 2):.2f}|{normalize_description(description)}"
+    if currency and currency != settings.BASE_CURRENCY:
+        key += f"|{currency}"
+    return hashlib.sha256(key.encode()).hexdigest()
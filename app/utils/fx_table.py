@@ -0,0 +1,75 @@
+from bisect import bisect_right
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+from app.utils.money import Number, from_cents, to_cents
+
+Day = Union[date, datetime]
+
+class FxTable:
+    """Daily exchange rates to the base currency, held as sorted arrays per currency.
+
+    The rate of a day is the latest one published on or before it; days before
+    the first known rate use the first one. Converted amounts are rounded to
+    whole cents, half up, like Postgres rounds numerics. Conversions of many
+    amounts are done per currency with a single merge of the sorted days
+    against the rate dates, instead of one lookup per amount.
+    """
+
+    def __init__(self, base_currency: str, rates: Iterable[Tuple[str, date, Number]]):
+        self.base_currency = base_currency
+        by_currency: Dict[str, List[Tuple[int, Decimal]]] = {}
+        for currency, day, rate in rates:
+            by_currency.setdefault(currency, []).append((day.toordinal(), Decimal(str(rate))))
+        self._days: Dict[str, List[int]] = {}
+        self._rates: Dict[str, List[Decimal]] = {}
+        for currency, items in by_currency.items():
+            items.sort()
+            self._days[currency] = [day for day, _ in items]
+            self._rates[currency] = [rate for _, rate in items]
+
+    @property
+    def currencies(self) -> List[str]:
+        return sorted({self.base_currency, *self._days})
+
+    def supports(self, currency: str) -> bool:
+        return currency == self.base_currency or currency in self._days
+
+    def rate(self, currency: str, day: Day) -> Decimal:
+        """Rate of one unit of `currency` in the base currency on a day, KeyError for unknown currencies"""
+        if currency == self.base_currency:
+            return Decimal(1)
+        days = self._days[currency]
+        index = bisect_right(days, _ordinal(day)) - 1
+        return self._rates[currency][max(index, 0)]
+
+    def convert_many(
+        self, amounts: Sequence[float], currencies: Sequence[str], days: Sequence[Day]
+    ) -> List[float]:
+        """Convert amounts to the base currency, KeyError for unknown currencies"""
+        result = [0.0] * len(amounts)
+        groups: Dict[str, List[int]] = {}
+        for index, currency in enumerate(currencies):
+            if currency == self.base_currency:
+                result[index] = amounts[index]
+            else:
+                groups.setdefault(currency, []).append(index)
+
+        for currency, indexes in groups.items():
+            rate_days, rates = self._days[currency], self._rates[currency]
+            indexes.sort(key=lambda index: _ordinal(days[index]))
+            # Both sides are sorted by day: advance one pointer over the rates
+            position = 0
+            for index in indexes:
+                day = _ordinal(days[index])
+                while position + 1 < len(rate_days) and rate_days[position + 1] <= day:
+                    position += 1
+                result[index] = _convert(amounts[index], rates[position])
+        return result
+
+def _convert(amount: Number, rate: Decimal) -> float:
+    return from_cents((to_cents(amount) * rate).to_integral_value(ROUND_HALF_UP))
+
+def _ordinal(day: Day) -> int:
+    return (day.date() if isinstance(day, datetime) else day).toordinal()
@@ -0,0 +1,18 @@
+from decimal import Decimal
+from typing import Optional, Union
+
+Number = Union[int, float, Decimal]
+
+def to_cents(amount: Optional[Number]) -> Optional[int]:
+    """Convert an amount in currency units to integer cents, rounding to the nearest cent"""
+    if amount is None:
+        return None
+    if isinstance(amount, Decimal):
+        return int((amount * 100).to_integral_value())
+    return int(round(amount * 100))
+
+def from_cents(cents: Optional[Number]) -> Optional[float]:
+    """Convert integer cents (or an exact SUM of them) back to currency units"""
+    if cents is None:
+        return None
+    return float(cents) / 100
@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+class RowSerializer:
+    """Serialize plain column tuples to JSON bytes using a schema's precompiled serializer.
+
+    Rows are trusted database values, so they skip model validation and ORM
+    instantiation entirely: each row is zipped with the field names and handed
+    to pydantic-core, which writes the whole page to JSON in one call.
+    """
+
+    def __init__(self, schema: Type[BaseModel], fields: Sequence[str]):
+        self.fields = tuple(fields)
+        row_type = TypedDict(
+            f"{schema.__name__}Row",
+            {field: schema.model_fields[field].annotation for field in self.fields},
+        )
+        self._adapter = TypeAdapter(List[row_type])
+
+    def dump_json(self, rows: Iterable[Sequence[Any]]) -> bytes:
+        fields = self.fields
+        return self._adapter.dump_json([dict(zip(fields, row)) for row in rows])
+
+    def response(self, rows: Iterable[Sequence[Any]]) -> Response:
+        return Response(content=self.dump_json(rows), media_type="application/json")
+
+@lru_cache(maxsize=128)
+def get_row_serializer(schema: Type[BaseModel], fields: Optional[Tuple[str, ...]] = None) -> RowSerializer:
+    """Get a cached serializer for the given schema and field projection"""
+    return RowSerializer(schema, fields or tuple(schema.model_fields))
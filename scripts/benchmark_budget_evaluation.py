@@ -0,0 +1,78 @@
+"""
+Benchmark the budget checks of every user against the configured database.
+
+Each run happens inside a transaction that is rolled back, so alerts are
+neither claimed nor sent and every run sees the same data.
+
+Usage: python -m scripts.benchmark_budget_evaluation [--month 2026-10-01] [--runs 20] [--explain]
+"""
+import argparse
+import statistics
+import time
+from datetime import date
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.db.base import engine
+from app.services.budget_service import BudgetService, current_month
+from app.services.notification_service import NotificationService
+
+CHECKS = {
+    "monthly ledger thresholds": lambda db, month: NotificationService(db).check_all_budget_thresholds(month),
+    "category budgets": lambda db, month: BudgetService(db).check_all_budgets(month),
+}
+
+def run_check(check, month: date, statements=None) -> int:
+    """Run a check in a transaction that is rolled back, collecting its statements when given a list"""
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        if statements is not None:
+            @event.listens_for(connection, "before_cursor_execute")
+            def collect(conn, cursor, statement, parameters, context, executemany):
+                if not executemany:
+                    statements.append((statement, parameters))
+        # The checks commit, which only releases a savepoint of the outer transaction here
+        db = Session(bind=connection, join_transaction_mode="create_savepoint")
+        try:
+            return check(db, month)
+        finally:
+            db.close()
+            transaction.rollback()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--month", type=date.fromisoformat, default=current_month())
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--explain", action="store_true", help="Print the query plan of each statement")
+    args = parser.parse_args()
+    month = args.month.replace(day=1)
+
+    print(f"{'check':<30} {'alerts':>6} {'median ms':>10} {'p95 ms':>8}")
+    for name, check in CHECKS.items():
+        timings = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            sent = run_check(check, month)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<30} {sent:>6} {statistics.median(timings):>10.2f} {p95:>8.2f}")
+
+        if args.explain:
+            statements = []
+            run_check(check, month, statements)
+            with engine.connect() as connection:
+                transaction = connection.begin()
+                try:
+                    for statement, parameters in statements:
+                        if not statement.lstrip().upper().startswith(("SELECT", "UPDATE")):
+                            continue
+                        for line, in connection.exec_driver_sql(f"EXPLAIN ANALYZE {statement}", parameters).all():
+                            print(f"    {line}")
+                        print()
+                finally:
+                    transaction.rollback()
+
+if __name__ == "__main__":
+    main()
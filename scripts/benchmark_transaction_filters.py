@@ -0,0 +1,78 @@
+"""
+Benchmark representative transaction filters against the configured database.
+
+Usage: python -m scripts.benchmark_transaction_filters [--user-id 1] [--runs 50] [--explain]
+"""
+import argparse
+import statistics
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from app.db.base import SessionLocal
+from app.models.user import User
+from app.models.transaction import TransactionType, TransactionCategory
+from app.schemas.transaction import TransactionFilter
+from app.services.transaction_service import TransactionService
+
+def representative_filters(today: date):
+    """Filters modelled on what the clients used to fetch and filter locally"""
+    return {
+        "latest page": TransactionFilter(),
+        "current month expenses": TransactionFilter(
+            start_date=today.replace(day=1), end_date=today, types=[TransactionType.EXPENSE]
+        ),
+        "category set, last quarter": TransactionFilter(
+            start_date=today - timedelta(days=90),
+            categories=[TransactionCategory.FOOD, TransactionCategory.TRANSPORTATION, TransactionCategory.ENTERTAINMENT],
+        ),
+        "amount range, largest first": TransactionFilter(min_amount=100, max_amount=1000, sort=["-amount"]),
+        "projection, last year": TransactionFilter(
+            start_date=today - timedelta(days=365), fields=["id", "amount", "date", "category"], limit=1000
+        ),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user-id", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--explain", action="store_true", help="Print the query plan of each filter")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == args.user_id).first()
+        if not user:
+            raise SystemExit(f"User {args.user_id} not found")
+
+        # The family head benchmarks the multi-user form of each filter
+        user_ids = [user.id]
+        if user.is_family_head:
+            user_ids = [member.id for member in db.query(User.id).filter(
+                (User.id == user.id) | (User.family_head_id == user.id)
+            ).all()]
+
+        service = TransactionService(db)
+        print(f"{'filter':<30} {'rows':>6} {'median ms':>10} {'p95 ms':>8}")
+        for name, filters in representative_filters(date.today()).items():
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                rows = service.get_filtered(user_ids=user_ids, filters=filters)
+                timings.append((time.perf_counter() - start) * 1000)
+                db.expunge_all()
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{name:<30} {len(rows):>6} {statistics.median(timings):>10.2f} {p95:>8.2f}")
+
+            if args.explain:
+                statement = service.build_filter_query(user_ids, filters).statement
+                compiled = statement.compile(bind=db.get_bind(), compile_kwargs={"literal_binds": True})
+                for line, in db.execute(text(f"EXPLAIN ANALYZE {compiled}")).all():
+                    print(f"    {line}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+from app.utils.category_matcher import CategoryMatcher, MatcherRule
+
+def test_regex_rules_with_global_flags():
+    matcher = CategoryMatcher([
+        MatcherRule(id=1, pattern="(?i)uber", is_regex=True, category="transport"),
+        MatcherRule(id=2, pattern="ifood|rappi", is_regex=True, category="food"),
+    ])
+    assert matcher.match("UBER *TRIP").category == "transport"
+    assert matcher.match("IFOOD *SP").category == "food"
+    assert matcher.match("Padaria") is None
+
+def test_regex_rules_with_backreferences():
+    matcher = CategoryMatcher([
+        MatcherRule(id=1, pattern=r"(a)\1", is_regex=True, category="a"),
+        MatcherRule(id=2, pattern=r"(b)\1", is_regex=True, category="b"),
+    ])
+    assert matcher.match("aa").category == "a"
+    assert matcher.match("bb").category == "b"
+    assert matcher.match("ab") is None
+
+def test_regex_rules_with_named_groups():
+    matcher = CategoryMatcher([
+        MatcherRule(id=1, pattern=r"(?P<store>shell)\s+(?P=store)", is_regex=True, category="fuel"),
+        MatcherRule(id=2, pattern=r"(?P<store>market)", is_regex=True, category="groceries"),
+    ])
+    assert matcher.match("shell shell 123").category == "fuel"
+    assert matcher.match("Market Place").category == "groceries"
+    assert matcher.match("shell 123") is None
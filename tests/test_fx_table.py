@@ -0,0 +1,57 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+import random
+
+import pytest
+
+from app.utils.fx_table import FxTable
+
+def make_table():
+    return FxTable("BRL", [
+        ("USD", date(2026, 1, 10), Decimal("5.0")),
+        ("USD", date(2026, 1, 1), Decimal("4.0")),
+        ("USD", date(2026, 1, 20), Decimal("6.0")),
+        ("EUR", date(2026, 1, 5), Decimal("5.5")),
+    ])
+
+def test_convert_many_uses_the_latest_rate_on_or_before_each_day():
+    table = make_table()
+    days = [date(2026, 1, 25), date(2026, 1, 10), date(2026, 1, 9), date(2026, 1, 1), date(2026, 1, 19)]
+    assert table.convert_many([1.0] * 5, ["USD"] * 5, days) == [6.0, 5.0, 4.0, 4.0, 5.0]
+
+def test_convert_many_uses_the_first_rate_before_it():
+    table = make_table()
+    assert table.convert_many([2.0, 2.0], ["USD", "EUR"], [date(2025, 12, 31), date(2026, 1, 1)]) == [8.0, 11.0]
+
+def test_convert_many_mixes_currencies_and_keeps_base_amounts():
+    table = make_table()
+    result = table.convert_many(
+        [10.0, 3.0, 1.0, 7.25],
+        ["BRL", "USD", "EUR", "BRL"],
+        [date(2026, 1, 15), datetime(2026, 1, 20, 23, 59), date(2026, 2, 1), date(2020, 1, 1)],
+    )
+    assert result == [10.0, 18.0, 5.5, 7.25]
+
+def test_convert_many_rounds_half_up_to_cents():
+    table = FxTable("BRL", [("USD", date(2026, 1, 1), Decimal("0.5"))])
+    assert table.convert_many([0.01, 0.03], ["USD", "USD"], [date(2026, 1, 1)] * 2) == [0.01, 0.02]
+
+def test_convert_many_matches_single_lookups():
+    generator = random.Random(7)
+    rates = [
+        ("USD", date(2026, 1, 1) + timedelta(days=generator.randrange(365)), Decimal(generator.randrange(400, 600)) / 100)
+        for _ in range(50)
+    ]
+    table = FxTable("BRL", rates)
+    days = [date(2025, 12, 1) + timedelta(days=generator.randrange(430)) for _ in range(500)]
+    amounts = [generator.randrange(1, 100000) / 100 for _ in days]
+    # Days before the first rate included, against the bisect lookup of each day
+    expected = [
+        float((Decimal(str(amount)) * table.rate("USD", day)).quantize(Decimal("0.01"), ROUND_HALF_UP))
+        for amount, day in zip(amounts, days)
+    ]
+    assert table.convert_many(amounts, ["USD"] * len(days), days) == expected
+
+def test_convert_many_rejects_unknown_currencies():
+    with pytest.raises(KeyError):
+        make_table().convert_many([1.0], ["JPY"], [date(2026, 1, 1)])
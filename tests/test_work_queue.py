@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from app.services import work_queue
+from app.services.work_queue import LocalWorkQueue
+
+TIMEOUT = 5
+
+class FakeSession:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def task(monkeypatch):
+    """A registered task recording (key, thread) of its runs, blocked while its key is in `task.hold`"""
+    monkeypatch.setattr(work_queue, "SessionLocal", FakeSession)
+
+    class Recorder:
+        def __init__(self):
+            self.runs = []
+            self.hold = {}
+            self.started = threading.Event()
+
+        def __call__(self, db, key):
+            self.started.set()
+            if key in self.hold:
+                assert self.hold[key].wait(TIMEOUT)
+            self.runs.append((key, threading.current_thread()))
+
+        def keys(self):
+            return [key for key, _ in self.runs]
+
+    recorder = Recorder()
+    monkeypatch.setitem(work_queue._tasks, "test_task", recorder)
+    return recorder
+
+@pytest.fixture
+def queue():
+    queue = LocalWorkQueue()
+    yield queue
+    queue.stop()
+
+def hold(task, key):
+    task.hold[key] = threading.Event()
+    return task.hold[key]
+
+def test_burst_with_one_key_runs_once(task, queue):
+    # Keep the worker busy so the burst waits in the queue
+    gate = hold(task, "busy")
+    queue.enqueue("test_task", "busy")
+    assert task.started.wait(TIMEOUT)
+    for _ in range(10):
+        queue.enqueue("test_task", "user")
+    gate.set()
+
+    assert queue.join(TIMEOUT)
+    assert task.keys() == ["busy", "user"]
+
+def test_enqueue_while_running_runs_again(task, queue):
+    gate = hold(task, "user")
+    queue.enqueue("test_task", "user")
+    assert task.started.wait(TIMEOUT)
+    # The running task may have read the data before this write
+    queue.enqueue("test_task", "user")
+    gate.set()
+
+    assert queue.join(TIMEOUT)
+    assert task.keys() == ["user", "user"]
+
+def test_stop_drains_the_queue(task, queue):
+    gate = hold(task, "busy")
+    queue.enqueue("test_task", "busy")
+    assert task.started.wait(TIMEOUT)
+    queue.enqueue("test_task", 1)
+    queue.enqueue("test_task", 2)
+    threading.Timer(0.05, gate.set).start()
+
+    queue.stop()
+    assert task.keys() == ["busy", 1, 2]
+
+def test_enqueue_after_stop_runs_inline(task, queue):
+    queue.stop()
+    queue.enqueue("test_task", "late")
+    assert task.runs == [("late", threading.current_thread())]
+
+def test_unknown_task_is_rejected(queue):
+    with pytest.raises(KeyError):
+        queue.enqueue("no_such_task", 1)